@@ -100,6 +100,10 @@ class QualityMetrics:
 class Tier1AutomatedValidator:
     """Tier 1: Automated validation of data formats and basic consistency"""
     
+    # One pooled session for every validator instance, so website checks reuse
+    # keep-alive connections and cached DNS instead of opening a session per URL
+    _http_session: Optional[aiohttp.ClientSession] = None
+    
     def __init__(self):
         self.logger = logging.getLogger("validator.tier1")
         self.geocoder = Nominatim(user_agent="mount_isa_service_validator")
@@ -115,6 +119,30 @@ class Tier1AutomatedValidator:
             'Duchess', 'McKinlay', 'Mornington Island', 'Normanton'
         ]
     
+    @classmethod
+    def _get_http_session(cls) -> aiohttp.ClientSession:
+        """Get the shared HTTP session, creating it on first use"""
+        if cls._http_session is None or cls._http_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=50,
+                limit_per_host=4,
+                ttl_dns_cache=300,
+                keepalive_timeout=30
+            )
+            cls._http_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=10),
+                headers={'Accept-Encoding': 'gzip, deflate'}
+            )
+        return cls._http_session
+    
+    @classmethod
+    async def close_http_session(cls):
+        """Close the shared HTTP session"""
+        if cls._http_session is not None and not cls._http_session.closed:
+            await cls._http_session.close()
+        cls._http_session = None
+    
     async def validate_service(self, service_data: Dict[str, Any]) -> List[ValidationResult]:
         """Perform comprehensive Tier 1 validation"""
         results = []
@@ -318,15 +346,15 @@ class Tier1AutomatedValidator:
             status_code = None
             
             try:
-                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                    async with session.head(url) as response:
-                        status_code = response.status
-                        accessible = status_code < 400
-                        
-                        if status_code >= 400:
-                            issues.append(f"Website returned error code: {status_code}")
-                            suggestions.append("Check if website URL is correct or if site is temporarily down")
-                        
+                session = self._get_http_session()
+                async with session.head(url) as response:
+                    status_code = response.status
+                    accessible = status_code < 400
+                    
+                    if status_code >= 400:
+                        issues.append(f"Website returned error code: {status_code}")
+                        suggestions.append("Check if website URL is correct or if site is temporarily down")
+            
             except asyncio.TimeoutError:
                 issues.append("Website request timed out")
                 suggestions.append("Website may be slow or temporarily unavailable")
@@ -924,7 +952,10 @@ async def main():
     
     # Perform comprehensive validation
     print("Starting comprehensive validation...")
-    validation_report = await qa_orchestrator.validate_service_comprehensive(sample_service)
+    try:
+        validation_report = await qa_orchestrator.validate_service_comprehensive(sample_service)
+    finally:
+        await Tier1AutomatedValidator.close_http_session()
     
     # Display results
     print("\n" + "="*80)
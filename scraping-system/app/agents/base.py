@@ -16,6 +16,7 @@ import redis.asyncio as redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.http import http_client
 from app.core.logging import AgentLogger
 from app.core.exceptions import AgentException
 from app.models.agent import AgentType, AgentStatus, AgentTask, AgentTaskResult
@@ -77,16 +78,14 @@ class BaseAgent(ABC):
         self.request_delay = config.get('request_delay', settings.REQUEST_DELAY)
         
         # Initialize components
-        asyncio.create_task(self._initialize())
+        self._initialization = asyncio.create_task(self._initialize())
     
     async def _initialize(self):
         """Initialize agent resources"""
         try:
-            # Initialize HTTP session
-            timeout = aiohttp.ClientTimeout(total=self.config.get('timeout', 30))
-            self.http_session = aiohttp.ClientSession(
-                timeout=timeout,
-                headers={'User-Agent': settings.USER_AGENT}
+            # Initialize HTTP session on the process-wide connection pool
+            self.http_session = http_client.create_session(
+                timeout=self.config.get('timeout', 30)
             )
             
             # Initialize Redis connection
@@ -162,10 +161,31 @@ class BaseAgent(ABC):
         # Clean up resources
         await self._cleanup()
     
+    async def close(self):
+        """Release an agent that was used directly rather than started.
+        
+        Waits for initialization to finish, then closes the HTTP session and
+        Redis client and takes the agent out of the registry.
+        """
+        await asyncio.gather(self._initialization, return_exceptions=True)
+        
+        try:
+            if self.http_session:
+                await self.http_session.close()
+            
+            if self.redis_client:
+                await self.redis_client.delete(f"agent:{self.agent_id}")
+                await self.redis_client.srem("agents:registry", self.agent_id)
+                await self.redis_client.srem(f"agents:type:{self.agent_type.value}", self.agent_id)
+                await self.redis_client.close()
+        
+        except Exception as e:
+            self.logger.error("Error closing agent", error=e)
+    
     async def _cleanup(self):
         """Clean up agent resources"""
         try:
-            # Close HTTP session
+            # Close HTTP session (the shared connector stays open for other agents)
             if self.http_session:
                 await self.http_session.close()
             
@@ -2,125 +2,32 @@
 Discovery Agent - Intelligent service discovery and extraction
 """
 
-import re
-import asyncio
 import hashlib
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
-from urllib.parse import urljoin, urlparse
-from dataclasses import dataclass
+from urllib.parse import urlparse
 
 import aiohttp
-from bs4 import BeautifulSoup
 import spacy
 from textblob import TextBlob
-import phonenumbers
 
 from app.agents.base import BaseAgent
 from app.models.agent import AgentType, AgentTask
 from app.models.service import ServiceCreate
-from app.core.exceptions import ExtractionException
-
-
-@dataclass
-class ExtractionPattern:
-    """Pattern for extracting specific data types"""
-    name: str
-    pattern: str
-    confidence: float
-    examples: List[str]
-
-
-class ServicePatternLibrary:
-    """Library of patterns for service information extraction"""
-    
-    def __init__(self):
-        self.patterns = {
-            'contact': {
-                'phone': [
-                    ExtractionPattern(
-                        name="australian_phone",
-                        pattern=r'(?:\+?61\s?)?(?:\(0\d\)\s?|\(0\d{1,2}\)\s?|0\d)\s?\d{4}\s?\d{4}',
-                        confidence=0.9,
-                        examples=["(07) 4744 4444", "0747444444", "+61 7 4744 4444"]
-                    ),
-                    ExtractionPattern(
-                        name="mobile_phone", 
-                        pattern=r'(?:\+?61\s?)?4\d{2}\s?\d{3}\s?\d{3}',
-                        confidence=0.8,
-                        examples=["0412 345 678", "61412345678", "412 345 678"]
-                    )
-                ],
-                'email': [
-                    ExtractionPattern(
-                        name="standard_email",
-                        pattern=r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-                        confidence=0.9,
-                        examples=["info@example.com", "contact@service.org.au"]
-                    )
-                ],
-                'website': [
-                    ExtractionPattern(
-                        name="standard_url",
-                        pattern=r'https?://[^\s<>"{}|\\^`\[\]]+',
-                        confidence=0.9,
-                        examples=["https://example.com", "http://service.org.au"]
-                    )
-                ]
-            },
-            'location': {
-                'address': [
-                    ExtractionPattern(
-                        name="australian_address",
-                        pattern=r'\d+\s+[A-Za-z\s]+(?:Street|St|Road|Rd|Avenue|Ave|Drive|Dr|Place|Pl|Boulevard|Blvd|Lane|Ln|Court|Ct|Crescent|Cres|Close|Cl|Terrace|Tce|Highway|Hwy)\b',
-                        confidence=0.8,
-                        examples=["123 Main Street", "45 Smith Road", "67 Queen Ave"]
-                    )
-                ],
-                'postcode': [
-                    ExtractionPattern(
-                        name="qld_postcode",
-                        pattern=r'\b4[0-9]{3}\b',
-                        confidence=0.9,
-                        examples=["4825", "4000", "4670"]
-                    )
-                ]
-            },
-            'service_indicators': {
-                'operating_hours': [
-                    ExtractionPattern(
-                        name="business_hours",
-                        pattern=r'(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|mon|tue|wed|thu|fri|sat|sun)[\s:-]*(?:\d{1,2}(?::\d{2})?\s*(?:am|pm)?)\s*-?\s*(?:\d{1,2}(?::\d{2})?\s*(?:am|pm)?)',
-                        confidence=0.7,
-                        examples=["Monday 9:00 AM - 5:00 PM", "Mon-Fri: 8am-6pm"]
-                    )
-                ],
-                'services_offered': [
-                    ExtractionPattern(
-                        name="service_list",
-                        pattern=r'(?:services?|programs?|offerings?|we provide|we offer)[\s:]*([^.]+)',
-                        confidence=0.6,
-                        examples=["Services: counselling, support groups", "We offer mental health services"]
-                    )
-                ]
-            }
-        }
-        
-        # Service category keywords
-        self.category_keywords = {
-            'health': ['health', 'medical', 'doctor', 'clinic', 'hospital', 'gp', 'healthcare'],
-            'mental_health': ['mental health', 'psychology', 'counselling', 'therapy', 'psychiatric', 'wellbeing'],
-            'disability': ['disability', 'ndis', 'accessible', 'special needs', 'inclusive', 'support'],
-            'aged_care': ['aged care', 'elderly', 'seniors', 'retirement', 'nursing home'],
-            'youth': ['youth', 'young people', 'teenagers', 'adolescent', 'teen'],
-            'family': ['family', 'children', 'parenting', 'childcare', 'kids', 'child'],
-            'housing': ['housing', 'accommodation', 'rental', 'homeless', 'shelter'],
-            'employment': ['employment', 'job', 'career', 'training', 'work', 'jobseeker'],
-            'education': ['education', 'school', 'training', 'learning', 'university', 'tafe'],
-            'legal': ['legal', 'law', 'advice', 'court', 'justice', 'solicitor'],
-            'emergency': ['emergency', 'crisis', 'urgent', '24 hour', 'hotline'],
-            'transport': ['transport', 'bus', 'taxi', 'mobility', 'travel']
-        }
+from app.core.config import settings
+from app.core.exceptions import ExtractionException, ContentRejectedException
+from app.crawling.fetch import FetchedPage, fetch_page
+from app.crawling.host_scheduler import host_scheduler
+from app.crawling.robots import robots_cache
+from app.crawling.sitemap import discover_sitemap_urls
+from app.crawling.archive import page_archive
+from app.crawling.extraction import ServiceExtractor
+from app.crawling.boilerplate import MainContent, extract_main_content
+from app.crawling.simhash import near_duplicate_index, text_fingerprint
+from app.crawling.rendering import render_pool
+from app.crawling.documents import document_kind, document_processor, supported_document_types
+from app.crawling.extraction_cache import extraction_cache
+from app.crawling.links import extract_relevant_links
 
 
 class DiscoveryAgent(BaseAgent):
@@ -129,8 +36,12 @@ class DiscoveryAgent(BaseAgent):
     def __init__(self, agent_id: str, config: Optional[Dict[str, Any]] = None, **kwargs):
         super().__init__(agent_id, AgentType.DISCOVERY, config, **kwargs)
         
-        # Initialize pattern library
-        self.pattern_library = ServicePatternLibrary()
+        # Initialize extractor and its pattern library
+        self.extractor = ServiceExtractor()
+        self.pattern_library = self.extractor.pattern_library
+        self.archive_pages = self.config.get('archive_pages', settings.ARCHIVE_ENABLED)
+        self.render_fallback = self.config.get('render_fallback', settings.RENDER_ENABLED)
+        self.process_documents = self.config.get('process_documents', settings.DOCUMENTS_ENABLED)
         
         # Initialize NLP components
         self.nlp = None
@@ -141,12 +52,26 @@ class DiscoveryAgent(BaseAgent):
             'pages_processed': 0,
             'services_discovered': 0,
             'extraction_failures': 0,
+            'pages_rejected': 0,
+            'pages_truncated': 0,
+            'bytes_downloaded': 0,
+            'robots_disallowed': 0,
+            'sitemap_urls_seeded': 0,
+            'near_duplicates_skipped': 0,
+            'boilerplate_chars_removed': 0,
+            'content_chars_kept': 0,
+            'structured_data_pages': 0,
+            'pages_rendered': 0,
+            'documents_processed': 0,
+            'document_pages': 0,
+            'extraction_cache_hits': 0,
             'pattern_matches': {}
         }
         
         # URL tracking
         self.processed_urls = set()
         self.failed_urls = set()
+        self.sitemap_seeded_hosts = set()
     
     def _initialize_nlp(self):
         """Initialize NLP components"""
@@ -179,6 +104,8 @@ class DiscoveryAgent(BaseAgent):
         url = payload['url']
         max_depth = payload.get('max_depth', 2)
         current_depth = payload.get('current_depth', 0)
+        options = payload.get('discovery_options') or {}
+        respect_robots = options.get('respect_robots_txt', True)
         
         if url in self.processed_urls:
             return {
@@ -195,16 +122,76 @@ class DiscoveryAgent(BaseAgent):
             }
         
         try:
-            # Fetch page content
-            content = await self._fetch_page_content(url)
+            # Honour robots.txt before touching the page
+            if respect_robots and not await robots_cache.can_fetch(self.http_session, url):
+                self.extraction_stats['robots_disallowed'] += 1
+                return {
+                    'status': 'skipped',
+                    'reason': 'robots_disallowed',
+                    'url': url
+                }
+            
+            # Fetch page content - short JavaScript shells are kept if we can render them later
+            can_render = self.render_fallback and render_pool.available
+            page = await self._fetch_page(url, allow_short=can_render)
+            
+            # PDFs and Word documents go to the document workers instead of the HTML pipeline
+            if document_kind(page.content_type):
+                return await self._discover_services_from_document(page, url, current_depth)
+            
+            content = page.text
+            
+            # Strip menus, footers and banners once for both fingerprinting and extraction
+            main_content = extract_main_content(content)
+            self.extraction_stats['boilerplate_chars_removed'] += (
+                main_content.original_chars - main_content.content_chars
+            )
+            self.extraction_stats['content_chars_kept'] += main_content.content_chars
+            
+            # Print views, mirrors and repeated listings add nothing new - link them to the original
+            fingerprint = text_fingerprint(main_content.text)
+            if fingerprint is not None:
+                duplicate = near_duplicate_index.find_near_duplicate(fingerprint, exclude_url=url)
+                if duplicate:
+                    canonical_url, distance = duplicate
+                    self.processed_urls.add(url)
+                    self.extraction_stats['near_duplicates_skipped'] += 1
+                    return {
+                        'status': 'skipped',
+                        'reason': 'near_duplicate',
+                        'url': url,
+                        'canonical_url': canonical_url,
+                        'hamming_distance': distance,
+                        'boilerplate_removed_pct': main_content.removed_pct,
+                        'depth': current_depth
+                    }
+                near_duplicate_index.add(url, fingerprint)
             
             # Extract services from content
-            services = await self._extract_services_from_content(content, url)
+            services = await self._extract_services_from_content(content, url, main_content)
+            
+            # Only pages that gave us nothing statically are worth a browser render
+            if not services and can_render:
+                rendered = await self._render_page_content(url)
+                if rendered:
+                    content = rendered
+                    main_content = extract_main_content(content)
+                    services = await self._extract_services_from_content(content, url, main_content)
+            
+            if len(content) < 100:
+                raise ExtractionException(
+                    f"Content too short for {url}",
+                    url=url
+                )
+            
+            if any(service.get('extraction_method') == 'structured_data' for service in services):
+                self.extraction_stats['structured_data_pages'] += 1
             
-            # Find additional URLs for discovery
-            additional_urls = []
+            # Find additional URLs for discovery, best candidates first
+            frontier = []
             if current_depth < max_depth:
-                additional_urls = await self._extract_relevant_links(content, url)
+                frontier = await self._build_frontier(content, url, current_depth, respect_robots)
+            additional_urls = [candidate['url'] for candidate in frontier]
             
             # Update statistics
             self.extraction_stats['pages_processed'] += 1
@@ -219,6 +206,8 @@ class DiscoveryAgent(BaseAgent):
                 'services_found': len(services),
                 'services': services,
                 'additional_urls': additional_urls,
+                'frontier': frontier,
+                'boilerplate_removed_pct': main_content.removed_pct,
                 'depth': current_depth
             }
             
@@ -243,478 +232,204 @@ class DiscoveryAgent(BaseAgent):
                 'depth': current_depth
             }
     
-    async def _fetch_page_content(self, url: str) -> str:
-        """Fetch content from a webpage"""
+    async def _discover_services_from_document(
+        self,
+        page: FetchedPage,
+        url: str,
+        current_depth: int
+    ) -> Dict[str, Any]:
+        """Extract services from a PDF or Word document, page by page"""
+        services = []
+        pages_read = 0
+        
+        async for document_page in document_processor.iter_pages(page.body, page.content_type, url):
+            pages_read += 1
+            services.extend(
+                self.extractor.extract_document_page(document_page.text, url, document_page.page_number)
+            )
+        
+        self.extraction_stats['documents_processed'] += 1
+        self.extraction_stats['document_pages'] += pages_read
+        self.extraction_stats['pages_processed'] += 1
+        self.extraction_stats['services_discovered'] += len(services)
+        self.processed_urls.add(url)
+        
+        self.logger.info(
+            f"Successfully processed document {url}",
+            services_found=len(services),
+            document_pages=pages_read
+        )
+        
+        return {
+            'status': 'success',
+            'url': url,
+            'services_found': len(services),
+            'services': services,
+            'additional_urls': [],
+            'frontier': [],
+            'document_pages': pages_read,
+            'depth': current_depth
+        }
+    
+    async def _fetch_page(self, url: str, allow_short: bool = False) -> FetchedPage:
+        """Fetch a webpage or document"""
         try:
-            # Respect rate limiting
-            await asyncio.sleep(self.request_delay)
+            # Respect per-host rate limits, including robots.txt crawl-delay
+            await host_scheduler.wait(url, min_delay=self.request_delay)
             
-            async with self.http_session.get(url) as response:
-                if response.status != 200:
-                    raise ExtractionException(
-                        f"HTTP {response.status} error for {url}",
-                        url=url
-                    )
-                
-                content = await response.text()
-                
-                # Basic content validation
-                if len(content) < 100:
-                    raise ExtractionException(
-                        f"Content too short for {url}",
-                        url=url
-                    )
-                
-                return content
+            # Stream the body so oversized or non-HTML responses are dropped early
+            allowed_types = list(settings.ALLOWED_CONTENT_TYPES)
+            if self.process_documents:
+                allowed_types += supported_document_types()
+            
+            page = await fetch_page(
+                self.http_session,
+                url,
+                max_bytes=self.config.get('max_page_bytes', settings.MAX_PAGE_BYTES),
+                allowed_types=allowed_types
+            )
+            
+            if page.status != 200:
+                raise ExtractionException(
+                    f"HTTP {page.status} error for {url}",
+                    url=url
+                )
+            
+            self.extraction_stats['bytes_downloaded'] += len(page.body)
+            if page.truncated:
+                self.extraction_stats['pages_truncated'] += 1
+            
+            # Keep the raw response so extraction can be re-run without re-crawling
+            if self.archive_pages:
+                await page_archive.store(page)
+            
+            # Basic content validation
+            if not document_kind(page.content_type) and len(page.text) < 100 and not allow_short:
+                raise ExtractionException(
+                    f"Content too short for {url}",
+                    url=url
+                )
+            
+            return page
                 
+        except ContentRejectedException:
+            self.extraction_stats['pages_rejected'] += 1
+            raise
         except aiohttp.ClientError as e:
             raise ExtractionException(
                 f"Network error fetching {url}: {str(e)}",
                 url=url
             )
     
-    async def _extract_services_from_content(self, content: str, url: str) -> List[Dict[str, Any]]:
-        """Extract service information from webpage content"""
-        soup = BeautifulSoup(content, 'html.parser')
-        text_content = soup.get_text().lower()
-        
-        # Calculate page relevance
-        relevance_score = self._calculate_page_relevance(text_content)
-        
-        if relevance_score < 0.3:  # Not relevant enough
-            return []
-        
-        # Extract potential services
-        services = []
+    async def _render_page_content(self, url: str) -> Optional[str]:
+        """Render a page in the shared headless browser pool"""
+        await host_scheduler.wait(url, min_delay=self.request_delay)
         
-        # Look for structured service information
-        service_sections = self._identify_service_sections(soup)
-        
-        for section in service_sections:
-            try:
-                service_data = await self._extract_service_from_section(section, url)
-                if service_data:
-                    services.append(service_data)
-            except Exception as e:
-                self.logger.warning(f"Failed to extract service from section", error=e)
-        
-        # If no structured services found, try page-level extraction
-        if not services and relevance_score > 0.7:
-            service_data = await self._extract_service_from_page(soup, url)
-            if service_data:
-                services.append(service_data)
+        rendered = await render_pool.render(url)
+        if rendered is None or rendered.status not in (None, 200):
+            return None
         
+        self.extraction_stats['pages_rendered'] += 1
+        
+        if self.archive_pages:
+            body = rendered.html.encode('utf-8')
+            await page_archive.store(FetchedPage(
+                url=rendered.url,
+                status=rendered.status or 200,
+                content_type='text/html',
+                charset='utf-8',
+                body=body,
+                truncated=False
+            ))
+        
+        self.logger.debug(f"Rendered {url}", render_time=rendered.render_time)
+        return rendered.html
+    
+    async def _extract_services_from_content(
+        self,
+        content: str,
+        url: str,
+        main_content: Optional[MainContent] = None
+    ) -> List[Dict[str, Any]]:
+        """Extract service information from webpage content"""
+        # Unchanged pages extracted by the same extractor version give the same services
+        cached = await extraction_cache.get(url, content, self.extractor.version)
+        if cached is not None:
+            self.extraction_stats['extraction_cache_hits'] += 1
+            return cached
+        
+        services = self.extractor.extract(content, url, main_content)
+        await extraction_cache.set(url, content, self.extractor.version, services)
         return services
     
     def _calculate_page_relevance(self, text: str) -> float:
         """Calculate how relevant a page is to community services"""
-        score = 0.0
-        
-        # Check for service keywords
-        total_keywords = 0
-        matched_keywords = 0
-        
-        for category, keywords in self.pattern_library.category_keywords.items():
-            for keyword in keywords:
-                total_keywords += 1
-                if keyword in text:
-                    matched_keywords += 1
-                    score += 1.0 / len(keywords)  # Weight by category size
-        
-        # Boost score for common service indicators
-        service_indicators = [
-            'contact us', 'services', 'programs', 'support', 'help',
-            'community', 'assistance', 'resources', 'information'
-        ]
-        
-        for indicator in service_indicators:
-            if indicator in text:
-                score += 0.1
-        
-        # Check for contact information presence
-        if re.search(self.pattern_library.patterns['contact']['phone'][0].pattern, text):
-            score += 0.2
-        if re.search(self.pattern_library.patterns['contact']['email'][0].pattern, text):
-            score += 0.1
-        if 'address' in text or 'location' in text:
-            score += 0.1
-        
-        return min(score, 1.0)
-    
-    def _identify_service_sections(self, soup: BeautifulSoup) -> List[Any]:
-        """Identify sections of the page that likely contain service information"""
-        sections = []
-        
-        # Look for common service section patterns
-        service_selectors = [
-            'div[class*="service"]',
-            'section[class*="service"]',
-            'div[class*="program"]',
-            'div[class*="offering"]',
-            'article',
-            'div[class*="card"]',
-            '.service-item',
-            '.program-item'
-        ]
-        
-        for selector in service_selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                text = element.get_text().lower()
-                if len(text) > 50 and any(
-                    keyword in text 
-                    for keywords in self.pattern_library.category_keywords.values()
-                    for keyword in keywords
-                ):
-                    sections.append(element)
-        
-        # If no specific sections found, try main content areas
-        if not sections:
-            main_selectors = ['main', '.main-content', '.content', 'article', '.page-content']
-            for selector in main_selectors:
-                element = soup.select_one(selector)
-                if element:
-                    sections.append(element)
-                    break
-        
-        return sections[:5]  # Limit to 5 sections to avoid processing too much
-    
-    async def _extract_service_from_section(self, section: Any, url: str) -> Optional[Dict[str, Any]]:
-        """Extract service information from a specific page section"""
-        text_content = section.get_text()
-        
-        # Extract basic information
-        service_data = {
-            'source_url': url,
-            'extraction_method': 'section_based',
-            'confidence_score': 0.0
-        }
-        
-        # Extract name (look for headings)
-        name = self._extract_service_name(section)
-        if not name:
-            return None
-        
-        service_data['name'] = name
-        
-        # Extract description
-        description = self._extract_description(section, text_content)
-        service_data['description'] = description
-        
-        # Extract contact information
-        contact_info = self._extract_contact_information(text_content)
-        service_data.update(contact_info)
-        
-        # Extract location information
-        location_info = self._extract_location_information(text_content)
-        service_data.update(location_info)
-        
-        # Extract service details
-        service_details = self._extract_service_details(text_content)
-        service_data.update(service_details)
-        
-        # Classify service category
-        service_data['category'] = self._classify_service_category(text_content)
-        
-        # Calculate confidence score
-        service_data['confidence_score'] = self._calculate_extraction_confidence(service_data)
-        
-        # Only return if confidence is reasonable
-        if service_data['confidence_score'] > 0.4:
-            return service_data
-        
-        return None
-    
-    async def _extract_service_from_page(self, soup: BeautifulSoup, url: str) -> Optional[Dict[str, Any]]:
-        """Extract service information from entire page"""
-        text_content = soup.get_text()
-        
-        service_data = {
-            'source_url': url,
-            'extraction_method': 'page_based',
-            'confidence_score': 0.0
-        }
-        
-        # Extract page title as service name
-        title_element = soup.find('title')
-        if title_element:
-            service_data['name'] = self._clean_service_name(title_element.get_text())
-        else:
-            # Try h1 tags
-            h1_element = soup.find('h1')
-            if h1_element:
-                service_data['name'] = self._clean_service_name(h1_element.get_text())
-            else:
-                return None
-        
-        # Extract meta description as service description
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc and meta_desc.get('content'):
-            service_data['description'] = meta_desc['content']
-        else:
-            # Extract first substantial paragraph
-            paragraphs = soup.find_all('p')
-            for p in paragraphs:
-                p_text = p.get_text().strip()
-                if 50 < len(p_text) < 300:
-                    service_data['description'] = p_text
-                    break
-        
-        # Extract contact and location information
-        contact_info = self._extract_contact_information(text_content)
-        service_data.update(contact_info)
-        
-        location_info = self._extract_location_information(text_content)
-        service_data.update(location_info)
-        
-        service_details = self._extract_service_details(text_content)
-        service_data.update(service_details)
-        
-        # Classify service category
-        service_data['category'] = self._classify_service_category(text_content)
-        
-        # Calculate confidence score
-        service_data['confidence_score'] = self._calculate_extraction_confidence(service_data)
-        
-        if service_data['confidence_score'] > 0.5:
-            return service_data
-        
-        return None
-    
-    def _extract_service_name(self, section: Any) -> Optional[str]:
-        """Extract service name from section"""
-        # Look for headings
-        for tag in ['h1', 'h2', 'h3', 'h4']:
-            heading = section.find(tag)
-            if heading:
-                name = heading.get_text().strip()
-                if 3 < len(name) < 100:
-                    return self._clean_service_name(name)
-        
-        # Look for elements with name-like classes
-        name_selectors = [
-            '.title', '.name', '.service-name', '.program-name',
-            '[class*="title"]', '[class*="name"]'
-        ]
-        
-        for selector in name_selectors:
-            element = section.select_one(selector)
-            if element:
-                name = element.get_text().strip()
-                if 3 < len(name) < 100:
-                    return self._clean_service_name(name)
-        
-        return None
-    
-    def _clean_service_name(self, name: str) -> str:
-        """Clean and normalize service name"""
-        # Remove common website suffixes
-        name = re.sub(r'\s*[-|]\s*.*$', '', name)
-        name = re.sub(r'\s*\|\s*.*$', '', name)
-        
-        # Remove extra whitespace
-        name = ' '.join(name.split())
-        
-        return name.strip()
-    
-    def _extract_description(self, section: Any, text_content: str) -> str:
-        """Extract service description"""
-        # Look for description in meta tags or structured data
-        desc_selectors = [
-            '.description', '.summary', '.about', '.overview',
-            '[class*="description"]', '[class*="summary"]'
-        ]
-        
-        for selector in desc_selectors:
-            element = section.select_one(selector)
-            if element:
-                desc = element.get_text().strip()
-                if 20 < len(desc) < 500:
-                    return desc
-        
-        # Fall back to first substantial paragraph
-        paragraphs = section.find_all('p')
-        for p in paragraphs:
-            desc = p.get_text().strip()
-            if 20 < len(desc) < 500:
-                return desc
-        
-        return "Service description not available"
-    
-    def _extract_contact_information(self, text: str) -> Dict[str, Any]:
-        """Extract contact information from text"""
-        contact_info = {}
-        
-        # Extract phone number
-        for pattern_info in self.pattern_library.patterns['contact']['phone']:
-            match = re.search(pattern_info.pattern, text)
-            if match:
-                phone = match.group().strip()
-                try:
-                    parsed_phone = phonenumbers.parse(phone, "AU")
-                    if phonenumbers.is_valid_number(parsed_phone):
-                        contact_info['phone'] = phonenumbers.format_number(
-                            parsed_phone, phonenumbers.PhoneNumberFormat.NATIONAL
-                        )
-                        break
-                except:
-                    contact_info['phone'] = phone
-                    break
-        
-        # Extract email
-        for pattern_info in self.pattern_library.patterns['contact']['email']:
-            match = re.search(pattern_info.pattern, text)
-            if match:
-                contact_info['email'] = match.group().strip()
-                break
-        
-        # Extract website
-        for pattern_info in self.pattern_library.patterns['contact']['website']:
-            match = re.search(pattern_info.pattern, text)
-            if match:
-                website = match.group().strip()
-                if not website.startswith(('http://', 'https://')):
-                    website = 'https://' + website
-                contact_info['website'] = website
-                break
-        
-        return contact_info
-    
-    def _extract_location_information(self, text: str) -> Dict[str, Any]:
-        """Extract location information from text"""
-        location_info = {}
-        
-        # Extract address
-        for pattern_info in self.pattern_library.patterns['location']['address']:
-            match = re.search(pattern_info.pattern, text)
-            if match:
-                location_info['address'] = match.group().strip()
-                break
-        
-        # Extract postcode
-        for pattern_info in self.pattern_library.patterns['location']['postcode']:
-            match = re.search(pattern_info.pattern, text)
-            if match:
-                location_info['postcode'] = match.group().strip()
-                break
-        
-        # Default location values for Mount Isa region
-        if 'postcode' not in location_info:
-            location_info['postcode'] = '4825'
-        
-        location_info['suburb'] = location_info.get('suburb', 'Mount Isa')
-        location_info['state'] = 'QLD'
-        
-        return location_info
-    
-    def _extract_service_details(self, text: str) -> Dict[str, Any]:
-        """Extract service-specific details"""
-        details = {}
-        
-        # Extract operating hours
-        hours_pattern = self.pattern_library.patterns['service_indicators']['operating_hours'][0]
-        hours_matches = re.findall(hours_pattern.pattern, text, re.IGNORECASE)
-        if hours_matches:
-            details['operating_hours'] = hours_matches[0]
-        
-        # Extract services offered
-        services_pattern = self.pattern_library.patterns['service_indicators']['services_offered'][0]
-        services_match = re.search(services_pattern.pattern, text, re.IGNORECASE)
-        if services_match:
-            services_text = services_match.group(1)
-            # Simple service list extraction
-            services_list = [s.strip() for s in re.split(r'[,;]', services_text) if s.strip()]
-            details['services_offered'] = services_list[:5]  # Limit to 5 services
-        
-        return details
-    
-    def _classify_service_category(self, text: str) -> str:
-        """Classify service into predefined categories"""
-        category_scores = {}
-        text_lower = text.lower()
-        
-        for category, keywords in self.pattern_library.category_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
-            if score > 0:
-                category_scores[category] = score
-        
-        if category_scores:
-            return max(category_scores, key=category_scores.get)
-        
-        return 'general'
-    
-    def _calculate_extraction_confidence(self, service_data: Dict[str, Any]) -> float:
-        """Calculate confidence score for extracted service data"""
-        score = 0.0
-        
-        # Name quality
-        if service_data.get('name'):
-            name_length = len(service_data['name'])
-            if 5 <= name_length <= 50:
-                score += 0.2
-            elif name_length > 50:
-                score += 0.1
-        
-        # Description quality
-        if service_data.get('description'):
-            desc_length = len(service_data['description'])
-            if 50 <= desc_length <= 300:
-                score += 0.2
-            elif desc_length > 300:
-                score += 0.15
-        
-        # Contact information
-        if service_data.get('phone'):
-            score += 0.2
-        if service_data.get('email'):
-            score += 0.15
-        if service_data.get('website'):
-            score += 0.1
-        
-        # Location information
-        if service_data.get('address'):
-            score += 0.15
-        
-        # Service details
-        if service_data.get('operating_hours'):
-            score += 0.1
-        if service_data.get('services_offered'):
-            score += 0.1
-        
-        return min(score, 1.0)
+        return self.extractor._calculate_page_relevance(text)
     
     async def _extract_relevant_links(self, content: str, base_url: str) -> List[str]:
         """Extract relevant links for further discovery"""
-        soup = BeautifulSoup(content, 'html.parser')
-        relevant_links = []
-        
-        links = soup.find_all('a', href=True)
-        
-        for link in links:
-            href = link['href']
-            full_url = urljoin(base_url, href)
+        return extract_relevant_links(content, base_url, exclude=self.processed_urls)
+    
+    async def _build_frontier(
+        self,
+        content: str,
+        url: str,
+        current_depth: int,
+        respect_robots: bool
+    ) -> List[Dict[str, Any]]:
+        """Rank follow-up URLs, seeding from sitemaps on the first page of a site"""
+        candidates = []
+        
+        # Sitemaps list service pages directly, so they beat guessing from anchor text
+        if current_depth == 0:
+            candidates.extend(await self._seed_from_sitemaps(url))
+        
+        for link in await self._extract_relevant_links(content, url):
+            candidates.append({'url': link, 'priority': 0.4, 'source': 'link'})
+        
+        host = urlparse(url).netloc.lower()
+        frontier = {}
+        
+        for candidate in candidates:
+            candidate_url = candidate['url']
+            if candidate_url in self.processed_urls or candidate_url in self.failed_urls:
+                continue
             
-            # Skip if already processed
-            if full_url in self.processed_urls:
+            existing = frontier.get(candidate_url)
+            if existing and existing['priority'] >= candidate['priority']:
                 continue
             
-            # Check if link text suggests service-related content
-            link_text = link.get_text().lower().strip()
+            # Robots policy for this host is already cached, so the check is free
+            if respect_robots and urlparse(candidate_url).netloc.lower() == host:
+                if not await robots_cache.can_fetch(self.http_session, candidate_url):
+                    continue
             
-            # Service-related link text indicators
-            service_indicators = [
-                'service', 'program', 'support', 'help', 'about',
-                'contact', 'community', 'resource', 'assistance'
-            ]
+            frontier[candidate_url] = candidate
+        
+        return sorted(frontier.values(), key=lambda c: c['priority'], reverse=True)
+    
+    async def _seed_from_sitemaps(self, url: str) -> List[Dict[str, Any]]:
+        """Get prioritized URLs from a site's sitemaps, once per host"""
+        host = urlparse(url).netloc.lower()
+        if host in self.sitemap_seeded_hosts:
+            return []
+        self.sitemap_seeded_hosts.add(host)
+        
+        try:
+            policy = await robots_cache.get_policy(self.http_session, url)
+            seeds = await discover_sitemap_urls(
+                self.http_session,
+                url,
+                policy.sitemaps,
+                limit=self.config.get('max_sitemap_seeds', settings.SITEMAP_MAX_SEEDS)
+            )
             
-            if any(indicator in link_text for indicator in service_indicators):
-                relevant_links.append(full_url)
-            elif any(indicator in full_url.lower() for indicator in service_indicators):
-                relevant_links.append(full_url)
+            self.extraction_stats['sitemap_urls_seeded'] += len(seeds)
+            return seeds
         
-        # Remove duplicates and limit
-        unique_links = list(dict.fromkeys(relevant_links))
-        return unique_links[:10]  # Limit to 10 links per page
+        except Exception as e:
+            self.logger.warning(f"Sitemap discovery failed for {host}", error=e)
+            return []
     
     def get_extraction_statistics(self) -> Dict[str, Any]:
         """Get extraction performance statistics"""
@@ -731,5 +446,26 @@ class DiscoveryAgent(BaseAgent):
             'services_per_page': (
                 self.extraction_stats['services_discovered'] / max(1, total_attempts)
             ),
+            'pages_rejected': self.extraction_stats['pages_rejected'],
+            'pages_truncated': self.extraction_stats['pages_truncated'],
+            'bytes_downloaded': self.extraction_stats['bytes_downloaded'],
+            'robots_disallowed': self.extraction_stats['robots_disallowed'],
+            'sitemap_urls_seeded': self.extraction_stats['sitemap_urls_seeded'],
+            'near_duplicates_skipped': self.extraction_stats['near_duplicates_skipped'],
+            'structured_data_pages': self.extraction_stats['structured_data_pages'],
+            'pages_rendered': self.extraction_stats['pages_rendered'],
+            'documents_processed': self.extraction_stats['documents_processed'],
+            'document_pages': self.extraction_stats['document_pages'],
+            'documents': document_processor.get_statistics(),
+            'extraction_cache_hits': self.extraction_stats['extraction_cache_hits'],
+            'extraction_cache': extraction_cache.get_statistics(),
+            'rendering': render_pool.get_statistics(),
+            'boilerplate_removed_pct': round(
+                100.0 * self.extraction_stats['boilerplate_chars_removed'] / max(
+                    1,
+                    self.extraction_stats['boilerplate_chars_removed'] + self.extraction_stats['content_chars_kept']
+                ),
+                1
+            ),
             'pattern_matches': self.extraction_stats['pattern_matches']
         }
\ No newline at end of file
@@ -5,18 +5,34 @@ through search engines and then scrapes them for information
 
 import asyncio
 import aiohttp
+import heapq
+import itertools
 import json
 import re
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
-from urllib.parse import urljoin, urlparse, quote_plus
-from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional, Set, Tuple
+from urllib.parse import urljoin, quote_plus
+from dataclasses import dataclass, field, replace
 import random
 
 from bs4 import BeautifulSoup
 from app.agents.base import BaseAgent
 from app.models.agent import AgentType, AgentTask
 from app.core.exceptions import ResearchException
+from app.core.single_flight import fetch_flight, search_flight, canonicalize_url
+from app.core.config import settings
+from app.crawling.archive import page_archive
+from app.crawling.extraction import ServiceExtractor
+from app.crawling.extraction_cache import extraction_cache
+from app.crawling.host_scheduler import host_scheduler
+from app.crawling.search_providers import LiveSearchProvider, SearchProvider
+from app.crawling.serp_cache import normalize_query, serp_cache
+from app.crawling.boilerplate import extract_main_content
+from app.crawling.checkpoints import CheckpointState, ResearchCheckpoint
+from app.crawling.domains import site_key
+from app.crawling.query_planner import QueryPlanner, query_key, query_planner as shared_query_planner
+from app.crawling.relevance import RELEVANT_DOMAINS, RelevanceScorer
+from app.crawling.simhash import near_duplicate_index, text_fingerprint
 
 
 @dataclass
@@ -38,14 +54,104 @@ class ResearchTarget:
     relevance_score: float
     source_query: str
     discovered_at: datetime
+    # Every query that turned up this site, including ones merged from duplicates
+    source_queries: List[str] = field(default_factory=list)
+
+
+class SiteDeduplicator:
+    """Keeps one research target per registered domain and path prefix.
+    
+    Each site is a single dict lookup on its key, so deduplicating is linear.
+    A duplicate isn't just dropped: its queries are added to the kept site's
+    provenance and its snippet to the kept snippet, so nothing it said is lost.
+    A more relevant duplicate also hands the kept site its URL, title and
+    score, unless the kept site has been pinned because it's already in use.
+    """
+    
+    SNIPPET_SEPARATOR = ' … '
+    MAX_SNIPPETS = 3
+    
+    def __init__(self, path_depth: Optional[int] = None):
+        self.path_depth = settings.RESEARCH_DEDUPE_PATH_DEPTH if path_depth is None else path_depth
+        self.sites: Dict[Tuple[str, str], ResearchTarget] = {}
+        self._snippets: Dict[Tuple[str, str], List[str]] = {}
+        self._pinned: Set[Tuple[str, str]] = set()
+        self.merged = 0
+    
+    def add(self, site: ResearchTarget) -> Tuple[ResearchTarget, bool]:
+        """Keep a site if its key is new, otherwise merge it into the kept one.
+        
+        Returns the kept site, which is site itself if its key was new, and
+        whether the kept site changed.
+        """
+        if not site.source_queries:
+            site.source_queries = [site.source_query]
+        
+        key = site_key(site.url, self.path_depth)
+        kept = self.sites.get(key)
+        if kept is None:
+            self.sites[key] = site
+            self._snippets[key] = site.snippet.split(self.SNIPPET_SEPARATOR) if site.snippet else []
+            return site, True
+        
+        self.merged += 1
+        changed = False
+        
+        if site.relevance_score > kept.relevance_score and key not in self._pinned:
+            kept.url = site.url
+            kept.title = site.title
+            kept.relevance_score = site.relevance_score
+            kept.source_query = site.source_query
+            kept.discovered_at = site.discovered_at
+            changed = True
+        
+        for query in site.source_queries:
+            if query not in kept.source_queries:
+                kept.source_queries.append(query)
+                changed = True
+        
+        # A checkpointed site being replayed may carry several snippets already
+        snippets = self._snippets[key]
+        for snippet in site.snippet.split(self.SNIPPET_SEPARATOR) if site.snippet else []:
+            if snippet not in snippets and len(snippets) < self.MAX_SNIPPETS:
+                snippets.append(snippet)
+                kept.snippet = self.SNIPPET_SEPARATOR.join(snippets)
+                changed = True
+        
+        return kept, changed
+    
+    def pin(self, site: ResearchTarget):
+        """Stop more relevant duplicates from replacing a kept site's URL, once it's being fetched"""
+        self._pinned.add(site_key(site.url, self.path_depth))
 
 
 class MountIsaResearchAgent(BaseAgent):
     """Intelligent agent that researches Mount Isa services automatically"""
     
-    def __init__(self, agent_id: str, config: Optional[Dict[str, Any]] = None, **kwargs):
+    def __init__(
+        self,
+        agent_id: str,
+        config: Optional[Dict[str, Any]] = None,
+        search_provider: Optional[SearchProvider] = None,
+        on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        engine_semaphores: Optional[Dict[str, asyncio.Semaphore]] = None,
+        query_planner: Optional[QueryPlanner] = None,
+        **kwargs
+    ):
         super().__init__(agent_id, AgentType.DISCOVERY, config, **kwargs)
         
+        # Where result pages and sites come from - recorded fixtures for benchmarks
+        self.search_provider = search_provider or LiveSearchProvider()
+        
+        # Called with (event, details) as research runs, so jobs can report progress
+        self.on_progress = on_progress
+        
+        # Picks the session's queries from what earlier sessions found; None runs them by priority
+        self.query_planner = query_planner or (
+            shared_query_planner
+            if self.config.get('query_planner', settings.RESEARCH_QUERY_PLANNER_ENABLED) else None
+        )
+        
         # Research configuration
         self.search_engines = [
             "https://www.google.com/search",
@@ -57,18 +163,8 @@ class MountIsaResearchAgent(BaseAgent):
         self.mount_isa_service_queries = self._build_search_queries()
         
         # Domain filters for Mount Isa area
-        self.relevant_domains = [
-            "mountisa.qld.gov.au",
-            "health.qld.gov.au", 
-            "communities.qld.gov.au",
-            "ndis.gov.au",
-            "centrelink.gov.au",
-            "redcross.org.au",
-            "salvationarmy.org.au",
-            "beyondblue.org.au",
-            "lifeline.org.au",
-            "headspace.org.au"
-        ]
+        self.relevant_domains = list(RELEVANT_DOMAINS)
+        self.relevance_scorer = RelevanceScorer(self.relevant_domains)
         
         # User agents for web scraping
         self.user_agents = [
@@ -77,12 +173,39 @@ class MountIsaResearchAgent(BaseAgent):
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:89.0) Gecko/20100101 Firefox/89.0"
         ]
         
+        # Fan-out limits - each engine gets its own concurrency cap, and the
+        # host scheduler spaces requests to every engine and site. Orchestrators
+        # pass in shared caps so concurrent sessions don't multiply the load
+        self.search_delay = self.config.get('search_delay', settings.RESEARCH_SEARCH_DELAY)
+        search_concurrency = self.config.get('search_concurrency', settings.RESEARCH_SEARCH_CONCURRENCY)
+        self.engine_semaphores = engine_semaphores or {
+            'google': asyncio.Semaphore(search_concurrency),
+            'bing': asyncio.Semaphore(search_concurrency)
+        }
+        self.extract_concurrency = self.config.get('extract_concurrency', settings.RESEARCH_EXTRACT_CONCURRENCY)
+        self.extract_semaphore = asyncio.Semaphore(self.extract_concurrency)
+        
+        # Queries inside their cooldown are answered from the SERP cache
+        self.use_serp_cache = self.config.get('serp_cache', True)
+        self.search_cooldown = int(
+            self.config.get('research_cooldown_hours', settings.SERP_CACHE_TTL_HOURS) * 3600
+        )
+        
+        # Shared extraction logic, usable without a discovery agent
+        self.extractor = ServiceExtractor()
+        self.archive_pages = self.config.get('archive_pages', settings.ARCHIVE_ENABLED)
+        
         # Research statistics
         self.research_stats = {
             'searches_performed': 0,
             'websites_discovered': 0,
             'services_extracted': 0,
             'failed_extractions': 0,
+            'near_duplicates_skipped': 0,
+            'serp_cache_hits': 0,
+            'serp_cache_misses': 0,
+            'searches_resumed': 0,
+            'duplicate_sites_merged': 0,
             'research_time_total': 0.0
         }
     
@@ -199,69 +322,30 @@ class MountIsaResearchAgent(BaseAgent):
         """Main research function - discovers and extracts Mount Isa services"""
         
         start_time = datetime.utcnow()
-        max_queries = payload.get('max_queries', 50)
         discovered_sites = []
         extracted_services = []
-        
-        self.logger.info(f"Starting comprehensive Mount Isa services research with {max_queries} queries")
+        summary: Dict[str, Any] = {}
         
         try:
-            # Phase 1: Discover relevant websites
-            priority_queries = sorted(self.mount_isa_service_queries, key=lambda x: x.priority)[:max_queries]
-            
-            for query in priority_queries:
-                try:
-                    self.logger.info(f"Searching: {' '.join(query.keywords)}")
-                    
-                    search_results = await self._perform_search(query)
-                    discovered_sites.extend(search_results)
-                    
-                    # Add delay to avoid rate limiting
-                    await asyncio.sleep(random.uniform(2, 5))
-                    
-                except Exception as e:
-                    self.logger.error(f"Search failed for {query.keywords}: {e}")
-                    continue
-            
-            # Remove duplicates and filter by relevance
-            unique_sites = self._deduplicate_sites(discovered_sites)
-            relevant_sites = [site for site in unique_sites if site.relevance_score > 0.3]
-            
-            self.logger.info(f"Discovered {len(relevant_sites)} relevant websites")
-            
-            # Phase 2: Extract services from discovered websites
-            for site in relevant_sites[:30]:  # Limit to top 30 sites
-                try:
-                    self.logger.info(f"Extracting from: {site.url}")
-                    
-                    services = await self._extract_services_from_site(site)
-                    extracted_services.extend(services)
-                    
-                    # Add delay between extractions
-                    await asyncio.sleep(random.uniform(1, 3))
-                    
-                except Exception as e:
-                    self.logger.error(f"Extraction failed for {site.url}: {e}")
-                    continue
-            
-            # Update statistics
-            processing_time = (datetime.utcnow() - start_time).total_seconds()
-            self.research_stats['searches_performed'] += len(priority_queries)
-            self.research_stats['websites_discovered'] += len(relevant_sites)
-            self.research_stats['services_extracted'] += len(extracted_services)
-            self.research_stats['research_time_total'] += processing_time
+            async for event in self.iter_research(payload):
+                if event['type'] == 'site':
+                    discovered_sites.append(event['site'])
+                elif event['type'] == 'service':
+                    extracted_services.append(event['service'])
+                elif event['type'] == 'summary':
+                    summary = event
             
             result = {
                 'status': 'completed',
-                'queries_processed': len(priority_queries),
-                'sites_discovered': len(relevant_sites),
+                'queries_processed': summary['queries_processed'],
+                'sites_discovered': len(discovered_sites),
                 'services_extracted': len(extracted_services),
-                'discovered_sites': [site.__dict__ for site in relevant_sites],
+                'discovered_sites': [site.__dict__ for site in discovered_sites],
                 'extracted_services': extracted_services,
-                'processing_time': processing_time
+                'processing_time': summary['processing_time']
             }
             
-            self.logger.info(f"Research completed: {len(extracted_services)} services found from {len(relevant_sites)} sites")
+            self.logger.info(f"Research completed: {len(extracted_services)} services found from {len(discovered_sites)} sites")
             
             return result
             
@@ -273,6 +357,289 @@ class MountIsaResearchAgent(BaseAgent):
                 'processing_time': (datetime.utcnow() - start_time).total_seconds()
             }
     
+    async def iter_research(self, payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """Discover and extract Mount Isa services, yielding results as they're found.
+        
+        Yields {'type': 'site'} and {'type': 'service'} events, then one
+        {'type': 'summary'}. Sites are extracted as soon as a search turns them
+        up rather than after every search has finished, and nothing is held
+        once it has been yielded. When a later duplicate changes a site already
+        handed on - adding its queries and snippet, or replacing it with a more
+        relevant URL - a {'type': 'site_updated'} event carries the merged site.
+        Closing the generator cancels the searches and extractions still running.
+        
+        Up to max_sites sites are extracted. Found sites wait in a queue and
+        each free extraction slot takes the most relevant one waiting, so a
+        relevant site found late still displaces weaker ones that haven't
+        started. Only sites already being extracted when it turns up keep
+        their slot, which is the price of not waiting for every search.
+        
+        With a research_id in the payload, progress is checkpointed as it
+        goes, and a session that was interrupted earlier replays its
+        checkpointed sites and services instead of searching and fetching again.
+        """
+        
+        start_time = datetime.utcnow()
+        max_queries = payload.get('max_queries', 50)
+        max_sites = payload.get('max_sites', 30)
+        
+        self.logger.info(f"Starting comprehensive Mount Isa services research with {max_queries} queries")
+        
+        if self.query_planner:
+            priority_queries = await self.query_planner.plan(self.mount_isa_service_queries, max_queries)
+        else:
+            priority_queries = sorted(self.mount_isa_service_queries, key=lambda x: x.priority)[:max_queries]
+        self._report_progress('searching', queries_total=len(priority_queries))
+        
+        checkpoint = None
+        resumed = CheckpointState()
+        if payload.get('research_id') and self.config.get('checkpoints', settings.RESEARCH_CHECKPOINTS_ENABLED):
+            checkpoint = ResearchCheckpoint(payload['research_id'])
+            resumed = await checkpoint.load()
+            await checkpoint.start(payload.get('research_type', 'comprehensive'), payload.get('target_service_types', []))
+            
+            if not resumed.empty:
+                self.logger.info(
+                    f"Resuming research {payload['research_id']}: {len(resumed.queries)} queries, "
+                    f"{len(resumed.sites)} sites and {len(resumed.extracted)} extractions already done"
+                )
+        
+        pending_queries = [query for query in priority_queries if ' '.join(query.keywords) not in resumed.queries]
+        
+        # Bounded, so a slow consumer pauses the searches instead of buffering results
+        events: asyncio.Queue = asyncio.Queue(maxsize=settings.RESEARCH_STREAM_BUFFER)
+        sites = SiteDeduplicator()
+        counts = {'sites': 0, 'services': 0, 'extracted': 0}
+        
+        # Sites waiting for an extraction slot, as (-relevance, arrival, site) so the most relevant pops first
+        candidates: List[Tuple[float, int, ResearchTarget]] = []
+        arrivals = itertools.count()
+        taken: Set[int] = set()
+        candidates_changed = asyncio.Condition()
+        searching = {'done': False}
+        
+        # New sites and services per query searched this session, for the planner
+        query_yields = {query_key(query): [0, 0] for query in pending_queries}
+        novel_sites: Dict[Tuple[str, str], str] = {}
+        
+        async def extract(site: ResearchTarget):
+            services = resumed.extracted.get(site.url)
+            if services is None:
+                services = await self._extract_site(site)
+                if services is None:
+                    # Left out of the checkpoint so a resumed session tries it again
+                    services = []
+                elif checkpoint:
+                    await checkpoint.record_extraction(site.url, services)
+            else:
+                self._report_progress('site_extracted', url=site.url, services=services)
+            
+            key = site_key(site.url, sites.path_depth)
+            if key in novel_sites:
+                query_yields[novel_sites[key]][1] += len(services)
+            
+            for service in services:
+                counts['services'] += 1
+                await events.put({'type': 'service', 'service': service})
+        
+        async def accept(site: ResearchTarget) -> Optional[ResearchTarget]:
+            """Hand on a new site, or an update if it's a duplicate that changed the kept one; returns that site"""
+            if site.relevance_score <= 0.3:
+                return None
+            
+            kept, changed = sites.add(site)
+            if not changed:
+                return None
+            
+            if kept is site:
+                counts['sites'] += 1
+                await events.put({'type': 'site', 'site': site})
+                
+                source = normalize_query(site.source_query)
+                key = site_key(site.url, sites.path_depth)
+                if self.query_planner and source in query_yields:
+                    if await self.query_planner.is_new_site('/'.join(key), start_time):
+                        novel_sites[key] = source
+                        query_yields[source][0] += 1
+            else:
+                await events.put({'type': 'site_updated', 'site': kept})
+            
+            # Queue it for extraction, or requeue it at its new relevance if it hasn't
+            # been taken yet, dropping the least relevant site once more are waiting
+            # than there are slots left
+            async with candidates_changed:
+                if kept is not site:
+                    if id(kept) in taken:
+                        return kept
+                    candidates[:] = [entry for entry in candidates if entry[2] is not kept]
+                heapq.heappush(candidates, (-kept.relevance_score, next(arrivals), kept))
+                if len(candidates) > max_sites - counts['extracted']:
+                    candidates.remove(max(candidates))
+                heapq.heapify(candidates)
+                candidates_changed.notify()
+            return kept
+        
+        async def extract_most_relevant():
+            """Take the most relevant waiting site whenever this slot is free, until max_sites are taken"""
+            while True:
+                async with candidates_changed:
+                    await candidates_changed.wait_for(
+                        lambda: candidates or searching['done'] or counts['extracted'] >= max_sites
+                    )
+                    if not candidates or counts['extracted'] >= max_sites:
+                        return
+                    site = heapq.heappop(candidates)[2]
+                    counts['extracted'] += 1
+                    taken.add(id(site))
+                    sites.pin(site)
+                
+                self._report_progress('site_discovered', url=site.url)
+                await extract(site)
+        
+        async def search(query: SearchQuery):
+            # New and merged sites, once each; a merged one is checkpointed again
+            # so a replay rebuilds its provenance
+            changed: Dict[int, ResearchTarget] = {}
+            for site in await self._run_search(query):
+                kept = await accept(site)
+                if kept is not None:
+                    changed[id(kept)] = kept
+            if checkpoint:
+                await checkpoint.record_search(' '.join(query.keywords), [site.__dict__ for site in changed.values()])
+        
+        async def run():
+            extractors.extend(
+                asyncio.create_task(extract_most_relevant())
+                for _ in range(min(max_sites, self.extract_concurrency))
+            )
+            
+            # Replay the earlier run's sites first, then search what it didn't get to
+            for site_data in resumed.sites:
+                site_data['discovered_at'] = datetime.fromisoformat(site_data['discovered_at'])
+                await accept(ResearchTarget(**site_data))
+            for query in priority_queries:
+                if ' '.join(query.keywords) in resumed.queries:
+                    self._report_progress('search_completed', query=' '.join(query.keywords), results=0)
+            
+            await asyncio.gather(*(search(query) for query in pending_queries))
+            
+            async with candidates_changed:
+                searching['done'] = True
+                candidates_changed.notify_all()
+            
+            self.logger.info(f"Discovered {counts['sites']} relevant websites")
+            self._report_progress(
+                'extracting',
+                sites_discovered=counts['sites'],
+                sites_total=counts['extracted'] + len(candidates)
+            )
+            
+            await asyncio.gather(*extractors)
+            
+            if self.query_planner:
+                await self.query_planner.record_session(
+                    {key: (found[0], found[1]) for key, found in query_yields.items()}
+                )
+            await events.put(None)
+        
+        extractors: List[asyncio.Task] = []
+        driver = asyncio.create_task(run())
+        get_event = None
+        
+        try:
+            while True:
+                get_event = asyncio.ensure_future(events.get())
+                await asyncio.wait({get_event, driver}, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not get_event.done():
+                    # The driver failed before queueing the end marker
+                    get_event.cancel()
+                    driver.result()
+                
+                event = get_event.result()
+                if event is None:
+                    break
+                yield event
+        
+        finally:
+            if get_event is not None:
+                get_event.cancel()
+            if not driver.done():
+                driver.cancel()
+            # A driver that finished cleanly waited for every extraction; one that
+            # failed or was cancelled leaves them running
+            for task in extractors:
+                task.cancel()
+            await asyncio.gather(driver, *extractors, return_exceptions=True)
+        
+        if checkpoint:
+            await checkpoint.finish()
+        
+        # Update statistics
+        processing_time = (datetime.utcnow() - start_time).total_seconds()
+        self.research_stats['searches_performed'] += len(pending_queries)
+        self.research_stats['searches_resumed'] += len(priority_queries) - len(pending_queries)
+        self.research_stats['duplicate_sites_merged'] += sites.merged
+        self.research_stats['websites_discovered'] += counts['sites']
+        self.research_stats['services_extracted'] += counts['services']
+        self.research_stats['research_time_total'] += processing_time
+        
+        yield {
+            'type': 'summary',
+            'queries_processed': len(priority_queries),
+            'queries_resumed': len(priority_queries) - len(pending_queries),
+            'sites_discovered': counts['sites'],
+            'sites_extracted': counts['extracted'],
+            'services_extracted': counts['services'],
+            'processing_time': processing_time
+        }
+    
+    async def _run_search(self, query: SearchQuery) -> List[ResearchTarget]:
+        """Run one query, logging failures instead of raising"""
+        results = []
+        try:
+            self.logger.info(f"Searching: {' '.join(query.keywords)}")
+            results = await self._perform_search(query)
+        except Exception as e:
+            self.logger.error(f"Search failed for {query.keywords}: {e}")
+        
+        self._report_progress('search_completed', query=' '.join(query.keywords), results=len(results))
+        return results
+    
+    async def _extract_site(self, site: ResearchTarget) -> Optional[List[Dict[str, Any]]]:
+        """Extract services from one site within the extraction limit.
+        
+        Failures are logged instead of raised, and return None so they can be
+        told apart from a site that simply has no services.
+        """
+        async with self.extract_semaphore:
+            services = None
+            try:
+                self.logger.info(f"Extracting from: {site.url}")
+                services = await self._extract_services_from_site(site)
+            except Exception as e:
+                self.logger.error(f"Extraction failed for {site.url}: {e}")
+            
+            self._report_progress('site_extracted', url=site.url, services=services or [])
+            return services
+    
+    async def _extract_from_sites(self, sites: List[ResearchTarget]) -> List[Dict[str, Any]]:
+        """Extract services from sites concurrently, keeping the input order"""
+        extracted_services = []
+        for services in await asyncio.gather(*(self._extract_site(site) for site in sites)):
+            extracted_services.extend(services or [])
+        return extracted_services
+    
+    def _report_progress(self, event: str, **details):
+        """Pass a progress event to the listener; a failing listener never fails research"""
+        if self.on_progress is None:
+            return
+        
+        try:
+            self.on_progress(event, details)
+        except Exception as e:
+            self.logger.debug(f"Progress listener failed on {event}: {e}")
+    
     async def _perform_search(self, query: SearchQuery) -> List[ResearchTarget]:
         """Perform search using multiple search engines"""
         
@@ -282,7 +649,7 @@ class MountIsaResearchAgent(BaseAgent):
         
         # Try Google first (most comprehensive)
         try:
-            google_results = await self._search_google(encoded_query, query)
+            google_results = await self._search_engine('google', search_term, encoded_query, query)
             results.extend(google_results)
         except Exception as e:
             self.logger.warning(f"Google search failed: {e}")
@@ -290,13 +657,64 @@ class MountIsaResearchAgent(BaseAgent):
         # Try Bing as backup
         if len(results) < 5:
             try:
-                bing_results = await self._search_bing(encoded_query, query)
+                bing_results = await self._search_engine('bing', search_term, encoded_query, query)
                 results.extend(bing_results)
             except Exception as e:
                 self.logger.warning(f"Bing search failed: {e}")
         
         return results
     
+    async def _search_engine(
+        self,
+        engine: str,
+        search_term: str,
+        encoded_query: str,
+        query: SearchQuery
+    ) -> List[ResearchTarget]:
+        """Search one engine, reusing its cached results while the query is in cooldown"""
+        cached = await serp_cache.get(engine, search_term) if self.use_serp_cache else None
+        if cached is not None:
+            self.research_stats['serp_cache_hits'] += 1
+            # Relevance is re-scored so scoring changes apply to cached results too
+            return self._relevant_targets(
+                [(entry['url'], entry['title'], entry['snippet']) for entry in cached],
+                query,
+                search_term
+            )
+        
+        self.research_stats['serp_cache_misses'] += 1
+        
+        # Concurrent sessions running the same query share one request
+        targets = await search_flight.do(
+            f"{engine}:{normalize_query(search_term)}",
+            lambda: self._search_live(engine, search_term, encoded_query, query)
+        )
+        # Each session merges duplicates into its targets, so it needs its own copies
+        return [replace(target, source_queries=list(target.source_queries)) for target in targets]
+    
+    async def _search_live(
+        self,
+        engine: str,
+        search_term: str,
+        encoded_query: str,
+        query: SearchQuery
+    ) -> List[ResearchTarget]:
+        """Query a search engine and cache what it returns"""
+        search = self._search_google if engine == 'google' else self._search_bing
+        async with self.engine_semaphores[engine]:
+            results = await search(encoded_query, query)
+        
+        # Empty pages are usually consent or captcha walls - don't hold on to them
+        if results and self.use_serp_cache:
+            await serp_cache.set(
+                engine,
+                search_term,
+                [{'url': r.url, 'title': r.title, 'snippet': r.snippet} for r in results],
+                ttl=self.search_cooldown
+            )
+        
+        return results
+    
     async def _search_google(self, encoded_query: str, query: SearchQuery) -> List[ResearchTarget]:
         """Search Google for Mount Isa services"""
         
@@ -312,12 +730,11 @@ class MountIsaResearchAgent(BaseAgent):
         }
         
         try:
-            async with self.http_session.get(search_url, headers=headers) as response:
-                if response.status != 200:
-                    raise ResearchException(f"Google search returned status {response.status}")
-                
-                html = await response.text()
-                return self._parse_google_results(html, query)
+            await host_scheduler.wait(search_url, min_delay=self.search_delay)
+            html = await self.search_provider.search(
+                self.http_session, 'google', search_url, ' '.join(query.keywords), headers
+            )
+            return self._parse_google_results(html, query)
                 
         except Exception as e:
             raise ResearchException(f"Google search failed: {e}")
@@ -326,7 +743,7 @@ class MountIsaResearchAgent(BaseAgent):
         """Parse Google search results"""
         
         soup = BeautifulSoup(html, 'html.parser')
-        results = []
+        entries = []
         
         # Find search result containers
         result_containers = soup.find_all('div', class_='g') or soup.find_all('div', {'data-ved': True})
@@ -358,24 +775,13 @@ class MountIsaResearchAgent(BaseAgent):
                 snippet_element = container.find('span', {'data-ved': True}) or container.find('div', class_='s')
                 snippet = snippet_element.get_text(strip=True) if snippet_element else ""
                 
-                # Calculate relevance score
-                relevance_score = self._calculate_relevance(url, title, snippet, query)
-                
-                if relevance_score > 0.1:  # Minimum relevance threshold
-                    results.append(ResearchTarget(
-                        url=url,
-                        title=title,
-                        snippet=snippet,
-                        relevance_score=relevance_score,
-                        source_query=' '.join(query.keywords),
-                        discovered_at=datetime.utcnow()
-                    ))
+                entries.append((url, title, snippet))
                 
             except Exception as e:
                 self.logger.debug(f"Error parsing search result: {e}")
                 continue
         
-        return results
+        return self._relevant_targets(entries, query, ' '.join(query.keywords))
     
     async def _search_bing(self, encoded_query: str, query: SearchQuery) -> List[ResearchTarget]:
         """Search Bing for Mount Isa services"""
@@ -388,12 +794,11 @@ class MountIsaResearchAgent(BaseAgent):
         }
         
         try:
-            async with self.http_session.get(search_url, headers=headers) as response:
-                if response.status != 200:
-                    raise ResearchException(f"Bing search returned status {response.status}")
-                
-                html = await response.text()
-                return self._parse_bing_results(html, query)
+            await host_scheduler.wait(search_url, min_delay=self.search_delay)
+            html = await self.search_provider.search(
+                self.http_session, 'bing', search_url, ' '.join(query.keywords), headers
+            )
+            return self._parse_bing_results(html, query)
                 
         except Exception as e:
             raise ResearchException(f"Bing search failed: {e}")
@@ -402,7 +807,7 @@ class MountIsaResearchAgent(BaseAgent):
         """Parse Bing search results"""
         
         soup = BeautifulSoup(html, 'html.parser')
-        results = []
+        entries = []
         
         # Find Bing result containers
         result_containers = soup.find_all('li', class_='b_algo')
@@ -425,133 +830,102 @@ class MountIsaResearchAgent(BaseAgent):
                 snippet_element = container.find('p') or container.find('div', class_='b_caption')
                 snippet = snippet_element.get_text(strip=True) if snippet_element else ""
                 
-                # Calculate relevance score
-                relevance_score = self._calculate_relevance(url, title, snippet, query)
-                
-                if relevance_score > 0.1:
-                    results.append(ResearchTarget(
-                        url=url,
-                        title=title,
-                        snippet=snippet,
-                        relevance_score=relevance_score,
-                        source_query=' '.join(query.keywords),
-                        discovered_at=datetime.utcnow()
-                    ))
+                entries.append((url, title, snippet))
                 
             except Exception as e:
                 self.logger.debug(f"Error parsing Bing result: {e}")
                 continue
         
-        return results
+        return self._relevant_targets(entries, query, ' '.join(query.keywords))
     
     def _calculate_relevance(self, url: str, title: str, snippet: str, query: SearchQuery) -> float:
         """Calculate relevance score for a search result"""
-        
-        score = 0.0
-        text_content = f"{title} {snippet} {url}".lower()
-        
-        # Boost for Mount Isa mentions
-        mount_isa_terms = ['mount isa', 'mt isa', 'mountisa', '4825']
-        for term in mount_isa_terms:
-            if term in text_content:
-                score += 0.3
-        
-        # Boost for Queensland mentions
-        qld_terms = ['queensland', 'qld', 'north west queensland', 'gulf country']
-        for term in qld_terms:
-            if term in text_content:
-                score += 0.1
-        
-        # Boost for service-related terms
-        for keyword in query.keywords:
-            if keyword.lower() in text_content:
-                score += 0.2
-        
-        # Boost for relevant domains
-        domain = urlparse(url).netloc.lower()
-        for relevant_domain in self.relevant_domains:
-            if relevant_domain in domain:
-                score += 0.4
-        
-        # Boost for specific service indicators
-        service_indicators = [
-            'service', 'centre', 'center', 'support', 'help', 'community',
-            'health', 'medical', 'clinic', 'hospital', 'care', 'assistance'
+        return self.relevance_scorer.score(url, title, snippet, query)
+    
+    def _relevant_targets(
+        self,
+        entries: List[Tuple[str, str, str]],
+        query: SearchQuery,
+        source_query: str
+    ) -> List[ResearchTarget]:
+        """Score a query's (url, title, snippet) results in one batch and keep the relevant ones"""
+        scores = self.relevance_scorer.score_batch(entries, query)
+        
+        return [
+            ResearchTarget(
+                url=url,
+                title=title,
+                snippet=snippet,
+                relevance_score=relevance_score,
+                source_query=source_query,
+                discovered_at=datetime.utcnow()
+            )
+            for (url, title, snippet), relevance_score in zip(entries, scores)
+            if relevance_score > 0.1  # Minimum relevance threshold
         ]
+    
+    async def _extract_services_from_site(self, site: ResearchTarget) -> List[Dict[str, Any]]:
+        """Extract service information from a discovered website"""
         
-        for indicator in service_indicators:
-            if indicator in text_content:
-                score += 0.1
-        
-        # Penalize irrelevant content
-        irrelevant_terms = [
-            'shopping', 'buy', 'sale', 'property', 'real estate',
-            'mining', 'jobs', 'employment' # unless specifically searching for employment services
-        ]
+        # Fetch the website content - the same site found by several queries is fetched once
+        page = await fetch_flight.do(
+            f"page:{canonicalize_url(site.url)}",
+            lambda: self._fetch_site_html(site.url)
+        )
         
-        if query.service_type != 'employment':
-            for term in irrelevant_terms:
-                if term in text_content:
-                    score -= 0.2
+        if page['status'] != 200:
+            raise ResearchException(f"Site returned status {page['status']}")
+        
+        html = page['html']
+        
+        # Strip menus, footers and banners once for both fingerprinting and extraction
+        main_content = extract_main_content(html)
+        
+        # Skip pages that are near-copies of one we've already extracted
+        fingerprint = text_fingerprint(main_content.text)
+        if fingerprint is not None:
+            duplicate = near_duplicate_index.find_near_duplicate(fingerprint, exclude_url=site.url)
+            if duplicate:
+                self.research_stats['near_duplicates_skipped'] += 1
+                self.logger.info(f"Skipping {site.url}, near-duplicate of {duplicate[0]}")
+                return []
+            near_duplicate_index.add(site.url, fingerprint)
+        
+        # Use the shared discovery extraction logic, unless this exact page was extracted before
+        services = await extraction_cache.get(site.url, html, self.extractor.version)
+        if services is None:
+            services = self.extractor.extract(html, site.url, main_content)
+            await extraction_cache.set(site.url, html, self.extractor.version, services)
+        
+        # Enhance services with research context
+        for service in services:
+            service['research_context'] = {
+                'source_query': site.source_query,
+                'site_relevance': site.relevance_score,
+                'discovered_via': 'intelligent_research',
+                'discovery_method': 'search_engine_research'
+            }
         
-        return min(max(score, 0.0), 1.0)
+        return services
     
-    def _deduplicate_sites(self, sites: List[ResearchTarget]) -> List[ResearchTarget]:
-        """Remove duplicate sites and keep highest relevance"""
+    async def _fetch_site_html(self, url: str) -> Dict[str, Any]:
+        """Fetch a discovered website's HTML"""
+        headers = {
+            'User-Agent': random.choice(self.user_agents),
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        }
         
-        seen_domains = {}
-        unique_sites = []
+        await host_scheduler.wait(url, min_delay=self.request_delay)
+        page = await self.search_provider.fetch(self.http_session, url, headers=headers, timeout=30)
         
-        for site in sorted(sites, key=lambda x: x.relevance_score, reverse=True):
-            domain = urlparse(site.url).netloc.lower()
-            
-            if domain not in seen_domains:
-                seen_domains[domain] = site
-                unique_sites.append(site)
-            elif site.relevance_score > seen_domains[domain].relevance_score:
-                # Replace with higher relevance site
-                unique_sites.remove(seen_domains[domain])
-                seen_domains[domain] = site
-                unique_sites.append(site)
-        
-        return unique_sites
-    
-    async def _extract_services_from_site(self, site: ResearchTarget) -> List[Dict[str, Any]]:
-        """Extract service information from a discovered website"""
+        if page.status != 200:
+            return {'status': page.status, 'html': None}
         
-        try:
-            # Fetch the website content
-            headers = {
-                'User-Agent': random.choice(self.user_agents),
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            }
-            
-            async with self.http_session.get(site.url, headers=headers, timeout=30) as response:
-                if response.status != 200:
-                    raise ResearchException(f"Site returned status {response.status}")
-                
-                html = await response.text()
-                
-                # Use the existing discovery agent's extraction logic
-                from app.agents.discovery import DiscoveryAgent
-                temp_discovery_agent = DiscoveryAgent("temp_research", {})
-                
-                services = await temp_discovery_agent._extract_services_from_content(html, site.url)
-                
-                # Enhance services with research context
-                for service in services:
-                    service['research_context'] = {
-                        'source_query': site.source_query,
-                        'site_relevance': site.relevance_score,
-                        'discovered_via': 'intelligent_research',
-                        'discovery_method': 'search_engine_research'
-                    }
-                
-                return services
-                
-        except Exception as e:
-            self.logger.error(f"Failed to extract from {site.url}: {e}")
-            return []
+        # Keep the raw response so extraction can be re-run without re-crawling
+        if self.archive_pages:
+            await page_archive.store(page)
+        
+        return {'status': page.status, 'html': page.text}
     
     async def _perform_deep_search(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Perform deep search on specific service types"""
@@ -561,13 +935,10 @@ class MountIsaResearchAgent(BaseAgent):
         
         discovered_sites = []
         
-        for query in specific_queries[:10]:  # Deep search with limited queries
-            try:
-                results = await self._perform_search(query)
-                discovered_sites.extend(results)
-                await asyncio.sleep(random.uniform(3, 6))  # Longer delays for deep search
-            except Exception as e:
-                continue
+        for results in await asyncio.gather(
+            *(self._run_search(query) for query in specific_queries[:10])  # Deep search with limited queries
+        ):
+            discovered_sites.extend(results)
         
         return {
             'status': 'completed',
@@ -580,17 +951,16 @@ class MountIsaResearchAgent(BaseAgent):
         """Extract services from a list of previously discovered sites"""
         
         sites_data = payload.get('sites', [])
-        extracted_services = []
+        sites = []
         
         for site_data in sites_data:
             try:
-                site = ResearchTarget(**site_data)
-                services = await self._extract_services_from_site(site)
-                extracted_services.extend(services)
-                await asyncio.sleep(random.uniform(1, 2))
+                sites.append(ResearchTarget(**site_data))
             except Exception as e:
                 continue
         
+        extracted_services = await self._extract_from_sites(sites)
+        
         return {
             'status': 'completed',
             'services_extracted': len(extracted_services),
@@ -613,10 +983,21 @@ class MountIsaResearchAgent(BaseAgent):
             'websites_discovered': self.research_stats['websites_discovered'],
             'services_extracted': self.research_stats['services_extracted'],
             'failed_extractions': self.research_stats['failed_extractions'],
+            'near_duplicates_skipped': self.research_stats['near_duplicates_skipped'],
+            'serp_cache_hits': self.research_stats['serp_cache_hits'],
+            'serp_cache_misses': self.research_stats['serp_cache_misses'],
+            'searches_resumed': self.research_stats['searches_resumed'],
+            'duplicate_sites_merged': self.research_stats['duplicate_sites_merged'],
+            'serp_cache_hit_rate': self.research_stats['serp_cache_hits'] / max(
+                1, self.research_stats['serp_cache_hits'] + self.research_stats['serp_cache_misses']
+            ),
             'avg_sites_per_search': avg_discovery_rate,
             'avg_services_per_site': avg_extraction_rate,
             'total_research_time': self.research_stats['research_time_total'],
             'avg_research_time_per_search': (
                 self.research_stats['research_time_total'] / max(1, total_searches)
-            )
+            ),
+            'search_provider': self.search_provider.get_statistics(),
+            'relevance_scoring': self.relevance_scorer.get_statistics(),
+            'query_planner': self.query_planner.get_statistics() if self.query_planner else None
         }
\ No newline at end of file
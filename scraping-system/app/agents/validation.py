@@ -18,6 +18,7 @@ from app.agents.base import BaseAgent
 from app.models.agent import AgentType, AgentTask
 from app.models.service import ServiceCreate
 from app.core.exceptions import ValidationException
+from app.core.single_flight import fetch_flight, canonicalize_url
 
 
 class ValidationLevel(Enum):
@@ -413,32 +414,35 @@ class ValidationAgent(BaseAgent):
                 suggestions=["Consider using HTTPS for better security"]
             )
         
-        # Try to access the website
-        try:
-            async with self.http_session.get(website, timeout=10) as response:
-                if response.status == 200:
-                    return ValidationResult(
-                        field="website",
-                        check_type="accessibility_validation",
-                        status="pass",
-                        level=ValidationLevel.INFO,
-                        message="Website is accessible",
-                        confidence=0.8,
-                        raw_value=website,
-                        validated_value=website
-                    )
-                else:
-                    return ValidationResult(
-                        field="website",
-                        check_type="accessibility_validation",
-                        status="warning",
-                        level=ValidationLevel.MEDIUM,
-                        message=f"Website returned HTTP {response.status}",
-                        confidence=0.7,
-                        raw_value=website,
-                        suggestions=["Check if website is currently available"]
-                    )
-        except Exception as e:
+        # Try to access the website - services from the same organisation share one probe
+        probe = await fetch_flight.do(
+            f"website_probe:{canonicalize_url(website)}",
+            lambda: self._probe_website(website)
+        )
+
+        if probe.get('status') == 200:
+            return ValidationResult(
+                field="website",
+                check_type="accessibility_validation",
+                status="pass",
+                level=ValidationLevel.INFO,
+                message="Website is accessible",
+                confidence=0.8,
+                raw_value=website,
+                validated_value=website
+            )
+        elif probe.get('status') is not None:
+            return ValidationResult(
+                field="website",
+                check_type="accessibility_validation",
+                status="warning",
+                level=ValidationLevel.MEDIUM,
+                message=f"Website returned HTTP {probe['status']}",
+                confidence=0.7,
+                raw_value=website,
+                suggestions=["Check if website is currently available"]
+            )
+        else:
             return ValidationResult(
                 field="website",
                 check_type="accessibility_validation",
@@ -450,6 +454,14 @@ class ValidationAgent(BaseAgent):
                 suggestions=["Verify website URL is correct and accessible"]
             )
     
+    async def _probe_website(self, website: str) -> Dict[str, Any]:
+        """Fetch a website once and report its HTTP status"""
+        try:
+            async with self.http_session.get(website, timeout=10) as response:
+                return {'status': response.status}
+        except Exception as e:
+            return {'status': None, 'error': str(e)}
+    
     async def _validate_location_details(self, service_data: Dict[str, Any]) -> List[ValidationResult]:
         """Validate location information"""
         results = []
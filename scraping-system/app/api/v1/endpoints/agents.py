@@ -11,6 +11,7 @@ import json
 from app.core.database import get_async_session
 from app.models.agent import AgentType, AgentStatus, AgentTask
 from app.core.config import settings
+from app.core.http import http_client
 import redis.asyncio as redis
 
 router = APIRouter()
@@ -425,6 +426,19 @@ async def get_agent_queue_status(
         )
 
 
+@router.get("/stats/http")
+async def get_http_pool_statistics():
+    """Get shared HTTP connection pool statistics"""
+    try:
+        return http_client.get_statistics()
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get HTTP pool statistics: {str(e)}"
+        )
+
+
 @router.post("/types/{agent_type}/start")
 async def start_agent_type(
     agent_type: str,
@@ -14,7 +14,11 @@ from app.models.discovery import (
     DiscoveryBatchRequest, DiscoveryBatchResponse, DiscoveryTask
 )
 from app.services.discovery_service import DiscoveryService
-from app.agents.discovery import DiscoveryAgent
+from app.services.pipeline_service import pipeline_manager
+from app.services.service_matching import ServiceMatcher
+from app.services.entity_resolution import entity_resolver
+from app.crawling.boilerplate import extract_main_content, summarize_removal
+from app.crawling.extraction import ServiceExtractor
 from app.agents.base import create_agent_task, submit_task_to_queue
 from app.models.agent import AgentType
 from app.core.config import settings
@@ -222,8 +226,7 @@ async def extract_service_from_content(
 @router.get("/patterns/list")
 async def get_discovery_patterns():
     """Get list of discovery patterns used by agents"""
-    # Create temporary discovery agent to get patterns
-    temp_agent = DiscoveryAgent("temp", {})
+    extractor = ServiceExtractor()
     
     patterns_info = {
         'contact_patterns': {
@@ -234,7 +237,7 @@ async def get_discovery_patterns():
                     'confidence': pattern.confidence,
                     'examples': pattern.examples
                 }
-                for pattern in temp_agent.pattern_library.patterns['contact']['phone']
+                for pattern in extractor.pattern_library.patterns['contact']['phone']
             ],
             'email': [
                 {
@@ -243,7 +246,7 @@ async def get_discovery_patterns():
                     'confidence': pattern.confidence,
                     'examples': pattern.examples
                 }
-                for pattern in temp_agent.pattern_library.patterns['contact']['email']
+                for pattern in extractor.pattern_library.patterns['contact']['email']
             ],
             'website': [
                 {
@@ -252,7 +255,7 @@ async def get_discovery_patterns():
                     'confidence': pattern.confidence,
                     'examples': pattern.examples
                 }
-                for pattern in temp_agent.pattern_library.patterns['contact']['website']
+                for pattern in extractor.pattern_library.patterns['contact']['website']
             ]
         },
         'location_patterns': {
@@ -263,7 +266,7 @@ async def get_discovery_patterns():
                     'confidence': pattern.confidence,
                     'examples': pattern.examples
                 }
-                for pattern in temp_agent.pattern_library.patterns['location']['address']
+                for pattern in extractor.pattern_library.patterns['location']['address']
             ],
             'postcode': [
                 {
@@ -272,10 +275,11 @@ async def get_discovery_patterns():
                     'confidence': pattern.confidence,
                     'examples': pattern.examples
                 }
-                for pattern in temp_agent.pattern_library.patterns['location']['postcode']
+                for pattern in extractor.pattern_library.patterns['location']['postcode']
             ]
         },
-        'service_categories': temp_agent.pattern_library.category_keywords
+        'service_categories': extractor.pattern_library.category_keywords,
+        'extractor_version': extractor.version
     }
     
     return patterns_info
@@ -328,23 +332,22 @@ async def test_service_extraction(
         )
     
     try:
-        # Create temporary discovery agent
-        temp_agent = DiscoveryAgent("temp", {})
+        # Extraction needs no agent, Redis or HTTP session
+        extractor = ServiceExtractor()
         
-        # Extract services from content
-        services = await temp_agent._extract_services_from_content(content, url)
+        # Strip boilerplate, then extract services from the main content
+        main_content = extract_main_content(content)
+        services = extractor.extract(content, url, main_content)
         
         # Calculate page relevance
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(content, 'html.parser')
-        text_content = soup.get_text().lower()
-        relevance_score = temp_agent._calculate_page_relevance(text_content)
+        relevance_score = extractor._calculate_page_relevance(main_content.text.lower())
         
         return {
             'url': url,
             'relevance_score': relevance_score,
             'services_found': len(services),
             'services': services,
+            'boilerplate': summarize_removal(main_content),
             'extraction_method': 'test'
         }
         
@@ -439,6 +442,50 @@ async def start_website_crawl(
         )
 
 
+@router.post("/pipeline")
+async def start_discovery_pipeline(batch_request: DiscoveryBatchRequest):
+    """Discover, validate and store services in one in-process pipeline run"""
+    try:
+        pipeline = pipeline_manager.start(
+            start_urls=[str(url) for url in batch_request.urls],
+            max_depth=batch_request.max_depth,
+            options=batch_request.options.__dict__ if batch_request.options else {}
+        )
+        
+        return {
+            'pipeline_id': pipeline.pipeline_id,
+            'status': 'started',
+            'start_urls': pipeline.start_urls,
+            'max_depth': pipeline.max_depth,
+            'message': 'Discovery pipeline started'
+        }
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to start discovery pipeline: {str(e)}"
+        )
+
+
+@router.get("/pipeline")
+async def list_discovery_pipelines():
+    """Get progress and per-stage queue depths of recent pipeline runs"""
+    return pipeline_manager.get_statistics()
+
+
+@router.get("/pipeline/{pipeline_id}")
+async def get_discovery_pipeline(pipeline_id: str):
+    """Get a pipeline run's progress and per-stage queue depths"""
+    pipeline = pipeline_manager.get(pipeline_id)
+    if not pipeline:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Pipeline {pipeline_id} not found"
+        )
+    
+    return pipeline.get_status()
+
+
 @router.get("/recent")
 async def get_recent_discoveries(
     limit: int = Query(20, ge=1, le=100),
@@ -458,4 +505,82 @@ async def get_recent_discoveries(
         raise HTTPException(
             status_code=500,
             detail=f"Failed to get recent discoveries: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/duplicates")
+async def find_duplicate_candidates(
+    name: Optional[str] = Query(None, description="Service name"),
+    phone: Optional[str] = Query(None),
+    email: Optional[str] = Query(None),
+    website: Optional[str] = Query(None),
+    limit: int = Query(settings.SERVICE_MATCH_CANDIDATES, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_session)
+):
+    """Get stored services that are likely duplicates of the one described, best first"""
+    if not (name or phone or email or website):
+        raise HTTPException(
+            status_code=400,
+            detail="Give at least one of name, phone, email or website"
+        )
+    
+    try:
+        matcher = ServiceMatcher(db, limit=limit)
+        candidates = await matcher.find_candidates({
+            'name': name,
+            'phone': phone,
+            'email': email,
+            'website': website
+        })
+        return {
+            'candidates': [candidate.__dict__ for candidate in candidates],
+            'total_count': len(candidates)
+        }
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to find duplicate candidates: {str(e)}"
+        )
+
+
+@router.post("/entities/resolve")
+async def resolve_service_entities(
+    full: bool = Query(False, description="Resolve every active service, not just new and changed ones"),
+    dry_run: bool = Query(False, description="Report the clusters that would be merged without changing anything")
+):
+    """Merge services that different sources stored for the same organisation, in the background"""
+    try:
+        job = entity_resolver.submit(full=full, dry_run=dry_run)
+        return {
+            **job.get_status(),
+            'poll_url': f"/api/v1/discovery/entities/jobs/{job.job_id}"
+        }
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to start entity resolution: {str(e)}"
+        )
+
+
+@router.get("/entities/jobs/{job_id}")
+async def get_entity_resolution_job(job_id: str):
+    """Get an entity resolution run's status, and its result once finished"""
+    job = entity_resolver.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Entity resolution job {job_id} not found"
+        )
+    
+    return job.get_status()
+
+
+@router.get("/entities/stats")
+async def get_entity_resolution_stats():
+    """Get entity resolution run statistics"""
+    return {
+        **entity_resolver.get_statistics(),
+        'jobs': [job.get_status() for job in entity_resolver.list()]
+    }
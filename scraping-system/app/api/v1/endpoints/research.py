@@ -3,20 +3,23 @@ Research API endpoints for intelligent service discovery
 """
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Dict, Any
+from typing import AsyncIterator, List, Optional, Dict, Any
 from pydantic import BaseModel
 import asyncio
+import json
 
 from app.core.database import get_async_session
-from app.services.research_service import ResearchOrchestrator
+from app.core.exceptions import ResearchException
+from app.services.research_jobs import research_jobs
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 router = APIRouter()
 
-# Global research orchestrator
-research_orchestrator = ResearchOrchestrator()
+# Global research orchestrator, shared with the job store
+research_orchestrator = research_jobs.orchestrator
 
 
 class ResearchRequest(BaseModel):
@@ -58,18 +61,16 @@ async def start_intelligent_research(
                 message="Continuous research started in background"
             )
         else:
-            # Execute immediate research
-            result = await research_orchestrator.start_intelligent_research(
+            # Submit as a job - poll /research/jobs/{research_id} for progress
+            job = research_jobs.submit(
                 research_type=request.research_type,
                 target_service_types=request.service_types
             )
             
             return ResearchResponse(
-                research_id=result['research_id'],
-                status=result['status'],
-                message=f"Research completed: {result.get('services_discovered', 0)} services found",
-                services_discovered=result.get('services_discovered'),
-                processing_time=result.get('processing_time')
+                research_id=job.job_id,
+                status=job.status,
+                message=f"Research job submitted, poll /research/jobs/{job.job_id} for progress"
             )
             
     except Exception as e:
@@ -80,26 +81,37 @@ async def start_intelligent_research(
         )
 
 
+def _submit_discovery_job(
+    focus: str,
+    research_type: str = "targeted",
+    service_types: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """Submit a discovery run as a research job"""
+    job = research_jobs.submit(
+        research_type=research_type,
+        target_service_types=service_types,
+        focus=focus
+    )
+    
+    return {
+        'research_id': job.job_id,
+        'job_id': job.job_id,
+        'focus': focus,
+        'status': job.status,
+        'poll_url': f"/api/v1/research/jobs/{job.job_id}",
+        'cancel_url': f"/api/v1/research/jobs/{job.job_id}/cancel"
+    }
+
+
 @router.get("/discover/health")
-async def discover_health_services(
-    background_tasks: BackgroundTasks
-):
+async def discover_health_services():
     """Discover health services in Mount Isa automatically"""
     
     try:
-        result = await research_orchestrator.start_targeted_research([
+        return _submit_discovery_job('Health Services', service_types=[
             'health', 'mental_health', 'medical'
         ])
         
-        return {
-            'research_id': result['research_id'],
-            'focus': 'Health Services',
-            'services_discovered': result.get('services_discovered', 0),
-            'high_quality_services': result.get('high_quality_services', 0),
-            'insights': result.get('insights', {}),
-            'top_services': result.get('detailed_services', [])[:10]
-        }
-        
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -112,19 +124,10 @@ async def discover_disability_services():
     """Discover disability and NDIS services in Mount Isa"""
     
     try:
-        result = await research_orchestrator.start_targeted_research([
+        return _submit_discovery_job('Disability Support Services', service_types=[
             'disability', 'ndis', 'accessibility', 'support'
         ])
         
-        return {
-            'research_id': result['research_id'],
-            'focus': 'Disability Support Services',
-            'services_discovered': result.get('services_discovered', 0),
-            'high_quality_services': result.get('high_quality_services', 0),
-            'insights': result.get('insights', {}),
-            'top_services': result.get('detailed_services', [])[:10]
-        }
-        
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -137,19 +140,10 @@ async def discover_community_services():
     """Discover community and support services in Mount Isa"""
     
     try:
-        result = await research_orchestrator.start_targeted_research([
+        return _submit_discovery_job('Community Services', service_types=[
             'community', 'support', 'neighbourhood', 'cultural', 'indigenous'
         ])
         
-        return {
-            'research_id': result['research_id'],
-            'focus': 'Community Services',
-            'services_discovered': result.get('services_discovered', 0),
-            'high_quality_services': result.get('high_quality_services', 0),
-            'insights': result.get('insights', {}),
-            'top_services': result.get('detailed_services', [])[:10]
-        }
-        
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -164,23 +158,11 @@ async def discover_all_services():
     try:
         logger.info("Starting comprehensive service discovery")
         
-        result = await research_orchestrator.start_intelligent_research(
+        return _submit_discovery_job(
+            'All Services - Comprehensive Discovery',
             research_type="comprehensive"
         )
         
-        return {
-            'research_id': result['research_id'],
-            'focus': 'All Services - Comprehensive Discovery',
-            'services_discovered': result.get('services_discovered', 0),
-            'high_quality_services': result.get('high_quality_services', 0),
-            'sites_researched': result.get('sites_researched', 0),
-            'service_categories': result.get('service_categories', {}),
-            'insights': result.get('insights', {}),
-            'research_statistics': result.get('research_statistics', {}),
-            'top_services': result.get('detailed_services', [])[:15],
-            'processing_time': result.get('processing_time', 0)
-        }
-        
     except Exception as e:
         logger.error(f"Comprehensive discovery failed: {e}")
         raise HTTPException(
@@ -189,6 +171,113 @@ async def discover_all_services():
         )
 
 
+@router.get("/stream")
+async def stream_research(
+    research_type: str = Query("comprehensive", pattern="^(comprehensive|targeted)$"),
+    service_types: Optional[List[str]] = Query(None),
+    format: str = Query("ndjson", pattern="^(ndjson|sse)$", description="ndjson, or sse for EventSource clients")
+):
+    """Run research and stream each site and service as it's found"""
+    
+    events = research_orchestrator.stream_intelligent_research(
+        research_type=research_type,
+        target_service_types=service_types
+    )
+    
+    async def encode() -> AsyncIterator[str]:
+        try:
+            async for event in events:
+                payload = json.dumps(event, default=str)
+                if format == "sse":
+                    yield f"event: {event['event']}\ndata: {payload}\n\n"
+                else:
+                    yield payload + "\n"
+        finally:
+            # Client went away - stop the research rather than finishing it unseen
+            await events.aclose()
+    
+    return StreamingResponse(
+        encode(),
+        media_type="text/event-stream" if format == "sse" else "application/x-ndjson",
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@router.get("/jobs")
+async def list_research_jobs():
+    """Get the progress of recent research jobs"""
+    return {
+        **research_jobs.get_statistics(),
+        'jobs': [job.get_status() for job in research_jobs.list()]
+    }
+
+
+@router.get("/jobs/{job_id}")
+async def get_research_job(
+    job_id: str,
+    include_services: bool = Query(False, description="Include services found so far, or the top services once finished"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """Get a research job's progress, partial results and final insights"""
+    job = research_jobs.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Research job {job_id} not found"
+        )
+    
+    return job.get_status(include_services=include_services, services_limit=limit)
+
+
+@router.post("/jobs/{job_id}/resume")
+async def resume_research_job(job_id: str):
+    """Resume a cancelled or interrupted research job from its last checkpoint"""
+    try:
+        job = await research_jobs.resume(job_id)
+    except ResearchException as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to resume research job: {str(e)}"
+        )
+    
+    return job.get_status()
+
+
+@router.get("/checkpoints")
+async def list_resumable_research():
+    """Get research sessions that were interrupted and can be resumed"""
+    try:
+        sessions = await research_orchestrator.get_resumable_research()
+        return {
+            'resumable_sessions': sessions,
+            'total_sessions': len(sessions)
+        }
+    
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to list research checkpoints: {str(e)}"
+        )
+
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_research_job(job_id: str):
+    """Cancel a queued or running research job"""
+    job = await research_jobs.cancel(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Research job {job_id} not found"
+        )
+    
+    return job.get_status()
+
+
 @router.get("/status")
 async def get_research_status():
     """Get current research system status"""
@@ -0,0 +1,192 @@
+"""
+Micro-benchmark of search result relevance scoring
+
+Usage:
+    python -m app.benchmarks.relevance [--results 10000] [--queries 100] [--distinct 2000] [--runs 5]
+"""
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from app.agents.research import SearchQuery
+from app.crawling.relevance import RELEVANT_DOMAINS, RelevanceScorer, SearchResult
+
+# Words results are made of - scoring terms mixed into everyday page text
+SCORING_WORDS = [
+    'Mount Isa', 'Mt Isa', 'MountIsa', '4825', 'Queensland', 'QLD', 'North West Queensland',
+    'Gulf Country', 'service', 'centre', 'support', 'help', 'community', 'health', 'medical',
+    'clinic', 'hospital', 'care', 'assistance', 'shopping', 'sale', 'real estate', 'mining', 'jobs'
+]
+FILLER_WORDS = [
+    'the', 'and', 'for', 'with', 'our', 'your', 'about', 'contact', 'opening', 'hours', 'phone',
+    'email', 'address', 'street', 'local', 'people', 'families', 'residents', 'program',
+    'information', 'directory', 'news', 'events', 'visit', 'today', 'open', 'team', 'staff'
+]
+HOSTS = list(RELEVANT_DOMAINS) + [
+    'www.isa-family-doctors.com.au', 'kalkadoon.org.au', 'www.outback-pharmacy.com.au',
+    'northwest-legal.org.au', 'www.realestate.com.au', 'www.seek.com.au'
+]
+QUERY_KEYWORDS = [
+    (['medical centre', 'Mount Isa'], 'health'),
+    (['disability support', 'Mount Isa QLD'], 'disability'),
+    (['aged care', 'Mount Isa Queensland'], 'aged_care'),
+    (['youth services', 'Mount Isa'], 'youth'),
+    (['job centre', 'Mount Isa'], 'employment'),
+    (['legal aid', 'Mount Isa QLD'], 'legal'),
+    (['Mount Isa Hospital'], 'specific'),
+    (['Kalkadoon Community Centre'], 'specific')
+]
+
+
+def reference_relevance(url: str, title: str, snippet: str, query: SearchQuery) -> float:
+    """Term-by-term scoring, as the research agent did before the compiled scorer"""
+    score = 0.0
+    text_content = f"{title} {snippet} {url}".lower()
+    
+    for term in ['mount isa', 'mt isa', 'mountisa', '4825']:
+        if term in text_content:
+            score += 0.3
+    
+    for term in ['queensland', 'qld', 'north west queensland', 'gulf country']:
+        if term in text_content:
+            score += 0.1
+    
+    for keyword in query.keywords:
+        if keyword.lower() in text_content:
+            score += 0.2
+    
+    domain = urlparse(url).netloc.lower()
+    for relevant_domain in RELEVANT_DOMAINS:
+        if relevant_domain in domain:
+            score += 0.4
+    
+    for indicator in [
+        'service', 'centre', 'center', 'support', 'help', 'community',
+        'health', 'medical', 'clinic', 'hospital', 'care', 'assistance'
+    ]:
+        if indicator in text_content:
+            score += 0.1
+    
+    if query.service_type != 'employment':
+        for term in ['shopping', 'buy', 'sale', 'property', 'real estate', 'mining', 'jobs', 'employment']:
+            if term in text_content:
+                score -= 0.2
+    
+    return min(max(score, 0.0), 1.0)
+
+
+def synthetic_session(
+    results: int,
+    queries: int,
+    distinct: int,
+    seed: int = 0
+) -> List[Tuple[SearchQuery, List[SearchResult]]]:
+    """A repeatable research session of `results` search results spread over `queries` queries.
+    
+    Results are drawn from a pool of `distinct` ones, since related queries
+    keep turning up the same sites.
+    """
+    rng = random.Random(seed)
+    
+    def text(words: int, scoring_share: float) -> str:
+        return ' '.join(
+            rng.choice(SCORING_WORDS) if rng.random() < scoring_share else rng.choice(FILLER_WORDS)
+            for _ in range(words)
+        )
+    
+    pool = []
+    for _ in range(distinct):
+        url = f"https://{rng.choice(HOSTS)}/{rng.choice(FILLER_WORDS)}/{rng.randrange(1000)}"
+        snippet = text(30, 0.1)
+        if rng.random() < 0.3:
+            snippet = f"{snippet} {rng.choice(rng.choice(QUERY_KEYWORDS)[0])}"
+        pool.append((url, text(8, 0.2).title(), snippet))
+    
+    session = []
+    for index in range(queries):
+        keywords, service_type = QUERY_KEYWORDS[index % len(QUERY_KEYWORDS)]
+        query = SearchQuery(keywords=keywords, service_type=service_type, location='Mount Isa')
+        size = results // queries + (index < results % queries)
+        session.append((query, [rng.choice(pool) for _ in range(size)]))
+    
+    return session
+
+
+def best_of(runs: int, work: Callable[[], Any]) -> Tuple[float, Any]:
+    """Fastest of several timed runs, and the last run's result"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = work()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def run_benchmark(results: int = 10000, queries: int = 100, distinct: int = 2000, runs: int = 5) -> Dict[str, Any]:
+    """Time term-by-term, per-result and session-batched scoring on the same results"""
+    session = synthetic_session(results, queries, distinct)
+    
+    reference_time, reference = best_of(runs, lambda: [
+        [reference_relevance(url, title, snippet, query) for url, title, snippet in batch]
+        for query, batch in session
+    ])
+    
+    # A fresh scorer per run, so compiling the matcher and first sightings are part of what's timed
+    single_time, single = best_of(runs, lambda: _score_singly(RelevanceScorer(), session))
+    batch_time, (batched, scorer_statistics) = best_of(runs, lambda: _score_batched(session))
+    
+    return {
+        'results': sum(len(batch) for _, batch in session),
+        'distinct_results': len({result for _, batch in session for result in batch}),
+        'queries': len(session),
+        'runs': runs,
+        'scorer': scorer_statistics,
+        'identical_scores': reference == single == batched,
+        'seconds': {
+            'reference': reference_time,
+            'single': single_time,
+            'batch': batch_time
+        },
+        'speedup': {
+            'single': reference_time / max(single_time, 1e-9),
+            'batch': reference_time / max(batch_time, 1e-9)
+        },
+        'mean_score': statistics.mean(score for scores in batched for score in scores)
+    }
+
+
+def _score_batched(session: Sequence[Tuple[SearchQuery, List[SearchResult]]]) -> Tuple[List[List[float]], Dict[str, Any]]:
+    scorer = RelevanceScorer()
+    return scorer.score_session(session), scorer.get_statistics()
+
+
+def _score_singly(scorer: RelevanceScorer, session: Sequence[Tuple[SearchQuery, List[SearchResult]]]) -> List[List[float]]:
+    return [
+        [scorer.score(url, title, snippet, query) for url, title, snippet in batch]
+        for query, batch in session
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark relevance scoring of search results")
+    parser.add_argument('--results', type=int, default=10000)
+    parser.add_argument('--queries', type=int, default=100)
+    parser.add_argument('--distinct', type=int, default=2000, help="Distinct results the session's results are drawn from")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args(argv)
+    
+    summary = run_benchmark(args.results, args.queries, args.distinct, args.runs)
+    print(json.dumps(summary, indent=2))
+    
+    # Any difference from term-by-term scoring is a bug in the compiled scorer
+    return 0 if summary['identical_scores'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
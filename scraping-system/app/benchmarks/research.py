@@ -0,0 +1,143 @@
+"""
+Reproducible end-to-end research benchmark against recorded search results
+
+Usage:
+    python -m app.benchmarks.research [--fixtures DIR] [--runs 3] [--research-type comprehensive]
+    python -m app.benchmarks.research --record DIR   # capture fresh fixtures from the live engines
+"""
+
+import argparse
+import asyncio
+import json
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.single_flight import fetch_flight
+from app.crawling.search_providers import FixtureSearchProvider, RecordingSearchProvider, SearchProvider
+from app.services.research_service import ResearchOrchestrator
+
+logger = get_logger(__name__)
+
+# Recorded result pages and sites shipped with the repo
+DEFAULT_FIXTURES = Path(__file__).parent / 'fixtures' / 'research'
+
+# No politeness delays or cross-run caches, so runs measure the research code itself
+BENCHMARK_AGENT_CONFIG = {
+    'search_delay': 0,
+    'request_delay': 0,
+    'serp_cache': False,
+    'archive_pages': False,
+    'checkpoints': False,
+    'query_planner': False
+}
+
+
+def peak_memory_mb() -> float:
+    """Peak resident set size of this process so far"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+async def run_once(provider: SearchProvider, research_type: str, agent_config: Dict[str, Any]) -> Dict[str, Any]:
+    """Run start_intelligent_research once and measure its throughput"""
+    orchestrator = ResearchOrchestrator(search_provider=provider, agent_config=agent_config)
+    
+    started = time.perf_counter()
+    result = await orchestrator.start_intelligent_research(research_type=research_type)
+    elapsed = time.perf_counter() - started
+    
+    if result.get('status') != 'completed':
+        raise RuntimeError(f"Research run failed: {result.get('error') or result.get('processing_error')}")
+    
+    queries = result['research_statistics']['searches_performed']
+    sites = result['sites_researched']
+    services = result['services_discovered']
+    
+    return {
+        'elapsed_seconds': elapsed,
+        'queries': queries,
+        'sites': sites,
+        'services': services,
+        'queries_per_second': queries / max(elapsed, 1e-9),
+        'sites_per_second': sites / max(elapsed, 1e-9),
+        'services_per_second': services / max(elapsed, 1e-9),
+        'peak_memory_mb': peak_memory_mb()
+    }
+
+
+async def run_benchmark(
+    fixture_dir: Optional[str] = None,
+    runs: int = 3,
+    research_type: str = "comprehensive"
+) -> Dict[str, Any]:
+    """Run the research flow repeatedly against recorded fixtures"""
+    provider = FixtureSearchProvider(str(fixture_dir or DEFAULT_FIXTURES))
+    
+    # Keep every run cold - nothing may be answered from Redis or an earlier run
+    settings.EXTRACTION_CACHE_ENABLED = False
+    fetch_flight.shared = False
+    
+    results = []
+    for run in range(runs):
+        results.append(await run_once(provider, research_type, BENCHMARK_AGENT_CONFIG))
+        logger.info(f"Benchmark run {run + 1}/{runs}: {results[-1]['elapsed_seconds']:.2f}s")
+    
+    return {
+        'research_type': research_type,
+        'fixtures': str(provider.fixture_dir),
+        'runs': results,
+        'median': {
+            key: statistics.median(run[key] for run in results)
+            for key in ('elapsed_seconds', 'queries_per_second', 'sites_per_second', 'services_per_second')
+        },
+        'queries': results[-1]['queries'],
+        'sites': results[-1]['sites'],
+        'services': results[-1]['services'],
+        'peak_memory_mb': max(run['peak_memory_mb'] for run in results),
+        'provider': provider.get_statistics()
+    }
+
+
+async def record_fixtures(fixture_dir: str, research_type: str) -> Dict[str, Any]:
+    """Run one live research session, saving every result page and site it fetches"""
+    provider = RecordingSearchProvider(fixture_dir)
+    orchestrator = ResearchOrchestrator(
+        search_provider=provider,
+        agent_config={'serp_cache': False, 'archive_pages': False, 'checkpoints': False, 'query_planner': False}
+    )
+    result = await orchestrator.start_intelligent_research(research_type=research_type)
+    
+    return {
+        'status': result.get('status'),
+        'fixtures': fixture_dir,
+        'recorded_queries': sum(len(queries) for queries in provider.index['serp'].values()),
+        'recorded_pages': len(provider.index['pages'])
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the research flow against recorded search results")
+    parser.add_argument('--fixtures', default=str(DEFAULT_FIXTURES), help="Fixture directory to serve from")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--research-type', default='comprehensive', choices=['comprehensive', 'targeted'])
+    parser.add_argument('--record', metavar='DIR', default=None, help="Record live results into DIR instead of benchmarking")
+    args = parser.parse_args(argv)
+    
+    if args.record:
+        summary = asyncio.run(record_fixtures(args.record, args.research_type))
+    else:
+        summary = asyncio.run(run_benchmark(args.fixtures, runs=args.runs, research_type=args.research_type))
+    
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -47,6 +47,108 @@ class Settings(BaseSettings):
     DOWNLOAD_TIMEOUT: int = 30
     RETRY_ATTEMPTS: int = 3
     
+    # HTTP connection pool (shared by all agents in a process)
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 4
+    HTTP_DNS_CACHE_TTL: int = 300  # seconds
+    HTTP_KEEPALIVE_TIMEOUT: int = 30  # seconds
+    
+    # Page fetching
+    MAX_PAGE_BYTES: int = 2097152  # 2MB cap on downloaded page bodies
+    FETCH_CHUNK_SIZE: int = 65536
+    FETCH_TRUNCATE_OVERSIZED: bool = True  # Keep the first MAX_PAGE_BYTES instead of rejecting
+    ALLOWED_CONTENT_TYPES: List[str] = ["text/html", "application/xhtml+xml", "text/plain"]
+    
+    # Research agent fan-out
+    RESEARCH_SEARCH_CONCURRENCY: int = 2  # In-flight queries per search engine
+    RESEARCH_SEARCH_DELAY: float = 3.0  # Minimum seconds between requests to one search engine
+    RESEARCH_EXTRACT_CONCURRENCY: int = 8  # Sites fetched at once; per-host spacing still applies
+    SERP_CACHE_TTL_HOURS: float = 24  # Default query cooldown when the orchestrator doesn't set one
+    RESEARCH_DEDUPE_PATH_DEPTH: int = 1  # Path directories that tell sections of one site apart
+    RESEARCH_STREAM_BUFFER: int = 100  # Results buffered ahead of a streaming consumer
+    RESEARCH_CHECKPOINTS_ENABLED: bool = True  # Checkpoint sessions to Redis so they can resume
+    RESEARCH_CHECKPOINT_TTL: int = 604800  # 7 days
+    RESEARCH_RESUME_ON_STARTUP: bool = False  # Resume interrupted sessions when the API starts
+    RESEARCH_QUERY_PLANNER_ENABLED: bool = True  # Rank and prune queries by what they found before
+    RESEARCH_QUERY_EXPLORATION: float = 1.0  # UCB weight given to rarely run queries
+    RESEARCH_QUERY_PRUNE_AFTER: int = 3  # Dry runs in a row before a query is skipped
+    RESEARCH_QUERY_MAX_BACKOFF: int = 32  # Most sessions a dry query is skipped for
+    
+    # In-process discovery pipeline
+    PIPELINE_QUEUE_SIZE: int = 50  # Per-stage queue bound; full queues push back upstream
+    PIPELINE_FETCH_CONCURRENCY: int = 8
+    PIPELINE_PARSE_WORKERS: int = 2  # Worker processes shared by all pipelines
+    PIPELINE_EXTRACT_CONCURRENCY: int = 2
+    PIPELINE_VALIDATE_CONCURRENCY: int = 4
+    PIPELINE_STORE_BATCH_SIZE: int = 25
+    PIPELINE_MAX_PAGES: int = 200
+    PIPELINE_MIN_VALIDATION_SCORE: float = 0.5
+    
+    # Discovery result storage
+    DISCOVERY_UPSERT_BATCH_SIZE: int = 500  # Services matched and upserted per statement
+    
+    # Duplicate service matching
+    SERVICE_MATCH_CANDIDATES: int = 5  # Ranked candidates returned per service
+    SERVICE_MATCH_NAME_THRESHOLD: float = 0.3  # Trigram similarity for a name to make a service a candidate
+    SERVICE_MATCH_MIN_SCORE: float = 0.55  # Candidate score taken as the same service
+    SERVICE_MATCH_MIN_NAME_SIMILARITY: float = 0.6  # Names must be this similar as well, whatever else matches
+    
+    # Entity resolution across all sources
+    ENTITY_RESOLUTION_MIN_SCORE: float = 0.6  # Pair score linking two records as one organisation
+    ENTITY_RESOLUTION_MIN_NAME_SIMILARITY: float = 0.6  # Names must be this similar as well, whatever else matches
+    ENTITY_RESOLUTION_MAX_BLOCK_SIZE: int = 200  # Larger blocks are too unspecific to compare fully
+    ENTITY_RESOLUTION_WORKERS: int = 0  # Scoring processes; 0 for one per core
+    ENTITY_RESOLUTION_PARALLEL_MIN_PAIRS: int = 50000  # Fewer pairs are scored in-process
+    ENTITY_RESOLUTION_CHUNK_SIZE: int = 20000  # Pairs per worker task
+    
+    # Extraction result cache
+    EXTRACTION_CACHE_ENABLED: bool = True
+    EXTRACTION_CACHE_BACKEND: str = "redis"  # "redis" or "disk"
+    EXTRACTION_CACHE_DIR: str = "./data/extraction_cache"
+    EXTRACTION_CACHE_TTL: int = 604800  # 7 days
+    EXTRACTION_CACHE_MEMORY_ENTRIES: int = 1000
+    
+    # Document (PDF / Word) extraction
+    DOCUMENTS_ENABLED: bool = True
+    DOCUMENT_MAX_BYTES: int = 20971520  # 20MB - documents can't be parsed from a truncated prefix
+    DOCUMENT_WORKERS: int = 2
+    DOCUMENT_TIME_LIMIT: int = 30  # seconds per document
+    DOCUMENT_MAX_PAGES: int = 200
+    DOCUMENT_PAGE_BATCH: int = 10  # Pages handed to a worker at a time
+    
+    # Headless rendering fallback for JavaScript-only pages
+    RENDER_ENABLED: bool = True
+    RENDER_MAX_CONTEXTS: int = 2  # Pages rendered at once per process
+    RENDER_PAGE_TIMEOUT: int = 20  # seconds
+    RENDER_QUEUE_TIMEOUT: int = 5  # Skip rendering if no context frees up in time
+    RENDER_PAGES_PER_CONTEXT: int = 50  # Recycle contexts to cap browser memory
+    RENDER_BLOCKED_RESOURCES: List[str] = ["image", "font", "media"]
+    RENDER_LAUNCH_COOLDOWN: int = 300  # seconds to wait before retrying a browser that failed to launch
+    
+    # Page archive (for offline reprocessing)
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_DIR: str = "./data/archive"
+    ARCHIVE_ROTATE_BYTES: int = 104857600  # Start a new .warc.gz after 100MB
+    
+    # Near-duplicate detection
+    SIMHASH_MAX_DISTANCE: int = 3  # Differing bits (of 64) still treated as the same page
+    SIMHASH_MIN_TOKENS: int = 50  # Shorter pages aren't fingerprinted
+    
+    # Robots.txt and sitemaps
+    ROBOTS_CACHE_TTL: int = 86400  # 1 day
+    ROBOTS_ERROR_TTL: int = 600  # Retry unreachable robots.txt after 10 minutes
+    ROBOTS_MAX_BYTES: int = 512000  # RFC 9309 parsers must handle at least 500KiB
+    SITEMAP_MAX_FILES: int = 10  # Sitemaps (including index children) read per site
+    SITEMAP_MAX_URLS: int = 5000
+    SITEMAP_MAX_BYTES: int = 52428800  # Protocol limit of 50MB per sitemap
+    SITEMAP_MAX_SEEDS: int = 25  # Sitemap URLs added to the frontier per site
+    SITEMAP_LASTMOD_HALF_LIFE_DAYS: int = 180
+    
+    # Request coalescing
+    SINGLE_FLIGHT_SHARED: bool = True  # Coalesce across processes via Redis
+    SINGLE_FLIGHT_LOCK_TTL: int = 60  # seconds
+    SINGLE_FLIGHT_RESULT_TTL: int = 30  # seconds
+    
     # Agent Configuration
     MAX_DISCOVERY_AGENTS: int = 5
     MAX_VALIDATION_AGENTS: int = 3
@@ -4,7 +4,7 @@ Database configuration and connection management
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
-from sqlalchemy import Column, String, DateTime, Float, Integer, Boolean, Text, JSON
+from sqlalchemy import Column, String, DateTime, Float, Integer, Boolean, Text, JSON, Index, inspect, text
 from sqlalchemy.dialects.postgresql import UUID
 import uuid
 from datetime import datetime
@@ -58,8 +58,12 @@ async def init_db():
             # Import all models to ensure they're registered
             from app.models import service, agent, validation, learning
             
+            # Trigram index on service names for duplicate matching
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            
             # Create all tables
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(_add_missing_columns)
             logger.info("Database tables created successfully")
             
     except Exception as e:
@@ -67,6 +71,30 @@ async def init_db():
         raise
 
 
+def _add_missing_columns(connection):
+    """Add columns and indexes that models gained after their table was created.
+    
+    create_all only creates missing tables, so without this an existing
+    database would lack every column added since. New columns must be nullable.
+    """
+    inspector = inspect(connection)
+    quote = connection.dialect.identifier_preparer.quote
+    
+    for table in Base.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        
+        for column in missing:
+            column_type = column.type.compile(dialect=connection.dialect)
+            connection.execute(text(
+                f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"
+            ))
+            logger.info(f"Added column {table.name}.{column.name}")
+        
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+
+
 # Service Data Models
 class ServiceModel(Base):
     """Core service information model"""
@@ -102,9 +130,56 @@ class ServiceModel(Base):
     source_urls = Column(JSON)  # List of source URLs
     metadata = Column(JSON)  # Additional metadata
     
+    # Discovery Provenance
+    source_url = Column(String(500))
+    extraction_method = Column(String(50))
+    discovery_id = Column(String(100), index=True)
+    needs_validation = Column(Boolean, default=False)
+    
+    # Duplicate Matching - normalized from the fields above by the services that write them
+    name_key = Column(String(255))
+    phone_key = Column(String(20), index=True)
+    email_key = Column(String(255), index=True)
+    website_domain = Column(String(255), index=True)
+    
+    # Entity Resolution - the canonical record this one was resolved to
+    entity_id = Column(UUID(as_uuid=True), index=True)
+    resolved_at = Column(DateTime, index=True)
+    
     # Status
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
+    
+    __table_args__ = (
+        Index(
+            'ix_services_name_key_trgm', 'name_key',
+            postgresql_using='gin',
+            postgresql_ops={'name_key': 'gin_trgm_ops'}
+        ),
+    )
+
+
+class DiscoveryResultModel(Base):
+    """Outcome of running discovery on one URL"""
+    __tablename__ = "discovery_results"
+    
+    discovery_id = Column(String(100), unique=True, nullable=False, index=True)
+    url = Column(String(500), nullable=False, index=True)
+    agent_id = Column(String(100))
+    
+    # Result
+    status = Column(String(20), nullable=False)  # completed, failed, skipped
+    message = Column(Text)
+    services_found = Column(Integer, default=0)
+    services = Column(JSON)  # Discovered services as extracted
+    additional_urls = Column(JSON)
+    page_relevance = Column(Float)
+    depth = Column(Integer, default=0)
+    
+    # Timing and Errors
+    processing_time = Column(Float)  # seconds
+    error_message = Column(Text)
+    discovered_at = Column(DateTime, default=datetime.utcnow, index=True)
 
 
 class AgentModel(Base):
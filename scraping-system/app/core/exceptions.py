@@ -61,6 +61,15 @@ class ExtractionException(ScrapingSystemException):
         )
 
 
+class ContentRejectedException(ExtractionException):
+    """Exception when fetched content is rejected before it is fully downloaded"""
+    
+    def __init__(self, message: str, url: str, reason: str, **kwargs):
+        super().__init__(message=message, url=url, **kwargs)
+        self.error_code = "CONTENT_REJECTED"
+        self.details["reason"] = reason
+
+
 class DatabaseException(ScrapingSystemException):
     """Exception related to database operations"""
     
@@ -123,4 +132,16 @@ class ResearchException(ScrapingSystemException):
             status_code=500,
             details={"research_type": research_type},
             **kwargs
+        )
+
+
+class DiscoveryException(ScrapingSystemException):
+    """Exception related to discovery operations"""
+    
+    def __init__(self, message: str, **context):
+        super().__init__(
+            message=message,
+            error_code="DISCOVERY_ERROR",
+            status_code=500,
+            details=context
         )
\ No newline at end of file
@@ -0,0 +1,136 @@
+"""
+Process-wide HTTP client factory with a shared, tuned connection pool
+"""
+
+import asyncio
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+# Brotli decoding is optional - only advertise it when aiohttp can decode it
+try:
+    import brotli  # noqa: F401
+    BROTLI_AVAILABLE = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        BROTLI_AVAILABLE = True
+    except ImportError:
+        BROTLI_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+ACCEPT_ENCODING = "gzip, deflate, br" if BROTLI_AVAILABLE else "gzip, deflate"
+
+
+class HTTPClientFactory:
+    """Hands out aiohttp sessions that all share one TCPConnector.
+    
+    Each agent still gets its own ClientSession so it can keep its own timeout
+    and headers, but connections, keep-alive sockets and the DNS cache are
+    pooled across the whole process. Closing an agent's session leaves the
+    shared connector open; call close() once at shutdown.
+    """
+    
+    def __init__(self):
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._trace_config = self._build_trace_config()
+        
+        self.stats = {
+            'sessions_created': 0,
+            'requests': 0,
+            'connections_created': 0,
+            'connections_reused': 0,
+            'connection_queued': 0,
+            'dns_cache_hits': 0,
+            'dns_cache_misses': 0
+        }
+    
+    def _build_trace_config(self) -> aiohttp.TraceConfig:
+        """Count requests, new connections and reuse for statistics"""
+        trace_config = aiohttp.TraceConfig()
+        
+        def counter(key: str):
+            async def _count(session, context, params):
+                self.stats[key] += 1
+            return _count
+        
+        trace_config.on_request_start.append(counter('requests'))
+        trace_config.on_connection_create_end.append(counter('connections_created'))
+        trace_config.on_connection_reuseconn.append(counter('connections_reused'))
+        trace_config.on_connection_queued_start.append(counter('connection_queued'))
+        trace_config.on_dns_cache_hit.append(counter('dns_cache_hits'))
+        trace_config.on_dns_cache_miss.append(counter('dns_cache_misses'))
+        
+        return trace_config
+    
+    def get_connector(self) -> aiohttp.TCPConnector:
+        """Get the shared connector, creating it for the running event loop"""
+        loop = asyncio.get_running_loop()
+        
+        if self._connector is None or self._connector.closed or self._loop is not loop:
+            self._connector = aiohttp.TCPConnector(
+                limit=settings.HTTP_POOL_LIMIT,
+                limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+                use_dns_cache=True,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+                enable_cleanup_closed=True
+            )
+            self._loop = loop
+            logger.info(
+                f"Created shared HTTP connector (limit={settings.HTTP_POOL_LIMIT}, "
+                f"per_host={settings.HTTP_POOL_LIMIT_PER_HOST})"
+            )
+        
+        return self._connector
+    
+    def create_session(
+        self,
+        timeout: Optional[float] = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> aiohttp.ClientSession:
+        """Create a session backed by the shared connector"""
+        session_headers = {
+            'User-Agent': settings.USER_AGENT,
+            'Accept-Encoding': ACCEPT_ENCODING
+        }
+        session_headers.update(headers or {})
+        
+        self.stats['sessions_created'] += 1
+        
+        return aiohttp.ClientSession(
+            connector=self.get_connector(),
+            connector_owner=False,
+            timeout=aiohttp.ClientTimeout(total=timeout or settings.DOWNLOAD_TIMEOUT),
+            headers=session_headers,
+            trace_configs=[self._trace_config]
+        )
+    
+    async def close(self):
+        """Close the shared connector and every pooled connection"""
+        if self._connector is not None and not self._connector.closed:
+            await self._connector.close()
+        self._connector = None
+        self._loop = None
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get connection pool statistics"""
+        connections = self.stats['connections_created'] + self.stats['connections_reused']
+        dns_lookups = self.stats['dns_cache_hits'] + self.stats['dns_cache_misses']
+        
+        return {
+            **self.stats,
+            'connection_reuse_rate': self.stats['connections_reused'] / max(1, connections),
+            'dns_cache_hit_rate': self.stats['dns_cache_hits'] / max(1, dns_lookups),
+            'brotli_enabled': BROTLI_AVAILABLE,
+            'pool_open': self._connector is not None and not self._connector.closed
+        }
+
+
+# Process-wide factory shared by all agents and services
+http_client = HTTPClientFactory()
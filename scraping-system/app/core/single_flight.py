@@ -0,0 +1,209 @@
+"""
+Request coalescing (single-flight) for concurrent identical fetches
+"""
+
+import asyncio
+import json
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Releases the lock only if we still own it, so a slow leader can't delete a successor's lock
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so equivalent spellings share one in-flight fetch"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'http').lower()
+    netloc = parts.netloc.lower()
+    
+    # Drop default ports
+    if scheme == 'http' and netloc.endswith(':80'):
+        netloc = netloc[:-3]
+    elif scheme == 'https' and netloc.endswith(':443'):
+        netloc = netloc[:-4]
+    
+    # Fragments never reach the server
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into a single execution.
+    
+    Callers in the same process share one future per key. When a Redis client
+    is available, callers in other processes wait on a short-lived lock and
+    pick up the leader's JSON-serialized result instead of repeating the work.
+    If the leader is cancelled, one of its followers runs fn in its place.
+    """
+    
+    def __init__(
+        self,
+        namespace: str = "singleflight",
+        shared: Optional[bool] = None,
+        lock_ttl: Optional[int] = None,
+        result_ttl: Optional[int] = None,
+        poll_interval: float = 0.25
+    ):
+        self.namespace = namespace
+        self.shared = settings.SINGLE_FLIGHT_SHARED if shared is None else shared
+        self.lock_ttl = lock_ttl or settings.SINGLE_FLIGHT_LOCK_TTL
+        self.result_ttl = result_ttl or settings.SINGLE_FLIGHT_RESULT_TTL
+        self.poll_interval = poll_interval
+        
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._redis: Optional[redis.Redis] = None
+        
+        self.stats = {
+            'calls': 0,
+            'executions': 0,
+            'coalesced_local': 0,
+            'coalesced_remote': 0,
+            'shared_errors': 0
+        }
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once per key; concurrent callers with the same key share its result"""
+        self.stats['calls'] += 1
+        
+        inflight = self._inflight.get(key)
+        while inflight is not None:
+            self.stats['coalesced_local'] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    # We were cancelled ourselves
+                    raise
+            # The leader was cancelled rather than failing, so its caller gave
+            # up - not this one. Join whoever took over, or take over ourselves
+            self.stats['coalesced_local'] -= 1
+            inflight = self._inflight.get(key)
+        
+        future = asyncio.get_running_loop().create_future()
+        # Mark exceptions as retrieved even when nobody else was waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        
+        try:
+            result = await self._execute(key, fn)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+    
+    async def _execute(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Execute fn, coordinating with other processes when sharing is enabled"""
+        client = self._get_redis() if self.shared else None
+        if client is None:
+            self.stats['executions'] += 1
+            return await fn()
+        
+        lock_key = f"{self.namespace}:lock:{key}"
+        result_key = f"{self.namespace}:result:{key}"
+        token = uuid.uuid4().hex
+        
+        try:
+            cached = await client.get(result_key)
+            if cached is not None:
+                self.stats['coalesced_remote'] += 1
+                return json.loads(cached)
+            
+            acquired = await client.set(lock_key, token, nx=True, ex=self.lock_ttl)
+            if not acquired:
+                remote_result = await self._wait_for_remote(client, lock_key, result_key)
+                if remote_result is not None:
+                    self.stats['coalesced_remote'] += 1
+                    return remote_result
+        except Exception as e:
+            # Coordination is an optimisation; never fail the fetch because Redis is down
+            self.stats['shared_errors'] += 1
+            logger.warning(f"Single-flight coordination failed for {key}: {e}")
+            self.stats['executions'] += 1
+            return await fn()
+        
+        self.stats['executions'] += 1
+        try:
+            result = await fn()
+            try:
+                await client.set(result_key, json.dumps(result, default=str), ex=self.result_ttl)
+            except (TypeError, ValueError):
+                logger.debug(f"Single-flight result for {key} is not JSON serializable; not shared")
+            return result
+        finally:
+            try:
+                await client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+            except Exception as e:
+                self.stats['shared_errors'] += 1
+                logger.warning(f"Failed to release single-flight lock for {key}: {e}")
+    
+    async def _wait_for_remote(
+        self,
+        client: redis.Redis,
+        lock_key: str,
+        result_key: str
+    ) -> Optional[Any]:
+        """Wait for another process's result; None means we should run fn ourselves"""
+        deadline = asyncio.get_running_loop().time() + self.lock_ttl
+        
+        while asyncio.get_running_loop().time() < deadline:
+            cached = await client.get(result_key)
+            if cached is not None:
+                return json.loads(cached)
+            
+            # Leader finished without sharing a result (or died) - stop waiting
+            if not await client.exists(lock_key):
+                cached = await client.get(result_key)
+                return json.loads(cached) if cached is not None else None
+            
+            await asyncio.sleep(self.poll_interval)
+        
+        return None
+    
+    def _get_redis(self) -> Optional[redis.Redis]:
+        """Lazily create the Redis client used for cross-process coordination"""
+        if self._redis is None:
+            try:
+                self._redis = redis.from_url(settings.REDIS_URL)
+            except Exception as e:
+                logger.warning(f"Single-flight Redis unavailable, coalescing in-process only: {e}")
+                self.shared = False
+                return None
+        return self._redis
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        coalesced = self.stats['coalesced_local'] + self.stats['coalesced_remote']
+        return {
+            **self.stats,
+            'in_flight': len(self._inflight),
+            'coalesce_rate': coalesced / max(1, self.stats['calls'])
+        }
+
+
+# Process-wide instance shared by all agents for page and website fetches
+fetch_flight = SingleFlight(namespace="singleflight:fetch")
+
+# Search engine queries, so concurrent research sessions issue each query once.
+# In-process only - the SERP cache already shares results between processes
+search_flight = SingleFlight(namespace="singleflight:search", shared=False)
@@ -0,0 +1,252 @@
+"""
+Compressed WARC-style page archive so extraction can be re-run without re-crawling
+"""
+
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.crawling.fetch import FetchedPage, decode_body
+
+logger = get_logger(__name__)
+
+INDEX_FILENAME = "index.jsonl"
+
+
+@dataclass
+class ArchivedPage:
+    """A page response read back from the archive"""
+    url: str
+    fetched_at: str
+    status: int
+    content_type: str
+    charset: Optional[str]
+    body: bytes
+    record_id: str
+    
+    @property
+    def text(self) -> str:
+        return decode_body(self.body, self.charset)
+
+
+def _build_record(page: FetchedPage, fetched_at: datetime, record_id: str) -> bytes:
+    """Serialize a page as a WARC response record"""
+    content_type = page.content_type or 'application/octet-stream'
+    if page.charset:
+        content_type = f"{content_type}; charset={page.charset}"
+    
+    http_block = (
+        f"HTTP/1.1 {page.status}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(page.body)}\r\n"
+        f"\r\n"
+    ).encode('latin-1') + page.body
+    
+    headers = [
+        "WARC/1.1",
+        "WARC-Type: response",
+        f"WARC-Record-ID: <urn:uuid:{record_id}>",
+        f"WARC-Date: {fetched_at.strftime('%Y-%m-%dT%H:%M:%SZ')}",
+        f"WARC-Target-URI: {page.url}",
+        f"WARC-Payload-Digest: sha1:{hashlib.sha1(page.body).hexdigest()}",
+        "Content-Type: application/http;msgtype=response",
+        f"Content-Length: {len(http_block)}"
+    ]
+    if page.truncated:
+        headers.append("WARC-Truncated: length")
+    
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode('utf-8') + http_block + b'\r\n\r\n'
+
+
+def _read_record(stream: io.BufferedIOBase) -> Optional[ArchivedPage]:
+    """Read the next WARC response record from a decompressed stream"""
+    warc_headers = {}
+    
+    line = stream.readline()
+    while line in (b'\r\n', b'\n'):
+        line = stream.readline()
+    if not line:
+        return None
+    
+    while True:
+        line = stream.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('utf-8').partition(':')
+        warc_headers[name.strip().lower()] = value.strip()
+    
+    block = stream.read(int(warc_headers.get('content-length', 0)))
+    stream.readline()
+    stream.readline()
+    
+    head, _, body = block.partition(b'\r\n\r\n')
+    head_lines = head.decode('latin-1').split('\r\n')
+    status = int(head_lines[0].split()[1])
+    
+    content_type, charset = '', None
+    for header in head_lines[1:]:
+        name, _, value = header.partition(':')
+        if name.strip().lower() == 'content-type':
+            content_type, _, params = value.strip().partition(';')
+            if 'charset=' in params:
+                charset = params.split('charset=', 1)[1].strip()
+    
+    return ArchivedPage(
+        url=warc_headers.get('warc-target-uri', ''),
+        fetched_at=warc_headers.get('warc-date', ''),
+        status=status,
+        content_type=content_type.strip(),
+        charset=charset,
+        body=body,
+        record_id=warc_headers.get('warc-record-id', '').strip('<>').replace('urn:uuid:', '')
+    )
+
+
+class PageArchive:
+    """Append-only archive of fetched pages.
+    
+    Each record is its own gzip member, so archive files are valid .warc.gz and
+    any record can be read by seeking to its offset. A JSONL index maps each
+    URL and fetch time to its file, offset and length. Files rotate once they
+    pass ARCHIVE_ROTATE_BYTES.
+    """
+    
+    def __init__(self, root: Optional[str] = None, rotate_bytes: Optional[int] = None):
+        self.root = Path(root or settings.ARCHIVE_DIR)
+        self.rotate_bytes = rotate_bytes or settings.ARCHIVE_ROTATE_BYTES
+        
+        self._lock = threading.Lock()
+        self._current_file: Optional[Path] = None
+        
+        self.stats = {
+            'records_written': 0,
+            'bytes_written': 0,
+            'write_errors': 0
+        }
+    
+    @property
+    def index_path(self) -> Path:
+        return self.root / INDEX_FILENAME
+    
+    def _target_file(self) -> Path:
+        """Get the archive file for the next record, rotating when it's full"""
+        if self._current_file is None or (
+            self._current_file.exists() and self._current_file.stat().st_size >= self.rotate_bytes
+        ):
+            stamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+            self._current_file = self.root / f"pages-{stamp}-{os.getpid()}-{uuid.uuid4().hex[:6]}.warc.gz"
+        return self._current_file
+    
+    def write(self, page: FetchedPage, fetched_at: Optional[datetime] = None) -> Dict[str, Any]:
+        """Append a page to the archive and index it"""
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        record_id = str(uuid.uuid4())
+        record = gzip.compress(_build_record(page, fetched_at, record_id))
+        
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            path = self._target_file()
+            
+            with open(path, 'ab') as archive_file:
+                offset = archive_file.tell()
+                archive_file.write(record)
+            
+            entry = {
+                'url': page.url,
+                'fetched_at': fetched_at.isoformat(),
+                'file': path.name,
+                'offset': offset,
+                'length': len(record),
+                'status': page.status,
+                'content_type': page.content_type,
+                'sha1': hashlib.sha1(page.body).hexdigest(),
+                'record_id': record_id
+            }
+            with open(self.index_path, 'a', encoding='utf-8') as index_file:
+                index_file.write(json.dumps(entry) + '\n')
+            
+            self.stats['records_written'] += 1
+            self.stats['bytes_written'] += len(record)
+        
+        return entry
+    
+    async def store(self, page: FetchedPage) -> Optional[Dict[str, Any]]:
+        """Archive a page without blocking the event loop; failures are logged, not raised"""
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.write, page)
+        except Exception as e:
+            self.stats['write_errors'] += 1
+            logger.warning(f"Failed to archive {page.url}: {e}")
+            return None
+    
+    def read(self, entry: Dict[str, Any]) -> ArchivedPage:
+        """Read one record using its index entry"""
+        with open(self.root / entry['file'], 'rb') as archive_file:
+            archive_file.seek(entry['offset'])
+            compressed = archive_file.read(entry['length'])
+        
+        page = _read_record(io.BytesIO(gzip.decompress(compressed)))
+        if page is None:
+            raise ValueError(f"No record at {entry['file']}:{entry['offset']}")
+        return page
+    
+    def iter_index(
+        self,
+        latest_only: bool = True,
+        since: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """Get index entries, by default only the latest successful capture of each URL"""
+        if not self.index_path.exists():
+            return []
+        
+        entries = []
+        with open(self.index_path, encoding='utf-8') as index_file:
+            for line in index_file:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if entry.get('status') != 200:
+                    continue
+                if since and datetime.fromisoformat(entry['fetched_at']) < since:
+                    continue
+                entries.append(entry)
+        
+        if not latest_only:
+            return entries
+        
+        latest = {}
+        for entry in entries:
+            current = latest.get(entry['url'])
+            if current is None or entry['fetched_at'] >= current['fetched_at']:
+                latest[entry['url']] = entry
+        return list(latest.values())
+    
+    def iter_file(self, filename: str) -> Iterator[ArchivedPage]:
+        """Read every record in an archive file in order"""
+        with gzip.open(self.root / filename, 'rb') as stream:
+            while True:
+                page = _read_record(stream)
+                if page is None:
+                    break
+                yield page
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get archive write statistics"""
+        return {**self.stats, 'archive_dir': str(self.root)}
+
+
+# Process-wide archive shared by all agents
+page_archive = PageArchive()
@@ -0,0 +1,169 @@
+"""
+Main-content extraction so extractors only see the part of a page that describes it
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple, Union
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+# Elements that never hold page content
+BOILERPLATE_TAGS = [
+    'script', 'style', 'noscript', 'template', 'svg', 'iframe',
+    'nav', 'header', 'footer', 'aside', 'form'
+]
+
+# ARIA landmarks for site chrome rather than page content
+BOILERPLATE_ROLES = {'navigation', 'banner', 'contentinfo', 'complementary', 'search', 'dialog'}
+
+# id/class fragments used for menus, cookie banners, share bars and the like
+BOILERPLATE_PATTERN = re.compile(
+    r'(?:^|[\s_-])(?:nav|navbar|menu|breadcrumbs?|footer|masthead|site-header|sidebar|'
+    r'cookie|consent|gdpr|banner|popup|modal|newsletter|subscribe|social|share|sharing|'
+    r'skip-link|back-to-top|advert|ads|promo|related)(?:$|[\s_-])',
+    re.IGNORECASE
+)
+
+# Candidate blocks for the main content region
+CONTAINER_TAGS = {'main', 'article', 'section', 'div', 'td', 'body'}
+
+# Smallest block holding this share of the page's non-link text wins
+MAIN_CONTENT_MIN_SHARE = 0.8
+
+# A <main> or role="main" element is trusted if it holds this share
+LANDMARK_MIN_SHARE = 0.5
+
+
+@dataclass
+class MainContent:
+    """The content region of a page and how much surrounding text was dropped"""
+    soup: BeautifulSoup
+    node: Tag
+    text: str
+    original_chars: int
+    content_chars: int
+    json_ld: List[str] = field(default_factory=list)
+    
+    @property
+    def removed_pct(self) -> float:
+        """Percentage of the page's visible text that was treated as boilerplate"""
+        if not self.original_chars:
+            return 0.0
+        return round(100.0 * (1 - self.content_chars / self.original_chars), 1)
+
+
+def _is_boilerplate(element: Tag) -> bool:
+    if element.name in BOILERPLATE_TAGS:
+        return True
+    if element.get('role') in BOILERPLATE_ROLES:
+        return True
+    if element.get('aria-hidden') == 'true' or element.has_attr('hidden'):
+        return True
+    
+    attributes = ' '.join([element.get('id') or ''] + list(element.get('class') or []))
+    return bool(attributes) and element.name not in ('main', 'article', 'body') and bool(
+        BOILERPLATE_PATTERN.search(attributes)
+    )
+
+
+def _measure(node: Tag, sizes: Dict[int, Tuple[int, int]]) -> Tuple[int, int]:
+    """Record (text chars, link text chars) for every element under node"""
+    text_chars = link_chars = 0
+    
+    for child in node.children:
+        if isinstance(child, Tag):
+            child_text, child_links = _measure(child, sizes)
+            text_chars += child_text
+            link_chars += child_links
+        elif isinstance(child, NavigableString) and not isinstance(child, Comment):
+            text_chars += len(child.strip())
+    
+    if node.name == 'a':
+        link_chars = text_chars
+    
+    sizes[id(node)] = (text_chars, link_chars)
+    return text_chars, link_chars
+
+
+def _visible_chars(node: Tag) -> int:
+    return sum(
+        len(text.strip())
+        for text in node.find_all(string=True)
+        if not isinstance(text, Comment) and text.parent.name not in ('script', 'style', 'noscript', 'template')
+    )
+
+
+def extract_main_content(page: Union[str, BeautifulSoup]) -> MainContent:
+    """Strip site chrome and pick the block that holds most of the page's content.
+    
+    Boilerplate elements are removed from the soup in place. The main node is
+    then the smallest container that still holds MAIN_CONTENT_MIN_SHARE of the
+    remaining non-link text, which drops sidebars and link lists that survive
+    the tag and class rules; a <main> landmark is preferred when it holds a
+    fair share of the text. The <head> is left alone so titles and meta
+    descriptions stay available.
+    """
+    soup = page if isinstance(page, BeautifulSoup) else BeautifulSoup(page, 'html.parser')
+    root = soup.body or soup
+    original_chars = _visible_chars(root)
+    
+    # JSON-LD lives in <script> blocks, which are about to be removed
+    json_ld = [
+        script.string or script.get_text()
+        for script in soup.find_all('script', type='application/ld+json')
+    ]
+    
+    for element in root.find_all(True):
+        # Descendants of an element we already removed go with it
+        if element.decomposed:
+            continue
+        if _is_boilerplate(element):
+            element.decompose()
+    
+    sizes: Dict[int, Tuple[int, int]] = {}
+    try:
+        root_text, root_links = _measure(root, sizes)
+    except RecursionError:
+        # Pathologically nested markup - fall back to the cleaned body
+        text = root.get_text(' ', strip=True)
+        return MainContent(soup, root, text, original_chars, len(text), json_ld)
+    
+    content_text = root_text - root_links
+    node = root
+    node_text = root_text
+    
+    # Sites that mark up their content region usually mean it
+    landmark = root.find('main') or root.find(attrs={'role': 'main'})
+    if landmark is not None:
+        text_chars, link_chars = sizes.get(id(landmark), (0, 0))
+        if text_chars - link_chars >= content_text * LANDMARK_MIN_SHARE:
+            text = landmark.get_text(' ', strip=True)
+            return MainContent(soup, landmark, text, original_chars, text_chars, json_ld)
+    
+    target = content_text * MAIN_CONTENT_MIN_SHARE
+    if target > 0:
+        for candidate in root.find_all(CONTAINER_TAGS):
+            text_chars, link_chars = sizes.get(id(candidate), (0, 0))
+            if text_chars - link_chars >= target and text_chars < node_text:
+                node, node_text = candidate, text_chars
+    
+    text = node.get_text(' ', strip=True)
+    return MainContent(
+        soup=soup,
+        node=node,
+        text=text,
+        original_chars=original_chars,
+        content_chars=sizes.get(id(node), (len(text), 0))[0],
+        json_ld=json_ld
+    )
+
+
+def summarize_removal(main_content: MainContent) -> Dict[str, Any]:
+    """Describe how much of a page was dropped as boilerplate"""
+    return {
+        'original_chars': main_content.original_chars,
+        'content_chars': main_content.content_chars,
+        'removed_pct': main_content.removed_pct,
+        'main_node': main_content.node.name
+    }
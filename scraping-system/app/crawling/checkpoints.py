@@ -0,0 +1,211 @@
+"""
+Research session checkpoints, so an interrupted session resumes where it stopped
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Set of every checkpointed research id, for listing resumable sessions
+CHECKPOINT_INDEX = "research:checkpoints"
+
+
+@dataclass
+class CheckpointState:
+    """What an earlier run of a research session already finished"""
+    queries: Set[str] = field(default_factory=set)
+    sites: List[Dict[str, Any]] = field(default_factory=list)
+    extracted: Dict[str, List[Dict[str, Any]]] = field(default_factory=dict)
+    
+    @property
+    def empty(self) -> bool:
+        return not (self.queries or self.sites or self.extracted)
+
+
+class ResearchCheckpoint:
+    """Records a research session's progress in Redis as it goes.
+    
+    Each finished search stores its query and the new sites it turned up in
+    one transaction, and each finished extraction stores the site's services,
+    so a restarted or cancelled session can skip everything already done.
+    A session is 'running' until it completes or is cancelled; cancelled
+    sessions keep their progress but are only resumed when asked to.
+    Checkpoint writes that fail are logged and the research carries on.
+    """
+    
+    def __init__(self, research_id: str, ttl: Optional[int] = None):
+        self.research_id = research_id
+        self.ttl = ttl or settings.RESEARCH_CHECKPOINT_TTL
+        self.prefix = f"research:checkpoint:{research_id}"
+        self._redis: Optional[redis.Redis] = None
+        
+        self.stats = {
+            'writes': 0,
+            'errors': 0
+        }
+    
+    @property
+    def keys(self) -> Dict[str, str]:
+        return {
+            'meta': f"{self.prefix}:meta",
+            'queries': f"{self.prefix}:queries",
+            'sites': f"{self.prefix}:sites",
+            'extracted': f"{self.prefix}:extracted"
+        }
+    
+    async def start(self, research_type: str, target_service_types: List[str]):
+        """Mark the session as running, keeping what an earlier run recorded"""
+        now = datetime.utcnow().isoformat()
+        try:
+            client = self._get_redis()
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hsetnx(self.keys['meta'], 'created_at', now)
+                pipe.hset(self.keys['meta'], mapping={
+                    'research_id': self.research_id,
+                    'research_type': research_type,
+                    'target_service_types': json.dumps(target_service_types),
+                    'status': 'running',
+                    'updated_at': now
+                })
+                pipe.sadd(CHECKPOINT_INDEX, self.research_id)
+                self._expire(pipe)
+                await pipe.execute()
+        except Exception as e:
+            self._failed('start', e)
+    
+    async def load(self) -> CheckpointState:
+        """Load what earlier runs of this session finished"""
+        try:
+            client = self._get_redis()
+            queries = await client.smembers(self.keys['queries'])
+            sites = await client.lrange(self.keys['sites'], 0, -1)
+            extracted = await client.hgetall(self.keys['extracted'])
+        except Exception as e:
+            self._failed('load', e)
+            return CheckpointState()
+        
+        return CheckpointState(
+            queries={_decode(query) for query in queries},
+            sites=[json.loads(site) for site in sites],
+            extracted={_decode(url): json.loads(services) for url, services in extracted.items()}
+        )
+    
+    async def record_search(self, query: str, sites: List[Dict[str, Any]]):
+        """Record a finished search and the new sites it found"""
+        try:
+            async with self._get_redis().pipeline(transaction=True) as pipe:
+                if sites:
+                    pipe.rpush(self.keys['sites'], *(json.dumps(site, default=str) for site in sites))
+                pipe.sadd(self.keys['queries'], query)
+                pipe.hset(self.keys['meta'], 'updated_at', datetime.utcnow().isoformat())
+                self._expire(pipe)
+                await pipe.execute()
+            self.stats['writes'] += 1
+        except Exception as e:
+            self._failed(f"search '{query}'", e)
+    
+    async def record_extraction(self, url: str, services: List[Dict[str, Any]]):
+        """Record the services extracted from a site"""
+        try:
+            async with self._get_redis().pipeline(transaction=True) as pipe:
+                pipe.hset(self.keys['extracted'], url, json.dumps(services, default=str))
+                self._expire(pipe)
+                await pipe.execute()
+            self.stats['writes'] += 1
+        except Exception as e:
+            self._failed(f"extraction of {url}", e)
+    
+    async def finish(self):
+        """Mark the session completed and drop the progress it no longer needs"""
+        try:
+            async with self._get_redis().pipeline(transaction=True) as pipe:
+                pipe.hset(self.keys['meta'], mapping={
+                    'status': 'completed',
+                    'updated_at': datetime.utcnow().isoformat()
+                })
+                pipe.delete(self.keys['queries'], self.keys['sites'], self.keys['extracted'])
+                pipe.srem(CHECKPOINT_INDEX, self.research_id)
+                await pipe.execute()
+        except Exception as e:
+            self._failed('finish', e)
+    
+    async def cancel(self):
+        """Mark a running session cancelled, keeping its progress for an explicit resume"""
+        try:
+            client = self._get_redis()
+            status = _decode(await client.hget(self.keys['meta'], 'status'))
+            if status in (None, 'completed'):
+                return
+            
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.hset(self.keys['meta'], mapping={
+                    'status': 'cancelled',
+                    'updated_at': datetime.utcnow().isoformat()
+                })
+                self._expire(pipe)
+                await pipe.execute()
+        except Exception as e:
+            self._failed('cancel', e)
+    
+    async def get_meta(self) -> Optional[Dict[str, Any]]:
+        """Get the session's type, status and timestamps, or None if it has no checkpoint"""
+        try:
+            meta = await self._get_redis().hgetall(self.keys['meta'])
+        except Exception as e:
+            self._failed('meta lookup', e)
+            return None
+        if not meta:
+            return None
+        
+        meta = {_decode(key): _decode(value) for key, value in meta.items()}
+        meta['target_service_types'] = json.loads(meta.get('target_service_types') or '[]')
+        return meta
+    
+    def _expire(self, pipe):
+        for key in self.keys.values():
+            pipe.expire(key, self.ttl)
+    
+    def _failed(self, action: str, error: Exception):
+        self.stats['errors'] += 1
+        logger.warning(f"Research checkpoint {action} failed for {self.research_id}: {error}")
+    
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+
+async def list_unfinished_checkpoints() -> List[Dict[str, Any]]:
+    """Sessions with a checkpoint that never completed, newest first"""
+    client = redis.from_url(settings.REDIS_URL)
+    sessions = []
+    
+    for research_id in await client.smembers(CHECKPOINT_INDEX):
+        research_id = _decode(research_id)
+        checkpoint = ResearchCheckpoint(research_id)
+        checkpoint._redis = client
+        
+        meta = await checkpoint.get_meta()
+        if meta is None:
+            # Expired - forget it
+            await client.srem(CHECKPOINT_INDEX, research_id)
+            continue
+        
+        if meta.get('status') != 'completed':
+            meta['queries_done'] = await client.scard(checkpoint.keys['queries'])
+            meta['sites_extracted'] = await client.hlen(checkpoint.keys['extracted'])
+            sessions.append(meta)
+    
+    return sorted(sessions, key=lambda meta: meta.get('updated_at', ''), reverse=True)
+
+
+def _decode(value: Any) -> Any:
+    return value.decode('utf-8') if isinstance(value, bytes) else value
@@ -0,0 +1,308 @@
+"""
+PDF and Word document text extraction in a worker process pool
+"""
+
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, BinaryIO, Callable, Dict, List, Optional, Tuple, Union
+from xml.etree import ElementTree
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+# pypdf is optional - without it PDFs are rejected like any other unsupported type
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PdfReader = None
+    PYPDF_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+DOCX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# Content types we can pull text out of, and the parser for each
+DOCUMENT_KINDS = {
+    'application/pdf': 'pdf',
+    DOCX_CONTENT_TYPE: 'docx'
+}
+
+WORD_NAMESPACE = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+
+@dataclass
+class DocumentPage:
+    """Text of one page of a document"""
+    page_number: int
+    text: str
+
+
+def document_kind(content_type: str) -> Optional[str]:
+    """Get the parser for a content type, if it is a document we can read"""
+    kind = DOCUMENT_KINDS.get((content_type or '').lower())
+    if kind == 'pdf' and not PYPDF_AVAILABLE:
+        return None
+    return kind
+
+
+def supported_document_types() -> List[str]:
+    """Content types the document pipeline can currently handle"""
+    return [content_type for content_type in DOCUMENT_KINDS if document_kind(content_type)]
+
+
+# The document a worker process last parsed, so the following batches of
+# that document don't parse it again
+_worker_document: Tuple[Any, Any] = (None, None)
+
+
+def _parsed(source: Union[str, BinaryIO], parse: Callable[[], Any]) -> Any:
+    """Parse a document file once per worker; streams are parsed every time"""
+    global _worker_document
+    if not isinstance(source, str):
+        return parse()
+    
+    # Temp file names can be reused once deleted, so the path alone isn't enough
+    stat = os.stat(source)
+    key = (source, stat.st_size, stat.st_mtime_ns)
+    if _worker_document[0] != key:
+        _worker_document = (key, parse())
+    return _worker_document[1]
+
+
+def _pdf_pages(source: Union[str, BinaryIO], start: int, count: int, deadline: float) -> Tuple[List[Tuple[int, str]], int]:
+    reader = _parsed(source, lambda: PdfReader(source))
+    total = len(reader.pages)
+    pages = []
+    
+    for index in range(start, min(start + count, total)):
+        if time.monotonic() > deadline:
+            break
+        try:
+            text = reader.pages[index].extract_text() or ''
+        except Exception:
+            # One broken content stream shouldn't lose the rest of the document
+            text = ''
+        pages.append((index + 1, text))
+    
+    return pages, total
+
+
+def _parse_docx(source: Union[str, BinaryIO], deadline: float) -> List[str]:
+    """Split a .docx into page texts on explicit and last-rendered page breaks"""
+    all_pages: List[List[str]] = [[]]
+    
+    with zipfile.ZipFile(source) as archive, archive.open('word/document.xml') as document:
+        paragraph: List[str] = []
+        for event, element in ElementTree.iterparse(document, events=('start', 'end')):
+            tag = element.tag
+            if event == 'start':
+                if tag == WORD_NAMESPACE + 'lastRenderedPageBreak' or (
+                    tag == WORD_NAMESPACE + 'br' and element.get(WORD_NAMESPACE + 'type') == 'page'
+                ):
+                    if paragraph:
+                        all_pages[-1].append(''.join(paragraph))
+                        paragraph = []
+                    all_pages.append([])
+                continue
+            
+            if tag == WORD_NAMESPACE + 't':
+                paragraph.append(element.text or '')
+            elif tag == WORD_NAMESPACE + 'tab':
+                paragraph.append('\t')
+            elif tag == WORD_NAMESPACE + 'p':
+                all_pages[-1].append(''.join(paragraph))
+                paragraph = []
+                element.clear()
+            
+            if time.monotonic() > deadline:
+                break
+    
+    return ['\n'.join(page) for page in all_pages if any(line.strip() for line in page)]
+
+
+def _docx_pages(source: Union[str, BinaryIO], start: int, count: int, deadline: float) -> Tuple[List[Tuple[int, str]], int]:
+    all_pages = _parsed(source, lambda: _parse_docx(source, deadline))
+    pages = [
+        (index + 1, all_pages[index])
+        for index in range(start, min(start + count, len(all_pages)))
+    ]
+    return pages, len(all_pages)
+
+
+def extract_page_batch(
+    kind: str,
+    source: Union[str, BinaryIO],
+    start: int,
+    count: int,
+    time_limit: float
+) -> Tuple[List[Tuple[int, str]], int]:
+    """Extract text from pages [start, start + count) of a document.
+    
+    Runs in a worker process. Returns (page_number, text) pairs and the
+    document's page count, stopping early once time_limit seconds have passed.
+    """
+    deadline = time.monotonic() + time_limit
+    if kind == 'pdf':
+        return _pdf_pages(source, start, count, deadline)
+    if kind == 'docx':
+        return _docx_pages(source, start, count, deadline)
+    raise ValueError(f"Unsupported document kind: {kind}")
+
+
+class DocumentProcessor:
+    """Streams document text page by page from a shared process pool.
+    
+    Parsing is CPU-bound, so it runs in worker processes and never blocks the
+    event loop. Pages are extracted in batches, so callers can start on the
+    first pages while later ones are still being parsed. Each document has a
+    time cap, and pages that aren't reached in time are left out. A worker
+    can't be interrupted mid-page, so when a batch overruns the cap the pool
+    is replaced and its workers killed rather than left busy on the document.
+    """
+    
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        time_limit: Optional[float] = None,
+        max_pages: Optional[int] = None,
+        page_batch: Optional[int] = None
+    ):
+        self.workers = workers or settings.DOCUMENT_WORKERS
+        self.time_limit = time_limit or settings.DOCUMENT_TIME_LIMIT
+        self.max_pages = max_pages or settings.DOCUMENT_MAX_PAGES
+        self.page_batch = page_batch or settings.DOCUMENT_PAGE_BATCH
+        
+        self._executor: Optional[ProcessPoolExecutor] = None
+        
+        self.stats = {
+            'documents': 0,
+            'pages': 0,
+            'failures': 0,
+            'timeouts': 0,
+            'workers_recycled': 0,
+            'pages_skipped': 0,
+            'total_time': 0.0
+        }
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned workers don't inherit the event loop, sockets or threads of the server
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+    
+    def _recycle(self, executor: ProcessPoolExecutor):
+        """Replace a pool and kill its workers"""
+        if self._executor is executor:
+            self._executor = None
+        
+        # A call that's already running can't be cancelled, so its worker has to go
+        for process in list((executor._processes or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.stats['workers_recycled'] += 1
+    
+    async def iter_pages(self, body: bytes, content_type: str, url: str = '') -> AsyncIterator[DocumentPage]:
+        """Yield a document's pages as their text is extracted"""
+        kind = document_kind(content_type)
+        if kind is None:
+            raise ValueError(f"Unsupported document type {content_type} for {url}")
+        
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        deadline = started + self.time_limit
+        
+        # Workers read the document from disk rather than having it pickled to them per batch
+        handle, path = tempfile.mkstemp(suffix=f'.{kind}')
+        try:
+            with os.fdopen(handle, 'wb') as temp_file:
+                temp_file.write(body)
+            
+            self.stats['documents'] += 1
+            start = 0
+            total = None
+            retried = False
+            
+            while start < self.max_pages and (total is None or start < total):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats['timeouts'] += 1
+                    logger.warning(f"Document time limit reached for {url} after {start} pages")
+                    break
+                
+                count = min(self.page_batch, self.max_pages - start)
+                executor = self._get_executor()
+                try:
+                    pages, total = await asyncio.wait_for(
+                        loop.run_in_executor(executor, extract_page_batch, kind, path, start, count, remaining),
+                        timeout=remaining + 1
+                    )
+                except asyncio.TimeoutError:
+                    self.stats['timeouts'] += 1
+                    self._recycle(executor)
+                    logger.warning(f"Document time limit reached for {url} after {start} pages; recycled workers")
+                    break
+                except BrokenProcessPool as e:
+                    # The pool was recycled under this batch, or this document crashed a worker
+                    if self._executor is executor:
+                        self._recycle(executor)
+                    if not retried:
+                        retried = True
+                        continue
+                    self.stats['failures'] += 1
+                    logger.warning(f"Failed to extract text from {url}: {e}")
+                    break
+                except Exception as e:
+                    self.stats['failures'] += 1
+                    logger.warning(f"Failed to extract text from {url}: {e}")
+                    break
+                
+                retried = False
+                for page_number, text in pages:
+                    self.stats['pages'] += 1
+                    yield DocumentPage(page_number=page_number, text=text)
+                
+                # A short batch means the worker ran out of time mid-batch
+                if len(pages) < min(count, total - start):
+                    self.stats['timeouts'] += 1
+                    logger.warning(f"Document time limit reached for {url} after {start + len(pages)} pages")
+                    break
+                start += count
+            
+            if total is not None and total > self.max_pages:
+                self.stats['pages_skipped'] += total - self.max_pages
+        
+        finally:
+            self.stats['total_time'] += time.monotonic() - started
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    
+    def close(self):
+        """Shut down the worker processes"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get document extraction statistics"""
+        return {
+            **self.stats,
+            'supported_types': supported_document_types(),
+            'avg_document_time': self.stats['total_time'] / max(1, self.stats['documents'])
+        }
+
+
+# Process-wide pool shared by all agents
+document_processor = DocumentProcessor()
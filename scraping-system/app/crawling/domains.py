@@ -0,0 +1,53 @@
+"""
+Registered-domain helpers for grouping URLs by the site they belong to
+"""
+
+from typing import Tuple
+from urllib.parse import urlparse
+
+try:
+    import tldextract
+    # Bundled suffix list only - never fetch it over the network
+    _extract = tldextract.TLDExtract(suffix_list_urls=())
+    TLDEXTRACT_AVAILABLE = True
+except ImportError:
+    _extract = None
+    TLDEXTRACT_AVAILABLE = False
+
+# Multi-label public suffixes seen in Australian service results, used without tldextract
+FALLBACK_SUFFIXES = {
+    'com.au', 'net.au', 'org.au', 'edu.au', 'gov.au', 'asn.au', 'id.au',
+    'act.gov.au', 'nsw.gov.au', 'nt.gov.au', 'qld.gov.au', 'sa.gov.au',
+    'tas.gov.au', 'vic.gov.au', 'wa.gov.au',
+    'co.uk', 'org.uk', 'gov.uk', 'co.nz', 'org.nz', 'govt.nz'
+}
+
+
+def registered_domain(host: str) -> str:
+    """Get the registrable domain of a host, e.g. www.health.qld.gov.au -> health.qld.gov.au"""
+    host = host.lower().split(':', 1)[0].strip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+    
+    if _extract is not None:
+        parts = _extract(host)
+        if parts.domain and parts.suffix:
+            return f"{parts.domain}.{parts.suffix}"
+        return host
+    
+    labels = host.split('.')
+    for size in (3, 2):
+        if len(labels) > size and '.'.join(labels[-size:]) in FALLBACK_SUFFIXES:
+            return '.'.join(labels[-(size + 1):])
+    return '.'.join(labels[-2:])
+
+
+def site_key(url: str, path_depth: int = 1) -> Tuple[str, str]:
+    """Group a URL by registered domain and its first path_depth directories.
+    
+    Only directories count, so /about and /contact on one site share a key
+    while /services/... and /community/... on a portal don't.
+    """
+    parts = urlparse(url)
+    directories = [segment.lower() for segment in parts.path.split('/')[:-1] if segment]
+    return registered_domain(parts.netloc), '/'.join(directories[:path_depth])
@@ -0,0 +1,184 @@
+"""
+Cache of extraction results keyed by page content and extractor version
+"""
+
+import asyncio
+import hashlib
+import json
+import shutil
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.single_flight import canonicalize_url
+
+logger = get_logger(__name__)
+
+
+def content_hash(content: str) -> str:
+    """Hash of a page body, so any change to the page misses the cache"""
+    return hashlib.blake2b(content.encode('utf-8', errors='replace'), digest_size=16).hexdigest()
+
+
+class ExtractionCache:
+    """Skips re-extracting pages that haven't changed since they were last extracted.
+    
+    Entries are keyed by (canonical URL, content hash, extractor version). The
+    extractor version includes a fingerprint of the pattern library, so editing
+    a pattern changes every key and old results are never served; stale
+    entries expire from Redis by TTL, and on disk each version has its own
+    directory, which is removed once a newer version is in use. A small
+    in-memory LRU sits in front of either backend.
+    """
+    
+    def __init__(
+        self,
+        backend: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        ttl: Optional[int] = None,
+        memory_entries: Optional[int] = None
+    ):
+        self.backend = backend or settings.EXTRACTION_CACHE_BACKEND
+        self.cache_dir = Path(cache_dir or settings.EXTRACTION_CACHE_DIR)
+        self.ttl = ttl or settings.EXTRACTION_CACHE_TTL
+        self.memory_entries = memory_entries or settings.EXTRACTION_CACHE_MEMORY_ENTRIES
+        
+        # Results are kept serialized so callers can't mutate cached records
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._redis: Optional[redis.Redis] = None
+        self._pruned_versions = set()
+        
+        self.stats = {
+            'memory_hits': 0,
+            'backend_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'errors': 0,
+            'stale_versions_pruned': 0
+        }
+    
+    @property
+    def enabled(self) -> bool:
+        return settings.EXTRACTION_CACHE_ENABLED
+    
+    def key(self, url: str, content: str, version: str) -> str:
+        url_hash = hashlib.sha256(canonicalize_url(url).encode('utf-8')).hexdigest()[:32]
+        return f"{version}:{url_hash}:{content_hash(content)}"
+    
+    async def get(self, url: str, content: str, version: str) -> Optional[List[Dict[str, Any]]]:
+        """Get cached services for this exact page content and extractor version"""
+        if not self.enabled:
+            return None
+        
+        key = self.key(url, content, version)
+        
+        cached = self._memory.get(key)
+        if cached is not None:
+            self._memory.move_to_end(key)
+            self.stats['memory_hits'] += 1
+            return json.loads(cached)
+        
+        try:
+            if self.backend == 'disk':
+                loop = asyncio.get_running_loop()
+                cached = await loop.run_in_executor(None, self._read_file, key)
+            else:
+                cached = await self._get_redis().get(f"extraction:{key}")
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.debug(f"Extraction cache lookup failed for {url}: {e}")
+            cached = None
+        
+        if cached is None:
+            self.stats['misses'] += 1
+            return None
+        
+        if isinstance(cached, bytes):
+            cached = cached.decode('utf-8')
+        self.stats['backend_hits'] += 1
+        self._remember(key, cached)
+        return json.loads(cached)
+    
+    async def set(self, url: str, content: str, version: str, services: List[Dict[str, Any]]):
+        """Store the services extracted from a page; failures are logged, not raised"""
+        if not self.enabled:
+            return
+        
+        key = self.key(url, content, version)
+        payload = json.dumps(services, default=str)
+        self._remember(key, payload)
+        
+        try:
+            if self.backend == 'disk':
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self._write_file, key, payload)
+            else:
+                await self._get_redis().setex(f"extraction:{key}", self.ttl, payload)
+            self.stats['stores'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.debug(f"Extraction cache store failed for {url}: {e}")
+    
+    def _remember(self, key: str, payload: str):
+        self._memory[key] = payload
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+    
+    def _path(self, key: str) -> Path:
+        version, url_hash, page_hash = key.split(':')
+        return self.cache_dir / version / url_hash[:2] / f"{url_hash}-{page_hash}.json"
+    
+    def _read_file(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        return path.read_text(encoding='utf-8')
+    
+    def _write_file(self, key: str, payload: str):
+        version = key.split(':', 1)[0]
+        if version not in self._pruned_versions:
+            self._prune_other_versions(version)
+        
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Write then rename so concurrent readers never see a partial file
+        temp_path = path.with_suffix('.tmp')
+        temp_path.write_text(payload, encoding='utf-8')
+        temp_path.replace(path)
+    
+    def _prune_other_versions(self, version: str):
+        """Remove results written by older extractor versions"""
+        self._pruned_versions.add(version)
+        if not self.cache_dir.exists():
+            return
+        
+        for version_dir in self.cache_dir.iterdir():
+            if version_dir.is_dir() and version_dir.name != version:
+                shutil.rmtree(version_dir, ignore_errors=True)
+                self.stats['stale_versions_pruned'] += 1
+                logger.info(f"Removed extraction cache for old extractor version {version_dir.name}")
+    
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get extraction cache statistics"""
+        hits = self.stats['memory_hits'] + self.stats['backend_hits']
+        return {
+            **self.stats,
+            'backend': self.backend,
+            'memory_entries': len(self._memory),
+            'hit_rate': hits / max(1, hits + self.stats['misses'])
+        }
+
+
+# Process-wide cache shared by all agents
+extraction_cache = ExtractionCache()
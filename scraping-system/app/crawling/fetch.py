@@ -0,0 +1,204 @@
+"""
+Streaming, size-capped page downloads with early content-type rejection
+"""
+
+import codecs
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.exceptions import ContentRejectedException
+from app.crawling.documents import document_kind
+
+# Leading bytes of common binary formats that sometimes arrive without a useful Content-Type
+BINARY_SIGNATURES = {
+    b'%PDF-': 'application/pdf',
+    b'PK\x03\x04': 'application/zip',
+    b'\xd0\xcf\x11\xe0': 'application/msword',
+    b'\x89PNG': 'image/png',
+    b'GIF8': 'image/gif',
+    b'\xff\xd8\xff': 'image/jpeg',
+    b'RIFF': 'application/octet-stream',
+    b'\x1f\x8b': 'application/gzip'
+}
+
+HTML_MARKERS = (b'<!doctype html', b'<html', b'<head', b'<body', b'<meta', b'<title', b'<div')
+
+# Content types that tell us nothing and must be sniffed from the body
+GENERIC_CONTENT_TYPES = {'', 'application/octet-stream', 'binary/octet-stream'}
+
+META_CHARSET_PATTERN = re.compile(
+    rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_\-:.]+)',
+    re.IGNORECASE
+)
+
+
+@dataclass
+class FetchedPage:
+    """A downloaded page body with the metadata needed to decode it"""
+    url: str
+    status: int
+    content_type: str
+    charset: Optional[str]
+    body: bytes
+    truncated: bool = False
+    
+    @property
+    def text(self) -> str:
+        """Decode the body using the detected charset"""
+        return decode_body(self.body, self.charset)
+
+
+def sniff_content_type(first_chunk: bytes) -> str:
+    """Guess a content type from the first bytes of a body"""
+    for signature, content_type in BINARY_SIGNATURES.items():
+        if first_chunk.startswith(signature):
+            return content_type
+    
+    head = first_chunk[:1024].lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if any(marker in head for marker in HTML_MARKERS):
+        return 'text/html'
+    
+    # NUL bytes don't appear in text documents
+    if b'\x00' in first_chunk[:1024]:
+        return 'application/octet-stream'
+    
+    return 'text/plain'
+
+
+def sniff_charset(first_chunk: bytes) -> Optional[str]:
+    """Find a charset from a byte-order mark or <meta> declaration"""
+    if first_chunk.startswith(codecs.BOM_UTF8):
+        return 'utf-8'
+    if first_chunk.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    
+    match = META_CHARSET_PATTERN.search(first_chunk[:4096])
+    if match:
+        return match.group(1).decode('ascii', errors='ignore').lower()
+    
+    return None
+
+
+def decode_body(body: bytes, charset: Optional[str]) -> str:
+    """Decode a body, falling back to UTF-8 for unknown charsets"""
+    try:
+        return body.decode(charset or 'utf-8', errors='replace')
+    except LookupError:
+        return body.decode('utf-8', errors='replace')
+
+
+def _check_content_type(url: str, content_type: str, allowed_types: Iterable[str]):
+    """Reject bodies whose content type we can't extract services from"""
+    if content_type not in allowed_types:
+        raise ContentRejectedException(
+            f"Unsupported content type {content_type} for {url}",
+            url=url,
+            reason="content_type"
+        )
+
+
+async def fetch_page(
+    session: aiohttp.ClientSession,
+    url: str,
+    max_bytes: Optional[int] = None,
+    allowed_types: Optional[Iterable[str]] = None,
+    truncate: Optional[bool] = None,
+    **request_kwargs
+) -> FetchedPage:
+    """Stream a page into memory, stopping early for oversized or non-HTML bodies.
+    
+    Non-200 responses are returned with an empty body so callers can decide how
+    to report them. Content that can't be extracted raises ContentRejectedException
+    before the rest of the body is downloaded.
+    """
+    max_bytes = max_bytes or settings.MAX_PAGE_BYTES
+    allowed_types = set(allowed_types or settings.ALLOWED_CONTENT_TYPES)
+    truncate = settings.FETCH_TRUNCATE_OVERSIZED if truncate is None else truncate
+    
+    async with session.get(url, **request_kwargs) as response:
+        final_url = str(response.url)
+        
+        if response.status != 200:
+            return FetchedPage(
+                url=final_url,
+                status=response.status,
+                content_type=response.content_type or '',
+                charset=response.charset,
+                body=b''
+            )
+        
+        declared_type = (response.content_type or '').lower()
+        
+        # Reject on headers alone when the server tells us what it is
+        if declared_type not in GENERIC_CONTENT_TYPES:
+            _check_content_type(url, declared_type, allowed_types)
+        
+        # Documents can't be parsed from a truncated prefix
+        if document_kind(declared_type):
+            max_bytes = max(max_bytes, settings.DOCUMENT_MAX_BYTES)
+            truncate = False
+        
+        content_length = response.content_length
+        if content_length and content_length > max_bytes and not truncate:
+            raise ContentRejectedException(
+                f"Content length {content_length} exceeds {max_bytes} bytes for {url}",
+                url=url,
+                reason="too_large"
+            )
+        
+        body, truncated = await _read_capped(response, url, declared_type, allowed_types, max_bytes, truncate)
+        
+        content_type = declared_type
+        if content_type in GENERIC_CONTENT_TYPES:
+            content_type = sniff_content_type(body)
+        
+        return FetchedPage(
+            url=final_url,
+            status=response.status,
+            content_type=content_type,
+            charset=response.charset or sniff_charset(body),
+            body=body,
+            truncated=truncated
+        )
+
+
+async def _read_capped(
+    response: aiohttp.ClientResponse,
+    url: str,
+    declared_type: str,
+    allowed_types: set,
+    max_bytes: int,
+    truncate: bool
+) -> Tuple[bytes, bool]:
+    """Read the body in chunks, sniffing the first chunk and enforcing the byte cap"""
+    buffer = bytearray()
+    first_chunk = True
+    
+    async for chunk in response.content.iter_chunked(settings.FETCH_CHUNK_SIZE):
+        if first_chunk:
+            first_chunk = False
+            if declared_type in GENERIC_CONTENT_TYPES:
+                sniffed_type = sniff_content_type(chunk)
+                _check_content_type(url, sniffed_type, allowed_types)
+                if document_kind(sniffed_type):
+                    max_bytes = max(max_bytes, settings.DOCUMENT_MAX_BYTES)
+                    truncate = False
+        
+        remaining = max_bytes - len(buffer)
+        if len(chunk) > remaining:
+            if not truncate:
+                raise ContentRejectedException(
+                    f"Body exceeds {max_bytes} bytes for {url}",
+                    url=url,
+                    reason="too_large"
+                )
+            buffer.extend(chunk[:remaining])
+            return bytes(buffer), True
+        
+        buffer.extend(chunk)
+    
+    return bytes(buffer), False
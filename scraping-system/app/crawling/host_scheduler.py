@@ -0,0 +1,75 @@
+"""
+Per-host request scheduling so crawl politeness doesn't depend on blanket sleeps
+"""
+
+import asyncio
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+
+class HostScheduler:
+    """Spaces out requests to each host by its minimum delay.
+    
+    Requests to different hosts never wait on each other. The delay for a host
+    is the larger of the caller's delay and any crawl-delay from its robots.txt.
+    """
+    
+    def __init__(self, default_delay: Optional[float] = None):
+        self.default_delay = settings.REQUEST_DELAY if default_delay is None else default_delay
+        
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._next_allowed: Dict[str, float] = {}
+        self._crawl_delays: Dict[str, float] = {}
+        
+        self.stats = {
+            'requests_scheduled': 0,
+            'total_wait_time': 0.0
+        }
+    
+    @staticmethod
+    def host_for(url: str) -> str:
+        """Get the scheduling key for a URL"""
+        return urlparse(url).netloc.lower()
+    
+    def set_crawl_delay(self, host: str, delay: Optional[float]):
+        """Record a host's robots.txt crawl-delay"""
+        if delay is None:
+            self._crawl_delays.pop(host, None)
+        else:
+            self._crawl_delays[host] = max(0.0, float(delay))
+    
+    def get_delay(self, host: str, min_delay: Optional[float] = None) -> float:
+        """Get the effective delay between requests to a host"""
+        base = self.default_delay if min_delay is None else min_delay
+        return max(base, self._crawl_delays.get(host, 0.0))
+    
+    async def wait(self, url: str, min_delay: Optional[float] = None):
+        """Wait until a request to the URL's host is allowed"""
+        host = self.host_for(url)
+        lock = self._locks.setdefault(host, asyncio.Lock())
+        loop = asyncio.get_running_loop()
+        
+        async with lock:
+            now = loop.time()
+            wait_time = self._next_allowed.get(host, 0.0) - now
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+                self.stats['total_wait_time'] += wait_time
+            
+            self._next_allowed[host] = loop.time() + self.get_delay(host, min_delay)
+            self.stats['requests_scheduled'] += 1
+    
+    def get_statistics(self) -> Dict[str, float]:
+        """Get scheduling statistics"""
+        return {
+            **self.stats,
+            'hosts_tracked': len(self._next_allowed),
+            'hosts_with_crawl_delay': len(self._crawl_delays),
+            'avg_wait_time': self.stats['total_wait_time'] / max(1, self.stats['requests_scheduled'])
+        }
+
+
+# Process-wide scheduler shared by all agents so politeness holds across them
+host_scheduler = HostScheduler()
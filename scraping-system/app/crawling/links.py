@@ -0,0 +1,45 @@
+"""
+Follow-up link selection for crawling
+"""
+
+from typing import Collection, List, Optional, Union
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+# Link text or URL fragments that suggest a page describes services
+SERVICE_LINK_INDICATORS = [
+    'service', 'program', 'support', 'help', 'about',
+    'contact', 'community', 'resource', 'assistance'
+]
+
+
+def extract_relevant_links(
+    page: Union[str, BeautifulSoup],
+    base_url: str,
+    exclude: Optional[Collection[str]] = None,
+    limit: int = 10
+) -> List[str]:
+    """Get links whose text or URL suggests service-related content.
+    
+    Pass the soup before boilerplate removal - menus are where most of these links live.
+    """
+    soup = page if isinstance(page, BeautifulSoup) else BeautifulSoup(page, 'html.parser')
+    exclude = exclude or ()
+    relevant_links = []
+    
+    for link in soup.find_all('a', href=True):
+        full_url = urljoin(base_url, link['href'])
+        
+        # Skip if already processed
+        if full_url in exclude:
+            continue
+        
+        link_text = link.get_text().lower().strip()
+        if any(indicator in link_text for indicator in SERVICE_LINK_INDICATORS):
+            relevant_links.append(full_url)
+        elif any(indicator in full_url.lower() for indicator in SERVICE_LINK_INDICATORS):
+            relevant_links.append(full_url)
+    
+    # Remove duplicates and limit
+    return list(dict.fromkeys(relevant_links))[:limit]
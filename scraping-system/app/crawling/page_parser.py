@@ -0,0 +1,45 @@
+"""
+CPU-bound page parsing for worker processes
+"""
+
+from typing import Any, Dict, Optional
+
+from bs4 import BeautifulSoup
+
+from app.crawling.boilerplate import extract_main_content
+from app.crawling.extraction import ServiceExtractor
+from app.crawling.links import extract_relevant_links
+from app.crawling.simhash import text_fingerprint
+
+# Per-process extractor, created once by init_parser_worker
+_worker_extractor: Optional[ServiceExtractor] = None
+
+
+def init_parser_worker():
+    """Build the extractor once per worker process"""
+    global _worker_extractor
+    _worker_extractor = ServiceExtractor()
+
+
+def parse_page(url: str, html: str, follow_links: bool = True) -> Dict[str, Any]:
+    """Parse a page once and return everything the pipeline needs from it.
+    
+    Only plain data is returned, since soups are expensive to send between processes.
+    """
+    extractor = _worker_extractor or ServiceExtractor()
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Links first - boilerplate removal drops the menus most of them live in
+    links = extract_relevant_links(soup, url) if follow_links else []
+    
+    main_content = extract_main_content(soup)
+    services = extractor.extract(html, url, main_content)
+    
+    return {
+        'url': url,
+        'services': services,
+        'links': links,
+        'fingerprint': text_fingerprint(main_content.text),
+        'boilerplate_removed_pct': main_content.removed_pct,
+        'extractor_version': extractor.version
+    }
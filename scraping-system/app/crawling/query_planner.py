@@ -0,0 +1,285 @@
+"""
+Search query planning - spends the search budget on queries that keep finding new services
+"""
+
+import math
+from dataclasses import dataclass, fields
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.crawling.serp_cache import normalize_query
+
+if TYPE_CHECKING:
+    from app.agents.research import SearchQuery
+
+logger = get_logger(__name__)
+
+PLANNER_PREFIX = "research:query_planner"
+
+# Separates the query from the counter in yield hash fields; normalized queries never contain it
+FIELD_SEPARATOR = '|'
+
+
+def query_key(query: 'SearchQuery') -> str:
+    """Key a query's yield is recorded under"""
+    return normalize_query(' '.join(query.keywords))
+
+
+@dataclass
+class QueryYield:
+    """What a query has turned up over the sessions it ran in"""
+    runs: int = 0
+    sites: int = 0
+    services: int = 0
+    # Runs in a row that found nothing new, and the session it may run in again
+    dry_runs: int = 0
+    skip_until: int = 0
+    
+    @property
+    def mean_yield(self) -> float:
+        return (self.sites + self.services) / self.runs if self.runs else 0.0
+
+
+class QueryPlanner:
+    """Chooses which search queries a research session runs, and in what order.
+    
+    After each session every query's yield is recorded: the sites, and the
+    services on them, that no earlier session had found. Queries are ranked by
+    the upper confidence bound (UCB1) of their yield per run, so the budget
+    goes to productive queries while rarely run ones still get tried. A query
+    that keeps returning only known results is skipped for a number of
+    sessions that doubles each time it comes back dry.
+    
+    Yields and known sites are kept in Redis so every process and restart
+    learns from the same history; without Redis the planner works from memory.
+    Counts are merged with HINCRBY, and a site counts as new to every session
+    that was running when it was first found, so concurrent sessions running
+    the same queries don't see each other's finds as dry runs.
+    """
+    
+    def __init__(
+        self,
+        persist: bool = True,
+        exploration: Optional[float] = None,
+        prune_after: Optional[int] = None,
+        max_backoff: Optional[int] = None
+    ):
+        self.persist = persist
+        self.exploration = settings.RESEARCH_QUERY_EXPLORATION if exploration is None else exploration
+        self.prune_after = prune_after or settings.RESEARCH_QUERY_PRUNE_AFTER
+        self.max_backoff = max_backoff or settings.RESEARCH_QUERY_MAX_BACKOFF
+        
+        self.yields: Dict[str, QueryYield] = {}
+        # When each known site was first found
+        self.known_sites: Dict[str, datetime] = {}
+        self.sessions = 0
+        self._redis: Optional[redis.Redis] = None
+        
+        self.stats = {
+            'sessions_planned': 0,
+            'queries_planned': 0,
+            'queries_skipped': 0,
+            'searches_recorded': 0,
+            'new_sites': 0,
+            'new_services': 0,
+            'errors': 0
+        }
+    
+    @property
+    def keys(self) -> Dict[str, str]:
+        return {
+            'yields': f"{PLANNER_PREFIX}:yield_counts",
+            'sessions': f"{PLANNER_PREFIX}:sessions",
+            'known_sites': f"{PLANNER_PREFIX}:site_first_found"
+        }
+    
+    async def plan(self, queries: Sequence['SearchQuery'], budget: int) -> List['SearchQuery']:
+        """Pick up to `budget` queries for a session, most promising first"""
+        await self._load()
+        session = await self._next_session()
+        total_runs = sum(stats.runs for stats in self.yields.values())
+        average_yield = sum(stats.sites + stats.services for stats in self.yields.values()) / max(1, total_runs)
+        
+        eligible = []
+        skipped = 0
+        for query in queries:
+            stats = self.yields.get(query_key(query))
+            if stats and stats.skip_until > session:
+                skipped += 1
+            else:
+                eligible.append(query)
+        
+        # Ties keep their static priority
+        ranked = sorted(
+            eligible,
+            key=lambda query: (-self.score(query, total_runs, average_yield), query.priority)
+        )
+        planned = ranked[:budget]
+        
+        self.stats['sessions_planned'] += 1
+        self.stats['queries_planned'] += len(planned)
+        self.stats['queries_skipped'] += skipped
+        logger.info(
+            f"Planned {len(planned)} of {len(queries)} queries for session {session} "
+            f"({skipped} skipped as low-yield)"
+        )
+        return planned
+    
+    def score(self, query: 'SearchQuery', total_runs: int, average_yield: float = 0.0) -> float:
+        """Upper confidence bound of the query's yield per run"""
+        if total_runs == 0:
+            return math.inf
+        
+        stats = self.yields.get(query_key(query))
+        if stats is None or stats.runs == 0:
+            # Untried queries count as one run at the average yield, so proven
+            # queries can still outrank them
+            mean_yield, runs = average_yield, 1
+        else:
+            mean_yield, runs = stats.mean_yield, stats.runs
+        
+        return mean_yield + self.exploration * math.sqrt(2 * math.log(total_runs) / runs)
+    
+    async def is_new_site(self, site_key: str, since: datetime) -> bool:
+        """Mark a site known; returns whether no session had found it before `since`.
+        
+        `since` is when the calling session started. Sessions running at once
+        search the same top queries, so a site another of them found while
+        this one was running is still new to it.
+        """
+        first_found = self.known_sites.setdefault(site_key, datetime.utcnow())
+        
+        if self.persist:
+            try:
+                client = self._get_redis()
+                if not await client.hsetnx(self.keys['known_sites'], site_key, first_found.isoformat()):
+                    stored = await client.hget(self.keys['known_sites'], site_key)
+                    stored = stored.decode('utf-8') if isinstance(stored, bytes) else stored
+                    first_found = min(first_found, datetime.fromisoformat(stored))
+                    self.known_sites[site_key] = first_found
+            except Exception as e:
+                self._failed('known site update', e)
+        return first_found >= since
+    
+    async def record_session(self, session_yields: Dict[str, Tuple[int, int]]):
+        """Record the (new sites, new services) each query in a session found"""
+        session = self.sessions
+        
+        for key, (sites, services) in session_yields.items():
+            stats = self.yields.setdefault(key, QueryYield())
+            stats.runs += 1
+            stats.sites += sites
+            stats.services += services
+            
+            if sites or services:
+                stats.dry_runs = 0
+                stats.skip_until = 0
+            else:
+                stats.dry_runs += 1
+                self._schedule_skip(stats, session)
+            
+            self.stats['new_sites'] += sites
+            self.stats['new_services'] += services
+        
+        self.stats['searches_recorded'] += len(session_yields)
+        
+        if self.persist and session_yields:
+            try:
+                await self._store_session(session_yields, session)
+            except Exception as e:
+                self._failed('yield update', e)
+    
+    def _schedule_skip(self, stats: QueryYield, session: int):
+        """Skip a query that has come back dry too often, for longer each time"""
+        if stats.dry_runs >= self.prune_after:
+            backoff = min(2 ** (stats.dry_runs - self.prune_after), self.max_backoff)
+            stats.skip_until = session + backoff + 1
+    
+    async def _store_session(self, session_yields: Dict[str, Tuple[int, int]], session: int):
+        """Add a session's counts to the stored ones.
+        
+        Counts are incremented rather than overwritten, so sessions recording
+        at once all add theirs; the stored totals then replace this process's.
+        """
+        yields_key = self.keys['yields']
+        
+        def counter(key: str, name: str) -> str:
+            return f"{key}{FIELD_SEPARATOR}{name}"
+        
+        pipe = self._get_redis().pipeline(transaction=False)
+        for key, (sites, services) in session_yields.items():
+            pipe.hincrby(yields_key, counter(key, 'runs'), 1)
+            pipe.hincrby(yields_key, counter(key, 'sites'), sites)
+            pipe.hincrby(yields_key, counter(key, 'services'), services)
+            if sites or services:
+                pipe.hset(yields_key, mapping={counter(key, 'dry_runs'): 0, counter(key, 'skip_until'): 0})
+            else:
+                pipe.hincrby(yields_key, counter(key, 'dry_runs'), 1)
+        results = iter(await pipe.execute())
+        
+        skips = {}
+        for key, (sites, services) in session_yields.items():
+            stats = self.yields[key]
+            stats.runs, stats.sites, stats.services = (int(next(results)) for _ in range(3))
+            if sites or services:
+                next(results)
+            else:
+                stats.dry_runs = int(next(results))
+                if stats.dry_runs >= self.prune_after:
+                    self._schedule_skip(stats, session)
+                    skips[counter(key, 'skip_until')] = stats.skip_until
+        
+        if skips:
+            await self._get_redis().hset(yields_key, mapping=skips)
+    
+    async def _load(self):
+        if not self.persist:
+            return
+        try:
+            stored = await self._get_redis().hgetall(self.keys['yields'])
+        except Exception as e:
+            self._failed('load', e)
+            return
+        
+        counters = {counter.name for counter in fields(QueryYield)}
+        for stored_field, value in stored.items():
+            stored_field = stored_field.decode('utf-8') if isinstance(stored_field, bytes) else stored_field
+            key, _, name = stored_field.rpartition(FIELD_SEPARATOR)
+            if key and name in counters:
+                setattr(self.yields.setdefault(key, QueryYield()), name, int(value))
+    
+    async def _next_session(self) -> int:
+        self.sessions += 1
+        if self.persist:
+            try:
+                self.sessions = int(await self._get_redis().incr(self.keys['sessions']))
+            except Exception as e:
+                self._failed('session count', e)
+        return self.sessions
+    
+    def _failed(self, action: str, error: Exception):
+        self.stats['errors'] += 1
+        logger.debug(f"Query planner {action} failed: {error}")
+    
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get query planner statistics"""
+        return {
+            **self.stats,
+            'queries_tracked': len(self.yields),
+            'queries_pruned': sum(1 for stats in self.yields.values() if stats.skip_until > self.sessions),
+            'known_sites': len(self.known_sites),
+            'searches_per_new_service': self.stats['searches_recorded'] / max(1, self.stats['new_services'])
+        }
+
+
+# Process-wide planner shared by all research agents
+query_planner = QueryPlanner()
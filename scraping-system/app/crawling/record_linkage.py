@@ -0,0 +1,281 @@
+"""
+Record linkage - blocking, pairwise scoring and clustering of service records
+"""
+
+import math
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from itertools import combinations
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.crawling.service_keys import candidate_score, match_keys, normalize_name, trigram_similarity
+
+# Name tokens too common in this catalog to block on
+COMMON_NAME_TOKENS = frozenset({
+    'mount', 'mt', 'isa', 'qld', 'queensland', 'north', 'west', 'and', 'of', 'for',
+    'service', 'services', 'centre', 'center', 'community', 'health', 'support'
+})
+
+# Mail providers whose domain says nothing about the organisation
+FREE_MAIL_DOMAINS = frozenset({
+    'gmail.com', 'hotmail.com', 'outlook.com', 'live.com', 'yahoo.com', 'yahoo.com.au',
+    'bigpond.com', 'bigpond.net.au', 'icloud.com', 'optusnet.com.au'
+})
+
+# Evidence beyond the match keys; scores are still capped at 1.0
+ADDRESS_WEIGHT = 0.15  # times the trigram similarity of the addresses
+NEARBY_WEIGHT = 0.1  # coordinates within NEARBY_METRES
+NEARBY_METRES = 100
+
+GEOHASH_PRECISION = 7  # cells of about 150m
+_GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Fields a canonical record fills from its duplicates when it lacks them
+MERGE_FIELDS = ('description', 'phone', 'email', 'website', 'address', 'operating_hours')
+
+
+def geohash(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Encode coordinates as a geohash of `precision` characters"""
+    bounds = [[-90.0, 90.0], [-180.0, 180.0]]
+    value, bits, even = 0, 0, True
+    code = []
+    
+    while len(code) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        low_high = bounds[1] if even else bounds[0]
+        coordinate = longitude if even else latitude
+        middle = (low_high[0] + low_high[1]) / 2
+        if coordinate >= middle:
+            value = value << 1 | 1
+            low_high[0] = middle
+        else:
+            value <<= 1
+            low_high[1] = middle
+        even = not even
+        
+        bits += 1
+        if bits == 5:
+            code.append(_GEOHASH_ALPHABET[value])
+            value, bits = 0, 0
+    
+    return ''.join(code)
+
+
+def distance_metres(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    """Great-circle distance between two (latitude, longitude) points"""
+    lat1, lon1, lat2, lon2 = map(math.radians, (*a, *b))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371000 * math.asin(math.sqrt(h))
+
+
+@dataclass
+class LinkageRecord:
+    """The parts of a service record linkage compares, normalized once"""
+    id: str
+    keys: Dict[str, Optional[str]]
+    name_tokens: Tuple[str, ...] = ()
+    address_key: Optional[str] = None
+    location: Optional[Tuple[float, float]] = None
+    
+    @classmethod
+    def from_service(cls, service: Any) -> 'LinkageRecord':
+        """Build from a service model, record or dict"""
+        def get(name: str) -> Any:
+            return service.get(name) if isinstance(service, dict) else getattr(service, name, None)
+        
+        keys = match_keys(service)
+        latitude, longitude = get('latitude'), get('longitude')
+        return cls(
+            id=str(get('id')),
+            keys=keys,
+            name_tokens=tuple(sorted(set((keys['name_key'] or '').split()) - COMMON_NAME_TOKENS)),
+            address_key=normalize_name(get('address')),
+            location=(float(latitude), float(longitude)) if latitude is not None and longitude is not None else None
+        )
+    
+    def blocking_keys(self) -> Set[str]:
+        """Keys of the blocks this record is compared within"""
+        keys = set()
+        if self.keys['phone_key']:
+            keys.add(f"phone:{self.keys['phone_key']}")
+        
+        email = self.keys['email_key']
+        if email and '@' in email:
+            domain = email.rsplit('@', 1)[1]
+            # A shared free mail domain doesn't link organisations; the address does
+            keys.add(f"email:{email}" if domain in FREE_MAIL_DOMAINS else f"email_domain:{domain}")
+        
+        keys.update(f"name:{token}" for token in self.name_tokens if len(token) > 2)
+        
+        if self.location:
+            keys.add(f"geo:{geohash(*self.location)}")
+        return keys
+
+
+def pair_score(a: LinkageRecord, b: LinkageRecord, min_name_similarity: float = 0.0) -> float:
+    """How likely two records are the same service, from 0 to 1.
+    
+    Records whose names are less similar than min_name_similarity score 0:
+    services of one organisation often share a phone, email and address, so
+    those alone never link two records.
+    """
+    name_similarity = trigram_similarity(a.keys['name_key'], b.keys['name_key'])
+    if name_similarity < min_name_similarity or not name_similarity:
+        return 0.0
+    
+    score = candidate_score(a.keys, b.keys, name_similarity)
+    if a.address_key and b.address_key:
+        score += trigram_similarity(a.address_key, b.address_key) * ADDRESS_WEIGHT
+    if a.location and b.location and distance_metres(a.location, b.location) <= NEARBY_METRES:
+        score += NEARBY_WEIGHT
+    return min(1.0, score)
+
+
+def candidate_pairs(
+    records: Sequence[LinkageRecord],
+    changed: Optional[Set[int]] = None,
+    max_block_size: int = 200
+) -> Tuple[Set[Tuple[int, int]], Dict[str, int]]:
+    """Pairs of record positions that share a block.
+    
+    With `changed`, only pairs involving one of those positions are returned,
+    so a run after new records arrive doesn't rescore the whole catalog.
+    Blocks bigger than max_block_size say too little to be worth every pair
+    and are skipped. Also returns block statistics.
+    """
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for position, record in enumerate(records):
+        for key in record.blocking_keys():
+            blocks[key].append(position)
+    
+    pairs: Set[Tuple[int, int]] = set()
+    oversized = 0
+    for members in blocks.values():
+        if len(members) < 2:
+            continue
+        if len(members) > max_block_size:
+            oversized += 1
+            continue
+        
+        if changed is None:
+            pairs.update(combinations(members, 2))
+        else:
+            fresh = [member for member in members if member in changed]
+            pairs.update(
+                (min(new, other), max(new, other))
+                for new in fresh for other in members if other != new
+            )
+    
+    return pairs, {'blocks': len(blocks), 'oversized_blocks': oversized}
+
+
+# Records of the current run, sent once to each scoring worker process
+_worker_records: List[LinkageRecord] = []
+
+
+def init_linkage_worker(records: List[LinkageRecord]):
+    """Keep the run's records in the worker process"""
+    global _worker_records
+    _worker_records = records
+
+
+def score_pairs(
+    pairs: Sequence[Tuple[int, int]],
+    threshold: float,
+    min_name_similarity: float,
+    records: Optional[Sequence[LinkageRecord]] = None
+) -> List[Tuple[int, int, float]]:
+    """Score pairs of record positions, keeping those at or above the threshold"""
+    records = _worker_records if records is None else records
+    matches = []
+    for a, b in pairs:
+        score = pair_score(records[a], records[b], min_name_similarity)
+        if score >= threshold:
+            matches.append((a, b, score))
+    return matches
+
+
+class UnionFind:
+    """Disjoint sets of record positions, with path halving and union by size"""
+    
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.size = [1] * size
+    
+    def find(self, item: int) -> int:
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+    
+    def union(self, a: int, b: int) -> bool:
+        """Join the sets of a and b; returns whether they were separate"""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        if self.size[a] < self.size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        self.size[a] += self.size[b]
+        return True
+    
+    def groups(self) -> List[List[int]]:
+        """Every set with more than one member"""
+        members: Dict[int, List[int]] = defaultdict(list)
+        for item in range(len(self.parent)):
+            members[self.find(item)].append(item)
+        return [group for group in members.values() if len(group) > 1]
+
+
+@dataclass
+class EntityCluster:
+    """Service records resolved to one organisation, and the record kept for it"""
+    canonical_id: Any
+    member_ids: List[Any]
+    updates: Dict[str, Any] = field(default_factory=dict)
+
+
+def canonical_record(services: Iterable[Any]) -> EntityCluster:
+    """Pick the record a cluster keeps and the gaps it fills from the others.
+    
+    The most confident record is kept (the oldest on a tie). Fields it lacks
+    are taken from the other records, most confident first, and coordinates
+    only ever as a pair.
+    """
+    def get(service: Any, name: str) -> Any:
+        return service.get(name) if isinstance(service, dict) else getattr(service, name, None)
+    
+    ranked = sorted(
+        services,
+        key=lambda service: (-(get(service, 'confidence_score') or 0.0), get(service, 'created_at') or datetime.min)
+    )
+    canonical = ranked[0]
+    
+    updates = {}
+    for name in MERGE_FIELDS:
+        if get(canonical, name) not in (None, '', {}, []):
+            continue
+        for other in ranked[1:]:
+            value = get(other, name)
+            if value not in (None, '', {}, []):
+                updates[name] = value
+                break
+    
+    if get(canonical, 'latitude') is None or get(canonical, 'longitude') is None:
+        for other in ranked[1:]:
+            if get(other, 'latitude') is not None and get(other, 'longitude') is not None:
+                updates['latitude'], updates['longitude'] = get(other, 'latitude'), get(other, 'longitude')
+                break
+    
+    # Filled contact details change the canonical record's match keys
+    if updates:
+        merged = {name: get(canonical, name) for name in ('name', 'phone', 'email', 'website')}
+        merged.update((name, value) for name, value in updates.items() if name in merged)
+        updates.update(match_keys(merged))
+    
+    return EntityCluster(
+        canonical_id=get(canonical, 'id'),
+        member_ids=[get(service, 'id') for service in ranked],
+        updates=updates
+    )
@@ -0,0 +1,187 @@
+"""
+Relevance scoring of search results against the Mount Isa scoring tables
+"""
+
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Sequence, Set, Tuple
+from urllib.parse import urlparse
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+if TYPE_CHECKING:
+    from app.agents.research import SearchQuery
+
+# (url, title, snippet) of one search result
+SearchResult = Tuple[str, str, str]
+
+MOUNT_ISA_TERMS = frozenset({'mount isa', 'mt isa', 'mountisa', '4825'})
+QLD_TERMS = frozenset({'queensland', 'qld', 'north west queensland', 'gulf country'})
+SERVICE_INDICATORS = frozenset({
+    'service', 'centre', 'center', 'support', 'help', 'community',
+    'health', 'medical', 'clinic', 'hospital', 'care', 'assistance'
+})
+# Penalized unless the query is for employment services
+IRRELEVANT_TERMS = frozenset({
+    'shopping', 'buy', 'sale', 'property', 'real estate',
+    'mining', 'jobs', 'employment'
+})
+
+# Domains of the main service providers for the Mount Isa area
+RELEVANT_DOMAINS = (
+    "mountisa.qld.gov.au",
+    "health.qld.gov.au",
+    "communities.qld.gov.au",
+    "ndis.gov.au",
+    "centrelink.gov.au",
+    "redcross.org.au",
+    "salvationarmy.org.au",
+    "beyondblue.org.au",
+    "lifeline.org.au",
+    "headspace.org.au"
+)
+
+# Weight added per matching term, table by table in this order
+MOUNT_ISA_WEIGHT = 0.3
+QLD_WEIGHT = 0.1
+KEYWORD_WEIGHT = 0.2
+DOMAIN_WEIGHT = 0.4
+INDICATOR_WEIGHT = 0.1
+IRRELEVANT_WEIGHT = -0.2
+
+STATIC_TERMS = MOUNT_ISA_TERMS | QLD_TERMS | SERVICE_INDICATORS | IRRELEVANT_TERMS
+
+
+class TermMatcher:
+    """Finds which of a fixed set of terms occur anywhere in a text.
+    
+    With pyahocorasick the terms are compiled into one automaton and the text
+    is scanned once; without it each term is a substring check.
+    """
+    
+    def __init__(self, terms: Iterable[str]):
+        self.terms = tuple(set(terms))
+        
+        self._automaton = None
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+            for term in self.terms:
+                self._automaton.add_word(term, term)
+            self._automaton.make_automaton()
+    
+    @property
+    def backend(self) -> str:
+        return 'aho-corasick' if self._automaton is not None else 'substring'
+    
+    def find(self, text: str) -> Set[str]:
+        """The terms that occur in the text"""
+        if self._automaton is not None:
+            return {term for _, term in self._automaton.iter(text)}
+        return {term for term in self.terms if term in text}
+
+
+class RelevanceScorer:
+    """Scores search results for relevance to Mount Isa services.
+    
+    The fixed scoring tables are compiled once into a single matcher, so a
+    result's text is scanned once rather than once per term. What a result
+    matched is kept, so the same result turning up for other queries in a
+    session only needs its query keywords checked. Matched terms are weighted
+    and added table by table in the original order, so scores are exactly
+    those of checking each term in turn.
+    """
+    
+    MAX_PROFILES = 50000
+    
+    def __init__(self, relevant_domains: Sequence[str] = RELEVANT_DOMAINS):
+        self.relevant_domains = tuple(relevant_domains)
+        self.matcher = TermMatcher(STATIC_TERMS)
+        
+        # Lowercased text and table match counts by (url, title, snippet)
+        self._profiles: Dict[SearchResult, Tuple[str, Tuple[int, ...]]] = {}
+        
+        self.stats = {
+            'results_scored': 0,
+            'results_matched': 0
+        }
+    
+    def score(self, url: str, title: str, snippet: str, query: 'SearchQuery') -> float:
+        """Score a single search result"""
+        return self.score_batch([(url, title, snippet)], query)[0]
+    
+    def score_batch(self, results: Sequence[SearchResult], query: 'SearchQuery') -> List[float]:
+        """Score all results of one query"""
+        keywords = [keyword.lower() for keyword in query.keywords]
+        penalize = query.service_type != 'employment'
+        
+        self.stats['results_scored'] += len(results)
+        return [self._score(self._profile(result), keywords, penalize) for result in results]
+    
+    def score_session(
+        self,
+        batches: Sequence[Tuple['SearchQuery', Sequence[SearchResult]]]
+    ) -> List[List[float]]:
+        """Score the results of many queries, one list of scores per query"""
+        return [self.score_batch(results, query) for query, results in batches]
+    
+    def _profile(self, result: SearchResult) -> Tuple[str, Tuple[int, ...]]:
+        profile = self._profiles.get(result)
+        if profile is None:
+            if len(self._profiles) >= self.MAX_PROFILES:
+                self._profiles.clear()
+            
+            url, title, snippet = result
+            text = f"{title} {snippet} {url}".lower()
+            found = self.matcher.find(text)
+            domain = urlparse(url).netloc.lower()
+            
+            profile = self._profiles[result] = (text, (
+                len(found & MOUNT_ISA_TERMS),
+                len(found & QLD_TERMS),
+                sum(1 for relevant in self.relevant_domains if relevant in domain),
+                len(found & SERVICE_INDICATORS),
+                len(found & IRRELEVANT_TERMS)
+            ))
+            self.stats['results_matched'] += 1
+        return profile
+    
+    def _score(self, profile: Tuple[str, Tuple[int, ...]], keywords: List[str], penalize: bool) -> float:
+        text, (mount_isa, qld, domains, indicators, irrelevant) = profile
+        # Keywords count as often as the query lists them
+        matched_keywords = sum(map(text.__contains__, keywords))
+        return _combine(mount_isa, qld, matched_keywords, domains, indicators, irrelevant if penalize else 0)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get relevance scoring statistics"""
+        return {
+            **self.stats,
+            'backend': self.matcher.backend,
+            'profiles_cached': len(self._profiles),
+            'reuse_rate': 1 - self.stats['results_matched'] / max(1, self.stats['results_scored'])
+        }
+
+
+@lru_cache(maxsize=4096)
+def _combine(mount_isa: int, qld: int, keywords: int, domains: int, indicators: int, irrelevant: int) -> float:
+    """Score from per-table match counts.
+    
+    One addition per match, table by table, as the term-by-term scoring did,
+    so rounding is identical. There are few distinct count combinations, so
+    scores are memoized.
+    """
+    score = 0.0
+    for weight, times in (
+        (MOUNT_ISA_WEIGHT, mount_isa),
+        (QLD_WEIGHT, qld),
+        (KEYWORD_WEIGHT, keywords),
+        (DOMAIN_WEIGHT, domains),
+        (INDICATOR_WEIGHT, indicators),
+        (IRRELEVANT_WEIGHT, irrelevant)
+    ):
+        for _ in range(times):
+            score += weight
+    
+    return min(max(score, 0.0), 1.0)
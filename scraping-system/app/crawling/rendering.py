@@ -0,0 +1,300 @@
+"""
+Bounded headless-browser pool for pages that only render their content with JavaScript
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+# Playwright is optional - without it the rendering fallback is simply off
+try:
+    from playwright.async_api import async_playwright, Error as PlaywrightError
+    PLAYWRIGHT_AVAILABLE = True
+except ImportError:
+    async_playwright = None
+    PlaywrightError = Exception
+    PLAYWRIGHT_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class RenderedPage:
+    """HTML of a page after its scripts have run"""
+    url: str
+    status: Optional[int]
+    html: str
+    render_time: float
+
+
+class RenderPool:
+    """Reusable browser contexts shared by every agent in the process.
+    
+    At most max_contexts pages render at once, so the browser can't eat the
+    CPU and memory that static fetches need. Callers that can't get a context
+    within queue_timeout get None instead of queueing behind other renders.
+    Contexts are recycled after pages_per_context pages to cap memory growth,
+    and a browser that crashed is relaunched on the next render. If the browser
+    can't be launched at all, rendering is skipped until launch_cooldown passes.
+    """
+    
+    def __init__(
+        self,
+        max_contexts: Optional[int] = None,
+        page_timeout: Optional[float] = None,
+        queue_timeout: Optional[float] = None,
+        pages_per_context: Optional[int] = None,
+        blocked_resources: Optional[List[str]] = None,
+        launch_cooldown: Optional[float] = None
+    ):
+        self.max_contexts = max_contexts or settings.RENDER_MAX_CONTEXTS
+        self.page_timeout = page_timeout or settings.RENDER_PAGE_TIMEOUT
+        self.queue_timeout = queue_timeout or settings.RENDER_QUEUE_TIMEOUT
+        self.pages_per_context = pages_per_context or settings.RENDER_PAGES_PER_CONTEXT
+        self.blocked_resources = set(blocked_resources or settings.RENDER_BLOCKED_RESOURCES)
+        self.launch_cooldown = launch_cooldown if launch_cooldown is not None else settings.RENDER_LAUNCH_COOLDOWN
+        
+        self._playwright = None
+        self._browser = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._idle_contexts: Optional[asyncio.Queue] = None
+        self._context_uses: Dict[int, int] = {}
+        self._contexts_created = 0
+        self._launch_failed_at: Optional[float] = None
+        
+        self.stats = {
+            'renders': 0,
+            'render_failures': 0,
+            'render_timeouts': 0,
+            'skipped_busy': 0,
+            'skipped_unavailable': 0,
+            'launch_failures': 0,
+            'requests_blocked': 0,
+            'contexts_created': 0,
+            'contexts_recycled': 0,
+            'browser_restarts': 0,
+            'total_render_time': 0.0,
+            'max_render_time': 0.0
+        }
+    
+    @property
+    def available(self) -> bool:
+        return PLAYWRIGHT_AVAILABLE and settings.RENDER_ENABLED
+    
+    async def _ensure_started(self):
+        """Launch the browser on first use, and again if it has crashed"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        
+        async with self._start_lock:
+            if self._browser is not None:
+                if self._browser.is_connected():
+                    return
+                
+                # Its contexts went with it; ones still rendering are dropped on release
+                logger.warning("Headless browser disconnected, restarting it")
+                self.stats['browser_restarts'] += 1
+                await self._shutdown()
+            
+            self._playwright = await async_playwright().start()
+            try:
+                self._browser = await self._playwright.chromium.launch(
+                    headless=True,
+                    args=['--disable-dev-shm-usage', '--disable-gpu']
+                )
+            except Exception:
+                # Don't leave the driver process behind, and don't relaunch it for every page
+                self.stats['launch_failures'] += 1
+                self._launch_failed_at = time.monotonic()
+                try:
+                    await self._playwright.stop()
+                except PlaywrightError:
+                    pass
+                self._playwright = None
+                raise
+            
+            self._launch_failed_at = None
+            self._idle_contexts = asyncio.Queue()
+            logger.info(f"Started headless browser pool with {self.max_contexts} contexts")
+    
+    def _cooling_down(self) -> bool:
+        """Whether a recent failed launch means rendering should be skipped for now"""
+        return (
+            self._launch_failed_at is not None
+            and time.monotonic() - self._launch_failed_at < self.launch_cooldown
+        )
+    
+    async def _new_context(self):
+        """Create a browser context that skips images, fonts and media"""
+        context = await self._browser.new_context(
+            user_agent=settings.USER_AGENT,
+            java_script_enabled=True
+        )
+        
+        async def block_heavy_resources(route):
+            if route.request.resource_type in self.blocked_resources:
+                self.stats['requests_blocked'] += 1
+                await route.abort()
+            else:
+                await route.continue_()
+        
+        await context.route("**/*", block_heavy_resources)
+        
+        self.stats['contexts_created'] += 1
+        self._context_uses[id(context)] = 0
+        return context
+    
+    async def _acquire_context(self):
+        """Get an idle context, creating one while under the limit"""
+        try:
+            return self._idle_contexts.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        
+        if self._contexts_created < self.max_contexts:
+            # Reserve the slot before awaiting so concurrent callers can't overshoot the limit
+            self._contexts_created += 1
+            try:
+                return await self._new_context()
+            except Exception:
+                self._contexts_created -= 1
+                raise
+        
+        return await asyncio.wait_for(self._idle_contexts.get(), timeout=self.queue_timeout)
+    
+    async def _release_context(self, context):
+        """Return a context to the pool, replacing it once it has served enough pages"""
+        if id(context) not in self._context_uses:
+            # Belonged to a browser that has since been restarted
+            return
+        self._context_uses[id(context)] += 1
+        
+        if self._context_uses[id(context)] >= self.pages_per_context:
+            self._context_uses.pop(id(context), None)
+            self.stats['contexts_recycled'] += 1
+            try:
+                await context.close()
+            except PlaywrightError:
+                pass
+            
+            # Hand a fresh context to whoever is waiting so the slot isn't lost
+            try:
+                context = await self._new_context()
+            except Exception as e:
+                self._contexts_created -= 1
+                logger.warning(f"Failed to replace recycled browser context: {e}")
+                return
+        
+        self._idle_contexts.put_nowait(context)
+    
+    async def render(self, url: str) -> Optional[RenderedPage]:
+        """Render a page, or return None if the pool is busy or rendering fails"""
+        if not self.available:
+            return None
+        if self._cooling_down():
+            self.stats['skipped_unavailable'] += 1
+            return None
+        
+        try:
+            await self._ensure_started()
+            context = await self._acquire_context()
+        except asyncio.TimeoutError:
+            self.stats['skipped_busy'] += 1
+            logger.debug(f"Render pool busy, skipping {url}")
+            return None
+        except Exception as e:
+            self.stats['render_failures'] += 1
+            logger.warning(f"Render pool unavailable: {e}")
+            return None
+        
+        started = time.monotonic()
+        page = None
+        
+        try:
+            page = await context.new_page()
+            page.set_default_timeout(self.page_timeout * 1000)
+            
+            response = await page.goto(url, wait_until='domcontentloaded')
+            try:
+                # Directory widgets usually fill in after their XHRs settle
+                await page.wait_for_load_state('networkidle', timeout=self.page_timeout * 500)
+            except PlaywrightError:
+                pass
+            
+            html = await page.content()
+            render_time = time.monotonic() - started
+            
+            self.stats['renders'] += 1
+            self.stats['total_render_time'] += render_time
+            self.stats['max_render_time'] = max(self.stats['max_render_time'], render_time)
+            
+            return RenderedPage(
+                url=page.url,
+                status=response.status if response else None,
+                html=html,
+                render_time=render_time
+            )
+        
+        except PlaywrightError as e:
+            if 'Timeout' in type(e).__name__ or 'timeout' in str(e).lower():
+                self.stats['render_timeouts'] += 1
+            else:
+                self.stats['render_failures'] += 1
+            logger.warning(f"Failed to render {url}: {e}")
+            return None
+        
+        finally:
+            if page is not None:
+                try:
+                    await page.close()
+                except PlaywrightError:
+                    pass
+            await self._release_context(context)
+    
+    async def close(self):
+        """Close every context and the browser"""
+        await self._shutdown()
+    
+    async def _shutdown(self):
+        if self._idle_contexts is not None:
+            while not self._idle_contexts.empty():
+                context = self._idle_contexts.get_nowait()
+                try:
+                    await context.close()
+                except PlaywrightError:
+                    pass
+        
+        # Either may already be gone if the browser crashed
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except PlaywrightError:
+                pass
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except PlaywrightError:
+                pass
+        
+        self._browser = None
+        self._playwright = None
+        self._idle_contexts = None
+        self._context_uses.clear()
+        self._contexts_created = 0
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get render cost statistics"""
+        return {
+            **self.stats,
+            'available': self.available,
+            'avg_render_time': self.stats['total_render_time'] / max(1, self.stats['renders']),
+            'contexts_open': self._contexts_created
+        }
+
+
+# Process-wide pool shared by all agents
+render_pool = RenderPool()
@@ -0,0 +1,169 @@
+"""
+Offline reprocessing of archived pages through the current extractor
+
+Usage:
+    python -m app.crawling.reprocess --output results.jsonl [--workers 8] [--all-captures]
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.crawling.archive import PageArchive
+from app.crawling.boilerplate import extract_main_content
+from app.crawling.documents import document_kind, extract_page_batch
+from app.crawling.extraction import ServiceExtractor
+
+logger = get_logger(__name__)
+
+# Per-process state, created once by _init_worker
+_worker_archive: Optional[PageArchive] = None
+_worker_extractor: Optional[ServiceExtractor] = None
+
+
+def _init_worker(archive_dir: str):
+    """Build the archive reader and extractor once per worker process"""
+    global _worker_archive, _worker_extractor
+    _worker_archive = PageArchive(archive_dir)
+    _worker_extractor = ServiceExtractor()
+
+
+def _process_chunk(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Re-extract services from a chunk of archived pages"""
+    results = []
+    
+    for entry in entries:
+        result = {
+            'url': entry['url'],
+            'fetched_at': entry['fetched_at'],
+            'record_id': entry.get('record_id'),
+            'extractor_version': _worker_extractor.version
+        }
+        
+        try:
+            page = _worker_archive.read(entry)
+            
+            # We're already in a worker process, so documents are parsed inline
+            kind = document_kind(page.content_type)
+            if kind:
+                pages, _ = extract_page_batch(
+                    kind,
+                    io.BytesIO(page.body),
+                    0,
+                    settings.DOCUMENT_MAX_PAGES,
+                    settings.DOCUMENT_TIME_LIMIT
+                )
+                services = []
+                for page_number, text in pages:
+                    services.extend(_worker_extractor.extract_document_page(text, page.url, page_number))
+                result.update({
+                    'status': 'success',
+                    'services_found': len(services),
+                    'services': services,
+                    'document_pages': len(pages)
+                })
+                results.append(result)
+                continue
+            
+            main_content = extract_main_content(page.text)
+            services = _worker_extractor.extract(page.text, page.url, main_content)
+            result.update({
+                'status': 'success',
+                'services_found': len(services),
+                'services': services,
+                'boilerplate_removed_pct': main_content.removed_pct
+            })
+        except Exception as e:
+            result.update({'status': 'failed', 'error': str(e)})
+        
+        results.append(result)
+    
+    return results
+
+
+def reprocess_archive(
+    output_path: str,
+    archive_dir: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = 200,
+    latest_only: bool = True,
+    since: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Replay archived pages through the extractor across all cores and write JSONL results"""
+    archive_dir = archive_dir or settings.ARCHIVE_DIR
+    workers = workers or os.cpu_count() or 1
+    
+    entries = PageArchive(archive_dir).iter_index(latest_only=latest_only, since=since)
+    chunks = [entries[i:i + chunk_size] for i in range(0, len(entries), chunk_size)]
+    
+    summary = {
+        'pages': 0,
+        'failed': 0,
+        'services_found': 0,
+        'extractor_version': ServiceExtractor().version,
+        'workers': workers
+    }
+    started = time.monotonic()
+    
+    logger.info(f"Reprocessing {len(entries)} archived pages with {workers} workers")
+    
+    with open(output_path, 'w', encoding='utf-8') as output, ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(archive_dir,)
+    ) as executor:
+        futures = [executor.submit(_process_chunk, chunk) for chunk in chunks]
+        
+        for future in as_completed(futures):
+            for result in future.result():
+                output.write(json.dumps(result, default=str) + '\n')
+                
+                summary['pages'] += 1
+                if result['status'] == 'failed':
+                    summary['failed'] += 1
+                else:
+                    summary['services_found'] += result['services_found']
+    
+    summary['elapsed_seconds'] = time.monotonic() - started
+    summary['pages_per_second'] = summary['pages'] / max(summary['elapsed_seconds'], 1e-9)
+    
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-run service extraction over the page archive")
+    parser.add_argument('--output', required=True, help="JSONL file to write results to")
+    parser.add_argument('--archive-dir', default=settings.ARCHIVE_DIR)
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=200)
+    parser.add_argument('--all-captures', action='store_true', help="Process every capture, not just the latest per URL")
+    parser.add_argument('--since', type=datetime.fromisoformat, default=None, help="Only captures fetched after this ISO date")
+    args = parser.parse_args(argv)
+    
+    since = args.since
+    if since and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    
+    summary = reprocess_archive(
+        args.output,
+        archive_dir=args.archive_dir,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        latest_only=not args.all_captures,
+        since=since
+    )
+    
+    print(json.dumps(summary, indent=2))
+    return 0 if summary['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
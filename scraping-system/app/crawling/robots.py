@@ -0,0 +1,175 @@
+"""
+Cached robots.txt policies per host
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.crawling.fetch import fetch_page
+from app.crawling.host_scheduler import HostScheduler, host_scheduler
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class RobotsPolicy:
+    """Parsed robots.txt rules for one host"""
+    host: str
+    parser: RobotFileParser
+    fetched_at: float
+    ttl: int
+    sitemaps: List[str] = field(default_factory=list)
+    crawl_delay: Optional[float] = None
+    
+    @property
+    def expired(self) -> bool:
+        return time.time() - self.fetched_at > self.ttl
+    
+    def can_fetch(self, url: str, user_agent: str) -> bool:
+        return self.parser.can_fetch(user_agent, url)
+
+
+def parse_robots(host: str, robots_txt: str, user_agent: str, ttl: int) -> RobotsPolicy:
+    """Build a policy from robots.txt text"""
+    parser = RobotFileParser()
+    parser.parse(robots_txt.splitlines())
+    
+    crawl_delay = parser.crawl_delay(user_agent)
+    return RobotsPolicy(
+        host=host,
+        parser=parser,
+        fetched_at=time.time(),
+        ttl=ttl,
+        sitemaps=list(parser.site_maps() or []),
+        crawl_delay=float(crawl_delay) if crawl_delay is not None else None
+    )
+
+
+class RobotsCache:
+    """Fetches and caches robots.txt for each host.
+    
+    Policies live in memory for this process and the raw robots.txt is cached
+    in Redis so other agents reuse it. A missing robots.txt (4xx) allows
+    everything; an unreachable one (5xx or network error) disallows everything
+    until ROBOTS_ERROR_TTL expires, as RFC 9309 recommends.
+    """
+    
+    def __init__(
+        self,
+        user_agent: Optional[str] = None,
+        scheduler: Optional[HostScheduler] = None
+    ):
+        self.user_agent = user_agent or settings.USER_AGENT
+        self.scheduler = scheduler or host_scheduler
+        
+        self._policies: Dict[str, RobotsPolicy] = {}
+        self._redis: Optional[redis.Redis] = None
+        
+        self.stats = {
+            'fetches': 0,
+            'memory_hits': 0,
+            'redis_hits': 0,
+            'fetch_errors': 0,
+            'urls_disallowed': 0
+        }
+    
+    async def get_policy(self, session: aiohttp.ClientSession, url: str) -> RobotsPolicy:
+        """Get the robots.txt policy covering a URL"""
+        parsed = urlparse(url)
+        host = parsed.netloc.lower()
+        
+        policy = self._policies.get(host)
+        if policy and not policy.expired:
+            self.stats['memory_hits'] += 1
+            return policy
+        
+        robots_txt = await self._get_cached_text(host)
+        if robots_txt is not None:
+            self.stats['redis_hits'] += 1
+            policy = parse_robots(host, robots_txt, self.user_agent, settings.ROBOTS_CACHE_TTL)
+        else:
+            policy = await self._fetch_policy(session, f"{parsed.scheme or 'https'}://{host}/robots.txt", host)
+        
+        self._policies[host] = policy
+        self.scheduler.set_crawl_delay(host, policy.crawl_delay)
+        return policy
+    
+    async def can_fetch(self, session: aiohttp.ClientSession, url: str) -> bool:
+        """Check whether robots.txt allows us to fetch a URL"""
+        policy = await self.get_policy(session, url)
+        allowed = policy.can_fetch(url, self.user_agent)
+        if not allowed:
+            self.stats['urls_disallowed'] += 1
+        return allowed
+    
+    async def _fetch_policy(self, session: aiohttp.ClientSession, robots_url: str, host: str) -> RobotsPolicy:
+        """Download and parse a host's robots.txt"""
+        self.stats['fetches'] += 1
+        
+        try:
+            await self.scheduler.wait(robots_url)
+            page = await fetch_page(
+                session,
+                robots_url,
+                max_bytes=settings.ROBOTS_MAX_BYTES,
+                allowed_types=['text/plain', 'text/html'],
+                truncate=True
+            )
+        except Exception as e:
+            self.stats['fetch_errors'] += 1
+            logger.warning(f"Failed to fetch {robots_url}: {e}")
+            return parse_robots(host, "User-agent: *\nDisallow: /", self.user_agent, settings.ROBOTS_ERROR_TTL)
+        
+        if page.status == 200:
+            robots_txt = page.text
+            await self._set_cached_text(host, robots_txt)
+            return parse_robots(host, robots_txt, self.user_agent, settings.ROBOTS_CACHE_TTL)
+        
+        if 400 <= page.status < 500:
+            # No robots.txt - everything is allowed
+            await self._set_cached_text(host, "")
+            return parse_robots(host, "", self.user_agent, settings.ROBOTS_CACHE_TTL)
+        
+        self.stats['fetch_errors'] += 1
+        return parse_robots(host, "User-agent: *\nDisallow: /", self.user_agent, settings.ROBOTS_ERROR_TTL)
+    
+    async def _get_cached_text(self, host: str) -> Optional[str]:
+        """Get robots.txt text cached by another agent"""
+        try:
+            client = self._get_redis()
+            cached = await client.get(f"robots:{host}")
+            if cached is None:
+                return None
+            return cached.decode() if isinstance(cached, bytes) else cached
+        except Exception as e:
+            logger.debug(f"Robots cache lookup failed for {host}: {e}")
+            return None
+    
+    async def _set_cached_text(self, host: str, robots_txt: str):
+        """Share robots.txt text with other agents"""
+        try:
+            client = self._get_redis()
+            await client.setex(f"robots:{host}", settings.ROBOTS_CACHE_TTL, robots_txt)
+        except Exception as e:
+            logger.debug(f"Robots cache store failed for {host}: {e}")
+    
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+    
+    def get_statistics(self) -> Dict[str, int]:
+        """Get robots.txt cache statistics"""
+        return {**self.stats, 'hosts_cached': len(self._policies)}
+
+
+# Process-wide cache shared by all agents
+robots_cache = RobotsCache()
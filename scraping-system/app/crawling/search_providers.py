@@ -0,0 +1,186 @@
+"""
+Where the research agent gets search result pages and discovered sites from
+"""
+
+import asyncio
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from app.core.exceptions import ResearchException
+from app.core.single_flight import canonicalize_url
+from app.crawling.fetch import FetchedPage, fetch_page
+from app.crawling.serp_cache import normalize_query
+
+# Name of the file mapping queries and URLs to recorded pages
+FIXTURE_INDEX = 'index.json'
+
+
+class SearchProvider(ABC):
+    """Serves search engine result pages and site pages to the research agent.
+    
+    The agent builds the requests and parses the responses itself, so swapping
+    the provider changes where pages come from and nothing else.
+    """
+    
+    name = 'base'
+    
+    @abstractmethod
+    async def search(
+        self,
+        session: Optional[aiohttp.ClientSession],
+        engine: str,
+        search_url: str,
+        search_term: str,
+        headers: Dict[str, str]
+    ) -> str:
+        """Get the HTML of an engine's result page for a search"""
+        pass
+    
+    @abstractmethod
+    async def fetch(
+        self,
+        session: Optional[aiohttp.ClientSession],
+        url: str,
+        headers: Dict[str, str],
+        timeout: float = 30
+    ) -> FetchedPage:
+        """Get a discovered site's page"""
+        pass
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        return {'provider': self.name}
+
+
+class LiveSearchProvider(SearchProvider):
+    """Queries the real search engines and sites"""
+    
+    name = 'live'
+    
+    async def search(self, session, engine, search_url, search_term, headers) -> str:
+        async with session.get(search_url, headers=headers) as response:
+            if response.status != 200:
+                raise ResearchException(f"{engine.title()} search returned status {response.status}")
+            return await response.text()
+    
+    async def fetch(self, session, url, headers, timeout=30) -> FetchedPage:
+        return await fetch_page(session, url, headers=headers, timeout=timeout)
+
+
+class FixtureSearchProvider(SearchProvider):
+    """Serves recorded result pages and sites from a fixture directory.
+    
+    The directory holds an index.json of the form
+    
+        {"serp": {"google": {"<query>": "serp/google/<file>.html"}},
+         "pages": {"<url>": "pages/<file>.html"}}
+    
+    with paths relative to the directory. Queries are matched after
+    normalization and URLs after canonicalization. Unrecorded queries get an
+    empty result page and unrecorded sites a 404, so runs are repeatable.
+    """
+    
+    name = 'fixture'
+    
+    def __init__(self, fixture_dir: str):
+        self.fixture_dir = Path(fixture_dir)
+        
+        index_path = self.fixture_dir / FIXTURE_INDEX
+        index = json.loads(index_path.read_text(encoding='utf-8')) if index_path.exists() else {}
+        
+        self.serp_index: Dict[str, Dict[str, str]] = {
+            engine: {normalize_query(query): path for query, path in queries.items()}
+            for engine, queries in index.get('serp', {}).items()
+        }
+        self.page_index: Dict[str, str] = {
+            canonicalize_url(url): path for url, path in index.get('pages', {}).items()
+        }
+        
+        self.stats = {
+            'searches_served': 0,
+            'searches_unrecorded': 0,
+            'pages_served': 0,
+            'pages_unrecorded': 0
+        }
+    
+    async def search(self, session, engine, search_url, search_term, headers) -> str:
+        path = self.serp_index.get(engine, {}).get(normalize_query(search_term))
+        if path is None:
+            self.stats['searches_unrecorded'] += 1
+            return '<html><body></body></html>'
+        
+        self.stats['searches_served'] += 1
+        return (await self._read(path)).decode('utf-8')
+    
+    async def fetch(self, session, url, headers, timeout=30) -> FetchedPage:
+        path = self.page_index.get(canonicalize_url(url))
+        if path is None:
+            self.stats['pages_unrecorded'] += 1
+            return FetchedPage(url=url, status=404, content_type='text/html', charset=None, body=b'')
+        
+        self.stats['pages_served'] += 1
+        return FetchedPage(
+            url=url,
+            status=200,
+            content_type='text/html',
+            charset='utf-8',
+            body=await self._read(path)
+        )
+    
+    async def _read(self, path: str) -> bytes:
+        # Read off the event loop so fixture I/O behaves like network I/O
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, (self.fixture_dir / path).read_bytes)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            'provider': self.name,
+            'recorded_queries': sum(len(queries) for queries in self.serp_index.values()),
+            'recorded_pages': len(self.page_index)
+        }
+
+
+class RecordingSearchProvider(LiveSearchProvider):
+    """Queries the live engines and saves every response as a fixture"""
+    
+    name = 'recording'
+    
+    def __init__(self, fixture_dir: str):
+        self.fixture_dir = Path(fixture_dir)
+        self.index_path = self.fixture_dir / FIXTURE_INDEX
+        self.index = (
+            json.loads(self.index_path.read_text(encoding='utf-8'))
+            if self.index_path.exists() else {'serp': {}, 'pages': {}}
+        )
+    
+    async def search(self, session, engine, search_url, search_term, headers) -> str:
+        html = await super().search(session, engine, search_url, search_term, headers)
+        path = self._save('serp', engine, search_term, html.encode('utf-8'))
+        self.index['serp'].setdefault(engine, {})[normalize_query(search_term)] = path
+        self._write_index()
+        return html
+    
+    async def fetch(self, session, url, headers, timeout=30) -> FetchedPage:
+        page = await super().fetch(session, url, headers, timeout)
+        if page.status == 200 and 'html' in page.content_type:
+            # Stored re-encoded as UTF-8, which is how the fixture provider serves it
+            self.index['pages'][url] = self._save('pages', None, url, page.text.encode('utf-8'))
+            self._write_index()
+        return page
+    
+    def _save(self, kind: str, engine: Optional[str], key: str, body: bytes) -> str:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        relative = Path(kind, engine, f"{digest}.html") if engine else Path(kind, f"{digest}.html")
+        path = self.fixture_dir / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+        return relative.as_posix()
+    
+    def _write_index(self):
+        self.fixture_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path.write_text(json.dumps(self.index, indent=2, sort_keys=True), encoding='utf-8')
@@ -0,0 +1,107 @@
+"""
+Cache of parsed search engine results so queries aren't re-issued inside their cooldown
+"""
+
+import hashlib
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace and punctuation so trivial variants share an entry"""
+    return ' '.join(re.findall(r'\w+', query.lower()))
+
+
+class SerpCache:
+    """Parsed search results keyed by (engine, normalized query).
+    
+    Entries live for the research cooldown, so repeat research runs inside it
+    reuse earlier results instead of re-querying the engines. Results are kept
+    in memory for this process and in Redis so every research agent shares them.
+    """
+    
+    def __init__(self, ttl: Optional[int] = None):
+        self.ttl = ttl or int(settings.SERP_CACHE_TTL_HOURS * 3600)
+        
+        self._memory: Dict[str, Tuple[float, str]] = {}
+        self._redis: Optional[redis.Redis] = None
+        
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'errors': 0
+        }
+    
+    @staticmethod
+    def key(engine: str, query: str) -> str:
+        digest = hashlib.sha1(normalize_query(query).encode('utf-8')).hexdigest()
+        return f"serp:{engine}:{digest}"
+    
+    async def get(self, engine: str, query: str) -> Optional[List[Dict[str, Any]]]:
+        """Get cached results for a query, or None if it's outside its cooldown"""
+        key = self.key(engine, query)
+        
+        cached = self._memory.get(key)
+        if cached and cached[0] > time.time():
+            self.stats['hits'] += 1
+            return json.loads(cached[1])
+        self._memory.pop(key, None)
+        
+        try:
+            client = self._get_redis()
+            payload = await client.get(key)
+            if payload is not None:
+                ttl = await client.ttl(key)
+                payload = payload.decode('utf-8') if isinstance(payload, bytes) else payload
+                self._memory[key] = (time.time() + max(ttl, 0), payload)
+                self.stats['hits'] += 1
+                return json.loads(payload)
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.debug(f"SERP cache lookup failed for {engine} '{query}': {e}")
+        
+        self.stats['misses'] += 1
+        return None
+    
+    async def set(self, engine: str, query: str, results: List[Dict[str, Any]], ttl: Optional[int] = None):
+        """Store parsed results for the cooldown period; failures are logged, not raised"""
+        key = self.key(engine, query)
+        ttl = ttl or self.ttl
+        payload = json.dumps(results, default=str)
+        
+        self._memory[key] = (time.time() + ttl, payload)
+        
+        try:
+            await self._get_redis().setex(key, ttl, payload)
+            self.stats['stores'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            logger.debug(f"SERP cache store failed for {engine} '{query}': {e}")
+    
+    def _get_redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(settings.REDIS_URL)
+        return self._redis
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get SERP cache statistics"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'entries_in_memory': len(self._memory),
+            'hit_rate': self.stats['hits'] / max(1, lookups)
+        }
+
+
+# Process-wide cache shared by all research agents
+serp_cache = SerpCache()
@@ -0,0 +1,101 @@
+"""
+Normalized keys services are matched on when looking for duplicates
+"""
+
+import re
+from typing import Any, Dict, Optional, Set
+from urllib.parse import urlparse
+
+from app.crawling.domains import registered_domain
+
+# Words that don't tell one provider from another
+NAME_NOISE = frozenset({'the', 'pty', 'ltd', 'limited', 'inc', 'incorporated', 'co'})
+
+# Score a duplicate candidate earns for each kind of evidence; capped at 1.0
+NAME_WEIGHT = 0.7  # times the trigram similarity of the names
+PHONE_WEIGHT = 0.25
+EMAIL_WEIGHT = 0.25
+WEBSITE_WEIGHT = 0.1
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+_NON_DIGIT = re.compile(r'\D+')
+
+
+def normalize_name(name: Optional[str]) -> Optional[str]:
+    """Lowercase a service name and drop punctuation and company suffixes"""
+    if not name:
+        return None
+    words = _NON_ALNUM.sub(' ', name.lower().replace('&', ' and ')).split()
+    return ' '.join(word for word in words if word not in NAME_NOISE) or None
+
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Digits of a phone number in national form, e.g. +61 7 4744 4444 -> 0747444444"""
+    if not phone:
+        return None
+    digits = _NON_DIGIT.sub('', phone)
+    if digits.startswith('61') and len(digits) == 11:
+        digits = '0' + digits[2:]
+    return digits or None
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    if not email:
+        return None
+    return email.strip().lower() or None
+
+
+def website_domain(website: Optional[str]) -> Optional[str]:
+    """Registered domain of a website, e.g. https://www.kalkadoon.org.au/about -> kalkadoon.org.au"""
+    if not website:
+        return None
+    website = website.strip()
+    if '://' not in website:
+        website = f"http://{website}"
+    host = urlparse(website).netloc
+    return registered_domain(host) if host else None
+
+
+def match_keys(service: Any) -> Dict[str, Optional[str]]:
+    """Match key columns for a service model, record or dict"""
+    def get(name: str) -> Any:
+        return service.get(name) if isinstance(service, dict) else getattr(service, name, None)
+    
+    return {
+        'name_key': normalize_name(get('name')),
+        'phone_key': normalize_phone(get('phone')),
+        'email_key': normalize_email(get('email')),
+        'website_domain': website_domain(get('website'))
+    }
+
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """Trigrams of a text, the way pg_trgm splits it"""
+    grams = set()
+    for word in _NON_ALNUM.sub(' ', (text or '').lower()).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def trigram_similarity(a: Optional[str], b: Optional[str]) -> float:
+    """Same as pg_trgm's similarity(a, b): shared trigrams over all trigrams"""
+    left, right = trigrams(a), trigrams(b)
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def candidate_score(
+    keys: Dict[str, Optional[str]],
+    other: Dict[str, Optional[str]],
+    name_similarity: Optional[float] = None
+) -> float:
+    """Score two sets of match keys in Python, exactly as the candidate query does"""
+    if name_similarity is None:
+        name_similarity = trigram_similarity(keys['name_key'], other['name_key'])
+    score = name_similarity * NAME_WEIGHT
+    for key, weight in (('phone_key', PHONE_WEIGHT), ('email_key', EMAIL_WEIGHT), ('website_domain', WEBSITE_WEIGHT)):
+        if keys[key] and keys[key] == other[key]:
+            score += weight
+    return min(1.0, score)
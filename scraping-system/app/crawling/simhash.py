@@ -0,0 +1,151 @@
+"""
+SimHash fingerprints and a banded index for near-duplicate page detection
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.crawling.boilerplate import extract_main_content
+
+FINGERPRINT_BITS = 64
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(text: str, shingle_size: int = 3) -> Tuple[int, int]:
+    """Compute a 64-bit SimHash over word shingles.
+    
+    Returns the fingerprint and the number of tokens it was built from, since
+    fingerprints of very short texts collide too easily to trust.
+    """
+    tokens = TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < shingle_size:
+        features = Counter(tokens)
+    else:
+        features = Counter(
+            ' '.join(tokens[i:i + shingle_size])
+            for i in range(len(tokens) - shingle_size + 1)
+        )
+    
+    weights = [0] * FINGERPRINT_BITS
+    for feature, count in features.items():
+        feature_hash = _feature_hash(feature)
+        for bit in range(FINGERPRINT_BITS):
+            if feature_hash >> bit & 1:
+                weights[bit] += count
+            else:
+                weights[bit] -= count
+    
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    
+    return fingerprint, len(tokens)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def text_fingerprint(text: str, min_tokens: Optional[int] = None) -> Optional[int]:
+    """Fingerprint boilerplate-free text, or None if it's too short to compare reliably"""
+    min_tokens = settings.SIMHASH_MIN_TOKENS if min_tokens is None else min_tokens
+    fingerprint, token_count = simhash(text)
+    return fingerprint if token_count >= min_tokens else None
+
+
+def page_fingerprint(html: str, min_tokens: Optional[int] = None) -> Optional[int]:
+    """Fingerprint a page's main content"""
+    return text_fingerprint(extract_main_content(html).text, min_tokens)
+
+
+class SimHashIndex:
+    """Finds stored fingerprints within a Hamming distance of a query.
+    
+    The 64 bits are split into max_distance + 1 bands. Two fingerprints that
+    differ in at most max_distance bits must agree exactly on at least one
+    band, so lookups only compare against pages sharing a band value instead
+    of scanning every page.
+    """
+    
+    def __init__(self, max_distance: Optional[int] = None):
+        self.max_distance = settings.SIMHASH_MAX_DISTANCE if max_distance is None else max_distance
+        self.band_count = self.max_distance + 1
+        self.band_bits = -(-FINGERPRINT_BITS // self.band_count)
+        self.band_mask = (1 << self.band_bits) - 1
+        
+        self._bands: List[Dict[int, Set[str]]] = [{} for _ in range(self.band_count)]
+        self._fingerprints: Dict[str, int] = {}
+        
+        self.stats = {
+            'lookups': 0,
+            'near_duplicates': 0,
+            'candidates_compared': 0
+        }
+    
+    def _band_values(self, fingerprint: int) -> List[int]:
+        return [
+            fingerprint >> (band * self.band_bits) & self.band_mask
+            for band in range(self.band_count)
+        ]
+    
+    def add(self, url: str, fingerprint: int):
+        """Index a page's fingerprint"""
+        if url in self._fingerprints:
+            self.remove(url)
+        
+        self._fingerprints[url] = fingerprint
+        for band, value in enumerate(self._band_values(fingerprint)):
+            self._bands[band].setdefault(value, set()).add(url)
+    
+    def remove(self, url: str):
+        """Drop a page from the index"""
+        fingerprint = self._fingerprints.pop(url, None)
+        if fingerprint is None:
+            return
+        
+        for band, value in enumerate(self._band_values(fingerprint)):
+            bucket = self._bands[band].get(value)
+            if bucket:
+                bucket.discard(url)
+                if not bucket:
+                    del self._bands[band][value]
+    
+    def find_near_duplicate(self, fingerprint: int, exclude_url: Optional[str] = None) -> Optional[Tuple[str, int]]:
+        """Get the closest indexed page within max_distance, as (url, distance)"""
+        self.stats['lookups'] += 1
+        
+        candidates = set()
+        for band, value in enumerate(self._band_values(fingerprint)):
+            candidates.update(self._bands[band].get(value, ()))
+        candidates.discard(exclude_url)
+        
+        best = None
+        for url in candidates:
+            self.stats['candidates_compared'] += 1
+            distance = hamming_distance(fingerprint, self._fingerprints[url])
+            if distance <= self.max_distance and (best is None or distance < best[1]):
+                best = (url, distance)
+        
+        if best:
+            self.stats['near_duplicates'] += 1
+        return best
+    
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+    
+    def get_statistics(self) -> Dict[str, int]:
+        """Get near-duplicate index statistics"""
+        return {**self.stats, 'pages_indexed': len(self._fingerprints)}
+
+
+# Process-wide index so every agent sees pages the others have already extracted
+near_duplicate_index = SimHashIndex()
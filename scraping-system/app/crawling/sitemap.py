@@ -0,0 +1,249 @@
+"""
+Streaming sitemap.xml and sitemap index parsing for frontier seeding
+"""
+
+import math
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterable, List, Optional, Set
+from urllib.parse import urlparse
+from xml.etree.ElementTree import XMLPullParser, ParseError
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.crawling.host_scheduler import HostScheduler, host_scheduler
+
+logger = get_logger(__name__)
+
+# Path fragments that suggest a page describes a community service
+SERVICE_PATH_INDICATORS = [
+    'service', 'program', 'support', 'health', 'community', 'contact',
+    'directory', 'clinic', 'disability', 'youth', 'family', 'aged-care',
+    'housing', 'counselling', 'help', 'assistance'
+]
+
+# Path fragments for pages that never list services
+LOW_VALUE_PATH_INDICATORS = [
+    'news', 'media-release', 'tender', 'careers', 'job', 'event', 'blog',
+    'minutes', 'agenda', 'print', 'search', 'login', 'tag/', 'category/'
+]
+
+
+@dataclass
+class SitemapEntry:
+    """A URL listed in a sitemap"""
+    loc: str
+    lastmod: Optional[datetime] = None
+    changefreq: Optional[str] = None
+    priority: Optional[float] = None
+    source_sitemap: Optional[str] = None
+
+
+def _local_name(tag: str) -> str:
+    """Strip the XML namespace from a tag"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """Parse a W3C datetime lastmod value"""
+    if not value:
+        return None
+    
+    value = value.strip().replace('Z', '+00:00')
+    for candidate in (value, value[:10]):
+        try:
+            parsed = datetime.fromisoformat(candidate)
+            return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+        except ValueError:
+            continue
+    return None
+
+
+def score_entry(entry: SitemapEntry, now: Optional[datetime] = None) -> float:
+    """Score a sitemap URL for frontier priority (0-1).
+    
+    Recently modified pages score higher, with a half-life of
+    SITEMAP_LASTMOD_HALF_LIFE_DAYS. Paths that look like service pages are
+    boosted and paths that look like news or events are penalised.
+    """
+    now = now or datetime.now(timezone.utc)
+    
+    if entry.lastmod:
+        age_days = max(0.0, (now - entry.lastmod).total_seconds() / 86400)
+        recency = math.pow(0.5, age_days / settings.SITEMAP_LASTMOD_HALF_LIFE_DAYS)
+    else:
+        recency = 0.25
+    
+    path = urlparse(entry.loc).path.lower()
+    score = 0.4 * recency
+    
+    if any(indicator in path for indicator in SERVICE_PATH_INDICATORS):
+        score += 0.4
+    if any(indicator in path for indicator in LOW_VALUE_PATH_INDICATORS):
+        score -= 0.3
+    
+    if entry.priority is not None:
+        score += 0.2 * min(max(entry.priority, 0.0), 1.0)
+    
+    return min(max(score, 0.0), 1.0)
+
+
+class SitemapParser:
+    """Incrementally parses sitemap XML fed in chunks.
+    
+    Elements are cleared as soon as they are read so memory stays flat even for
+    sitemaps with tens of thousands of URLs.
+    """
+    
+    def __init__(self, source: str):
+        self.source = source
+        self.is_index = False
+        self._parser = XMLPullParser(events=('start', 'end'))
+        self._decompressor = None
+        self._first_chunk = True
+        self._root = None
+    
+    def feed(self, chunk: bytes) -> List[SitemapEntry]:
+        """Feed raw bytes and return any entries completed by them"""
+        if self._first_chunk:
+            self._first_chunk = False
+            # .xml.gz sitemaps are served as gzip bodies rather than Content-Encoding
+            if chunk.startswith(b'\x1f\x8b'):
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        
+        if self._decompressor is not None:
+            chunk = self._decompressor.decompress(chunk)
+        
+        self._parser.feed(chunk)
+        return self._drain()
+    
+    def close(self) -> List[SitemapEntry]:
+        """Finish parsing and return any remaining entries"""
+        try:
+            self._parser.close()
+        except ParseError as e:
+            logger.warning(f"Malformed sitemap {self.source}: {e}")
+        return self._drain()
+    
+    def _drain(self) -> List[SitemapEntry]:
+        entries = []
+        
+        try:
+            for event, element in self._parser.read_events():
+                name = _local_name(element.tag)
+                
+                if event == 'start':
+                    if self._root is None:
+                        self._root = element
+                        self.is_index = name == 'sitemapindex'
+                    continue
+                
+                if name not in ('url', 'sitemap'):
+                    continue
+                
+                fields = {_local_name(child.tag): (child.text or '').strip() for child in element}
+                if fields.get('loc'):
+                    priority = fields.get('priority')
+                    try:
+                        priority = float(priority) if priority else None
+                    except ValueError:
+                        priority = None
+                    
+                    entries.append(SitemapEntry(
+                        loc=fields['loc'],
+                        lastmod=parse_lastmod(fields.get('lastmod')),
+                        changefreq=fields.get('changefreq') or None,
+                        priority=priority,
+                        source_sitemap=self.source
+                    ))
+                
+                # Drop finished entries so the tree never grows
+                self._root.clear()
+        except ParseError as e:
+            logger.warning(f"Malformed sitemap {self.source}: {e}")
+        
+        return entries
+
+
+async def iter_sitemap_entries(
+    session: aiohttp.ClientSession,
+    sitemap_urls: Iterable[str],
+    max_urls: Optional[int] = None,
+    max_sitemaps: Optional[int] = None,
+    scheduler: Optional[HostScheduler] = None
+) -> AsyncIterator[SitemapEntry]:
+    """Stream page entries from sitemaps, following sitemap indexes"""
+    max_urls = max_urls or settings.SITEMAP_MAX_URLS
+    max_sitemaps = max_sitemaps or settings.SITEMAP_MAX_FILES
+    scheduler = scheduler or host_scheduler
+    
+    pending = list(sitemap_urls)
+    seen: Set[str] = set()
+    urls_yielded = 0
+    
+    while pending and len(seen) < max_sitemaps and urls_yielded < max_urls:
+        sitemap_url = pending.pop(0)
+        if sitemap_url in seen:
+            continue
+        seen.add(sitemap_url)
+        
+        parser = SitemapParser(sitemap_url)
+        bytes_read = 0
+        
+        try:
+            await scheduler.wait(sitemap_url)
+            async with session.get(sitemap_url) as response:
+                if response.status != 200:
+                    logger.debug(f"Sitemap {sitemap_url} returned {response.status}")
+                    continue
+                
+                async for chunk in response.content.iter_chunked(settings.FETCH_CHUNK_SIZE):
+                    bytes_read += len(chunk)
+                    for entry in parser.feed(chunk):
+                        if parser.is_index:
+                            pending.append(entry.loc)
+                        elif urls_yielded < max_urls:
+                            urls_yielded += 1
+                            yield entry
+                    
+                    if bytes_read > settings.SITEMAP_MAX_BYTES or urls_yielded >= max_urls:
+                        break
+                else:
+                    for entry in parser.close():
+                        if parser.is_index:
+                            pending.append(entry.loc)
+                        elif urls_yielded < max_urls:
+                            urls_yielded += 1
+                            yield entry
+        
+        except aiohttp.ClientError as e:
+            logger.warning(f"Failed to fetch sitemap {sitemap_url}: {e}")
+
+
+async def discover_sitemap_urls(
+    session: aiohttp.ClientSession,
+    base_url: str,
+    sitemap_urls: Iterable[str],
+    limit: int
+) -> List[dict]:
+    """Get the highest-priority same-host URLs from a site's sitemaps"""
+    host = urlparse(base_url).netloc.lower()
+    sitemap_urls = list(sitemap_urls) or [f"{urlparse(base_url).scheme or 'https'}://{host}/sitemap.xml"]
+    now = datetime.now(timezone.utc)
+    
+    candidates = {}
+    async for entry in iter_sitemap_entries(session, sitemap_urls):
+        if urlparse(entry.loc).netloc.lower() != host:
+            continue
+        candidates[entry.loc] = {
+            'url': entry.loc,
+            'priority': score_entry(entry, now),
+            'lastmod': entry.lastmod.isoformat() if entry.lastmod else None,
+            'source': 'sitemap'
+        }
+    
+    ranked = sorted(candidates.values(), key=lambda c: c['priority'], reverse=True)
+    return ranked[:limit]
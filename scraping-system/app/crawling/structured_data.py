@@ -0,0 +1,375 @@
+"""
+Service records from embedded structured data (JSON-LD, microdata and hCard)
+"""
+
+import json
+from typing import Any, Dict, Iterator, List, Optional, Set
+from urllib.parse import urldefrag, urlparse
+
+from bs4 import Tag
+
+from app.core.logging import get_logger
+from app.crawling.boilerplate import MainContent
+
+logger = get_logger(__name__)
+
+# schema.org types that describe something a person can contact or visit
+SERVICE_TYPES = {
+    'Organization', 'LocalBusiness', 'GovernmentOrganization', 'GovernmentService',
+    'GovernmentOffice', 'NGO', 'Service', 'CivicStructure', 'MedicalOrganization',
+    'MedicalClinic', 'Hospital', 'Physician', 'Dentist', 'Pharmacy', 'MedicalBusiness',
+    'HealthAndBeautyBusiness', 'LegalService', 'Attorney', 'EmergencyService',
+    'PoliceStation', 'FireStation', 'ChildCare', 'Library', 'EducationalOrganization',
+    'School', 'CollegeOrUniversity', 'EmploymentAgency', 'Place', 'ProfessionalService'
+}
+
+# Suffixes that mark other schema.org subtypes we haven't listed
+SERVICE_TYPE_SUFFIXES = ('Organization', 'Business', 'Service', 'Clinic', 'Office', 'Center', 'Centre')
+
+SCHEMA_PREFIXES = ('http://schema.org/', 'https://schema.org/', 'schema:')
+
+# Properties that point at whoever runs the site rather than what the page is about
+SITE_OWNER_PROPERTIES = ('publisher', 'author', 'creator', 'copyrightHolder', 'sourceOrganization')
+
+# Properties of a WebPage that point at what the page is about
+PAGE_SUBJECT_PROPERTIES = ('mainEntity', 'about')
+
+
+def _type_names(value: Any) -> List[str]:
+    """Normalize @type / itemtype values to bare schema.org type names"""
+    values = value if isinstance(value, list) else str(value or '').split()
+    names = []
+    for type_value in values:
+        name = str(type_value)
+        for prefix in SCHEMA_PREFIXES:
+            if name.startswith(prefix):
+                name = name[len(prefix):]
+        names.append(name.strip('/'))
+    return names
+
+
+def is_service_type(value: Any) -> bool:
+    return any(
+        name in SERVICE_TYPES or name.endswith(SERVICE_TYPE_SUFFIXES)
+        for name in _type_names(value)
+    )
+
+
+def _first(value: Any) -> Any:
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def _text(value: Any) -> Optional[str]:
+    value = _first(value)
+    if isinstance(value, dict):
+        value = value.get('name') or value.get('@value') or value.get('@id')
+    if value is None:
+        return None
+    text = ' '.join(str(value).split())
+    return text or None
+
+
+def _format_opening_hours(value: Any) -> Optional[str]:
+    """Flatten openingHours strings or openingHoursSpecification objects"""
+    if not value:
+        return None
+    
+    entries = value if isinstance(value, list) else [value]
+    parts = []
+    for entry in entries:
+        if isinstance(entry, dict):
+            days = entry.get('dayOfWeek')
+            days = days if isinstance(days, list) else [days]
+            day_names = ', '.join(_type_names([d for d in days if d]))
+            opens, closes = entry.get('opens'), entry.get('closes')
+            if day_names and opens and closes:
+                parts.append(f"{day_names} {opens} - {closes}")
+        elif entry:
+            parts.append(str(entry))
+    
+    return '; '.join(parts) or None
+
+
+def _service_from_properties(properties: Dict[str, Any], structured_format: str) -> Optional[Dict[str, Any]]:
+    """Map schema.org properties onto our service fields"""
+    name = _text(properties.get('name') or properties.get('legalName'))
+    if not name:
+        return None
+    
+    service = {
+        'name': name,
+        'extraction_method': 'structured_data',
+        'structured_format': structured_format,
+        'structured_type': (_type_names(properties.get('@type', [])) or [None])[0]
+    }
+    
+    description = _text(properties.get('description'))
+    if description:
+        service['description'] = description
+    
+    phone = _text(properties.get('telephone'))
+    if phone:
+        service['phone'] = phone.replace('tel:', '')
+    
+    email = _text(properties.get('email'))
+    if email:
+        service['email'] = email.replace('mailto:', '')
+    
+    website = _text(properties.get('url') or properties.get('sameAs'))
+    if website and website.startswith(('http://', 'https://')):
+        service['website'] = website
+    
+    address = properties.get('address')
+    location = _first(properties.get('location'))
+    if not address and isinstance(location, dict):
+        address = location.get('address')
+    address = _first(address)
+    if isinstance(address, dict):
+        field_map = {
+            'streetAddress': 'address',
+            'addressLocality': 'suburb',
+            'postalCode': 'postcode',
+            'addressRegion': 'state'
+        }
+        for source_field, target_field in field_map.items():
+            value = _text(address.get(source_field))
+            if value:
+                service[target_field] = value
+    elif address:
+        service['address'] = _text(address)
+    
+    hours = _format_opening_hours(
+        properties.get('openingHours') or properties.get('openingHoursSpecification')
+    )
+    if hours:
+        service['operating_hours'] = hours
+    
+    offered = properties.get('hasOfferCatalog') or properties.get('serviceType') or properties.get('knowsAbout')
+    if offered:
+        items = offered.get('itemListElement', []) if isinstance(offered, dict) else offered
+        items = items if isinstance(items, list) else [items]
+        names = [_text(item.get('itemOffered', item) if isinstance(item, dict) else item) for item in items]
+        names = [n for n in names if n]
+        if names:
+            service['services_offered'] = names[:5]
+    
+    return service
+
+
+def _iter_json_ld_nodes(data: Any) -> Iterator[Dict[str, Any]]:
+    """Walk JSON-LD documents, lists and @graph containers"""
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_json_ld_nodes(item)
+    elif isinstance(data, dict):
+        if '@graph' in data:
+            yield from _iter_json_ld_nodes(data['@graph'])
+        if '@type' in data:
+            yield data
+        # Services are often nested, e.g. a WebPage whose mainEntity is the organization
+        for key in PAGE_SUBJECT_PROPERTIES + ('provider', 'subOrganization', 'department'):
+            if key in data:
+                yield from _iter_json_ld_nodes(data[key])
+
+
+def _as_list(value: Any) -> List[Any]:
+    return value if isinstance(value, list) else [value]
+
+
+def _referenced_ids(value: Any) -> Set[str]:
+    """@id values of the nodes or node references in a property value"""
+    return {str(item['@id']) for item in _as_list(value) if isinstance(item, dict) and item.get('@id')}
+
+
+def _same_page(a: Optional[str], b: Optional[str]) -> bool:
+    if not a or not b:
+        return False
+    return urldefrag(a)[0].rstrip('/') == urldefrag(b)[0].rstrip('/')
+
+
+def _is_site_root(url: Optional[str]) -> bool:
+    return bool(url) and urlparse(url).path in ('', '/')
+
+
+def extract_json_ld(blocks: List[str], page_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Get services from the raw text of a page's JSON-LD script blocks.
+    
+    CMS plugins such as Yoast put the site owner's Organization on every
+    page, as the publisher of the WebSite in an @graph. Organizations that
+    are some node's publisher or author, or whose URL is the site root, are
+    skipped unless the page is about them (its mainEntity or about) or is
+    the home page, so they don't stand in for the page's own services.
+    
+    Services are marked `describes_page` when the page names them as its
+    subject, or they aren't the site owner's and don't link to another page.
+    """
+    nodes = []
+    for raw in blocks:
+        if not raw or not raw.strip():
+            continue
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            # Some CMSs emit trailing commas or HTML comments; not worth repairing
+            logger.debug("Skipping malformed JSON-LD block")
+            continue
+        nodes.extend(_iter_json_ld_nodes(data))
+    
+    owner_ids: Set[str] = set()
+    subject_ids: Set[str] = set()
+    subject_nodes: Set[int] = set()
+    for node in nodes:
+        for key in SITE_OWNER_PROPERTIES:
+            owner_ids |= _referenced_ids(node.get(key))
+        for key in PAGE_SUBJECT_PROPERTIES:
+            subject_ids |= _referenced_ids(node.get(key))
+            subject_nodes.update(id(item) for item in _as_list(node.get(key)) if isinstance(item, dict))
+    home_page = _is_site_root(page_url)
+    
+    services = []
+    for node in nodes:
+        if not is_service_type(node.get('@type')):
+            continue
+        
+        node_id = str(node.get('@id') or '')
+        node_url = _text(node.get('url')) or (node_id if node_id.startswith(('http://', 'https://')) else None)
+        site_wide = node_id in owner_ids or _is_site_root(node_url)
+        # The site owner's URL is the home page's, so only an explicit reference makes it the subject
+        is_subject = id(node) in subject_nodes or node_id in subject_ids or (
+            not site_wide and _same_page(node_url, page_url)
+        )
+        if site_wide and not (is_subject or home_page):
+            continue
+        
+        service = _service_from_properties(node, 'json-ld')
+        if service:
+            # A node that links to another page describes that page, not this one
+            links_elsewhere = bool(node_url and page_url) and not _same_page(node_url, page_url)
+            service['describes_page'] = is_subject or not (site_wide or links_elsewhere)
+            services.append(service)
+    
+    return services
+
+
+def _microdata_value(element: Tag) -> Any:
+    """Read an itemprop value following the microdata rules"""
+    if element.has_attr('itemscope'):
+        return _microdata_properties(element)
+    if element.name == 'meta':
+        return element.get('content')
+    if element.name in ('a', 'link', 'area'):
+        return element.get('href')
+    if element.name in ('img', 'audio', 'video', 'source', 'embed', 'iframe'):
+        return element.get('src')
+    if element.name == 'time' and element.has_attr('datetime'):
+        return element['datetime']
+    return element.get('content') or element.get_text(' ', strip=True)
+
+
+def _microdata_properties(scope: Tag) -> Dict[str, Any]:
+    """Collect the properties of one itemscope, without descending into nested scopes"""
+    properties: Dict[str, Any] = {'@type': scope.get('itemtype', '')}
+    
+    pending = list(scope.find_all(True, recursive=False))
+    while pending:
+        element = pending.pop(0)
+        if element.has_attr('itemprop'):
+            value = _microdata_value(element)
+            for prop in element['itemprop'].split():
+                properties.setdefault(prop, value)
+        if not element.has_attr('itemscope'):
+            pending.extend(element.find_all(True, recursive=False))
+    
+    return properties
+
+
+def extract_microdata(node: Tag) -> List[Dict[str, Any]]:
+    """Get services from schema.org microdata scopes under node"""
+    services = []
+    
+    for scope in node.find_all(attrs={'itemscope': True, 'itemtype': True}):
+        # Nested scopes are read as properties of their parent
+        if scope.has_attr('itemprop'):
+            continue
+        if is_service_type(scope['itemtype']):
+            service = _service_from_properties(_microdata_properties(scope), 'microdata')
+            if service:
+                service['describes_page'] = True
+                services.append(service)
+    
+    return services
+
+
+def _hcard_field(card: Tag, *class_names: str) -> Optional[str]:
+    for class_name in class_names:
+        element = card.find(class_=class_name)
+        if element:
+            if element.name == 'a' and class_name in ('url', 'u-url', 'email', 'u-email'):
+                return element.get('href')
+            return element.get_text(' ', strip=True) or None
+    return None
+
+
+def extract_hcards(node: Tag) -> List[Dict[str, Any]]:
+    """Get services from vCard / h-card microformats under node"""
+    services = []
+    
+    for card in node.find_all(class_=['vcard', 'h-card']):
+        properties = {
+            'name': _hcard_field(card, 'org', 'p-org', 'fn', 'p-name'),
+            'telephone': _hcard_field(card, 'tel', 'p-tel'),
+            'email': _hcard_field(card, 'email', 'u-email'),
+            'url': _hcard_field(card, 'url', 'u-url'),
+            'description': _hcard_field(card, 'note', 'p-note'),
+            'address': {
+                'streetAddress': _hcard_field(card, 'street-address', 'p-street-address'),
+                'addressLocality': _hcard_field(card, 'locality', 'p-locality'),
+                'postalCode': _hcard_field(card, 'postal-code', 'p-postal-code'),
+                'addressRegion': _hcard_field(card, 'region', 'p-region')
+            }
+        }
+        service = _service_from_properties(properties, 'hcard')
+        if service:
+            service['describes_page'] = True
+            services.append(service)
+    
+    return services
+
+
+def extract_structured_services(main_content: MainContent, page_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Build service records from JSON-LD, then microdata, then hCard.
+    
+    JSON-LD describes the page as a whole, so every block is read, less the
+    site owner's records. Microdata and hCards are only read from the main
+    content, because the copy in a site-wide footer describes the site owner
+    rather than the page. The first format that yields services describing
+    the page wins, since sites that publish several formats usually describe
+    the same organization in each. Failing that, the first format's services
+    are returned with `describes_page` false, so the caller knows to look
+    for the page's own services as well.
+    """
+    sources = (
+        ('json-ld', lambda: extract_json_ld(main_content.json_ld, page_url)),
+        ('microdata', lambda: extract_microdata(main_content.node)),
+        ('hcard', lambda: extract_hcards(main_content.node))
+    )
+    
+    fallback: List[Dict[str, Any]] = []
+    for structured_format, extractor in sources:
+        try:
+            services = extractor()
+        except Exception as e:
+            logger.warning(f"Structured data extraction failed for {structured_format}: {e}")
+            continue
+        
+        # One record per name - the same organization often appears in several blocks
+        unique = {}
+        for service in services:
+            unique.setdefault(service['name'].lower(), service)
+        if any(service['describes_page'] for service in unique.values()):
+            return list(unique.values())
+        fallback = fallback or list(unique.values())
+    
+    return fallback
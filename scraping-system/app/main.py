@@ -15,7 +15,14 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from app.core.config import settings
-from app.core.database import init_db
+from app.core.database import init_db, async_session_factory
+from app.core.http import http_client
+from app.crawling.rendering import render_pool
+from app.crawling.documents import document_processor
+from app.services.pipeline_service import pipeline_manager
+from app.services.research_jobs import research_jobs
+from app.services.entity_resolution import entity_resolver
+from app.services.service_matching import backfill_match_keys
 from app.core.logging import setup_logging
 from app.api.v1.router import api_router
 from app.core.exceptions import ScrapingSystemException
@@ -33,13 +40,29 @@ async def lifespan(app: FastAPI):
     await init_db()
     logger.info("Database initialized")
     
+    # Index services stored before duplicate matching keys existed
+    async with async_session_factory() as session:
+        await backfill_match_keys(session)
+    
     # TODO: Initialize agent orchestrator
     # TODO: Start background tasks
     
+    # Pick up research sessions a previous process didn't finish
+    if settings.RESEARCH_RESUME_ON_STARTUP:
+        resumed = await research_jobs.resume_unfinished()
+        logger.info(f"Resumed {len(resumed)} interrupted research sessions")
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Mount Isa Service Map Scraping System...")
+    # Stop the work first so nothing in flight runs into a closed client
+    await research_jobs.close()
+    await pipeline_manager.close()
+    await entity_resolver.close()
+    await render_pool.close()
+    await http_client.close()
+    document_processor.close()
 
 
 # Create FastAPI application
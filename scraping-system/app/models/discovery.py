@@ -23,6 +23,8 @@ class ExtractionMethod(str, Enum):
     PAGE_BASED = "page_based"
     PATTERN_BASED = "pattern_based"
     ML_BASED = "ml_based"
+    STRUCTURED_DATA = "structured_data"
+    DOCUMENT = "document"
 
 
 class DiscoveryOptions(BaseModel):
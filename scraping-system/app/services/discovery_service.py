@@ -3,9 +3,10 @@ Discovery service for business logic
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, desc, func
+from sqlalchemy import select, desc, func, case
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import uuid
 
 from app.models.discovery import (
@@ -13,8 +14,20 @@ from app.models.discovery import (
     DiscoveryResult, DiscoveryMetrics, DiscoveryHistory,
     CrawlResult, PageAnalysis
 )
+from app.core.config import settings
 from app.core.database import ServiceModel, DiscoveryResultModel
 from app.core.exceptions import DiscoveryException
+from app.crawling.service_keys import candidate_score, match_keys, trigram_similarity
+from app.services.service_matching import ServiceCandidate, ServiceMatcher
+
+# Contact fields a later discovery fills in when a stored service lacks them,
+# and the match key each one is indexed under
+FILL_FIELDS = {
+    'phone': 'phone_key',
+    'email': 'email_key',
+    'website': 'website_domain',
+    'address': None
+}
 
 
 class DiscoveryService:
@@ -92,9 +105,8 @@ class DiscoveryService:
             
             self.db.add(discovery_record)
             
-            # Store individual discovered services
-            for service in result.services:
-                await self._store_discovered_service(service, discovery_id)
+            # Store the discovered services a batch at a time
+            await self._store_discovered_services(result.services, discovery_id)
             
             await self.db.commit()
             return True
@@ -106,126 +118,113 @@ class DiscoveryService:
                 discovery_id=discovery_id
             )
     
-    async def _store_discovered_service(
-        self, 
-        service: DiscoveredService, 
+    async def _store_discovered_services(
+        self,
+        services: List[DiscoveredService],
         discovery_id: str
-    ) -> bool:
-        """Store a discovered service in the database"""
+    ) -> Dict[str, int]:
+        """Insert new services and merge ones we already have.
+        
+        Each batch costs one indexed candidate query, matching the whole batch
+        against existing services, and one INSERT ... ON CONFLICT DO UPDATE
+        writing it - not a lookup, update and commit per service.
+        """
+        counts = {'inserted': 0, 'updated': 0}
+        batch_size = settings.DISCOVERY_UPSERT_BATCH_SIZE
+        matcher = ServiceMatcher(self.db)
+        
         try:
-            # Check if service already exists
-            existing_service = await self._find_similar_service(service)
-            
-            if existing_service:
-                # Update existing service with new information
-                await self._update_existing_service(existing_service.id, service)
-            else:
-                # Create new service
-                service_record = ServiceModel(
-                    id=str(uuid.uuid4()),
-                    name=service.name,
-                    description=service.description,
-                    phone=service.phone,
-                    email=service.email,
-                    website=service.website,
-                    address=service.address,
-                    suburb=service.suburb or "Mount Isa",
-                    postcode=service.postcode or "4825",
-                    state=service.state or "QLD",
-                    category=service.category or "general",
-                    operating_hours=service.operating_hours,
-                    services_offered=service.services_offered,
-                    source_url=service.source_url,
-                    extraction_method=service.extraction_method.value,
-                    confidence_score=service.confidence_score,
-                    discovery_id=discovery_id,
-                    needs_validation=service.needs_validation,
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow()
-                )
+            for start in range(0, len(services), batch_size):
+                batch = services[start:start + batch_size]
+                candidates = await matcher.find_candidates_batch(batch)
+                rows, updated = self._resolve_batch(batch, candidates, discovery_id)
                 
-                self.db.add(service_record)
+                await self.db.execute(self._upsert_statement(rows))
+                counts['updated'] += updated
+                counts['inserted'] += len(rows) - updated
             
-            return True
+            return counts
             
         except Exception as e:
             raise DiscoveryException(
-                f"Failed to store discovered service: {str(e)}",
-                service_name=service.name
+                f"Failed to store discovered services: {str(e)}",
+                discovery_id=discovery_id
             )
     
-    async def _find_similar_service(self, service: DiscoveredService) -> Optional[ServiceModel]:
-        """Find similar existing service"""
-        try:
-            # Look for services with same name or phone number
-            conditions = []
-            
-            if service.name:
-                conditions.append(ServiceModel.name.ilike(f"%{service.name}%"))
-            
-            if service.phone:
-                conditions.append(ServiceModel.phone == service.phone)
-            
-            if service.email:
-                conditions.append(ServiceModel.email == service.email)
-            
-            if not conditions:
-                return None
-            
-            stmt = select(ServiceModel).where(and_(*conditions))
-            result = await self.db.execute(stmt)
-            return result.scalar_one_or_none()
-            
-        except Exception as e:
-            # If similarity check fails, assume no similar service
-            return None
+    def _resolve_batch(
+        self,
+        services: List[DiscoveredService],
+        candidates: List[List[ServiceCandidate]],
+        discovery_id: str
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """Build one row per target service; returns the rows and how many update existing ones"""
+        now = datetime.utcnow()
+        min_score = settings.SERVICE_MATCH_MIN_SCORE
+        min_name = settings.SERVICE_MATCH_MIN_NAME_SIMILARITY
+        rows: Dict[uuid.UUID, Dict[str, Any]] = {}
+        existing_ids = set()
+        
+        # Services earlier in the batch are candidates too, scored the same way
+        pending: List[Dict[str, Any]] = []
+        
+        for service, found in zip(services, candidates):
+            # Shared contact details alone don't make a duplicate - services of
+            # one organisation often share a switchboard - so names must agree too
+            target_id, best_score = None, min_score
+            for candidate in found:
+                if candidate.score >= min_score and candidate.name_similarity >= min_name:
+                    target_id, best_score = candidate.id, candidate.score
+                    break
+            
+            keys = match_keys(service)
+            for row in pending:
+                similarity = trigram_similarity(keys['name_key'], row['name_key'])
+                if similarity < min_name:
+                    continue
+                score = candidate_score(keys, row, similarity)
+                if score >= best_score and (target_id is None or score > best_score):
+                    target_id, best_score = row['id'], score
+            
+            if target_id is None:
+                row = _service_row(service, uuid.uuid4(), discovery_id, now)
+                rows[row['id']] = row
+                pending.append(row)
+            elif target_id in rows:
+                _merge_service(rows[target_id], service)
+            else:
+                rows[target_id] = _service_row(service, target_id, discovery_id, now)
+                existing_ids.add(target_id)
+        
+        return list(rows.values()), len(existing_ids)
     
-    async def _update_existing_service(
-        self, 
-        service_id: str, 
-        new_service_data: DiscoveredService
-    ) -> bool:
-        """Update existing service with new discovery data"""
-        try:
-            stmt = select(ServiceModel).where(ServiceModel.id == service_id)
-            result = await self.db.execute(stmt)
-            existing_service = result.scalar_one_or_none()
-            
-            if not existing_service:
-                return False
-            
-            # Update fields that are missing or have lower confidence
-            if not existing_service.phone and new_service_data.phone:
-                existing_service.phone = new_service_data.phone
-            
-            if not existing_service.email and new_service_data.email:
-                existing_service.email = new_service_data.email
-            
-            if not existing_service.website and new_service_data.website:
-                existing_service.website = new_service_data.website
-            
-            if not existing_service.address and new_service_data.address:
-                existing_service.address = new_service_data.address
-            
-            if not existing_service.operating_hours and new_service_data.operating_hours:
-                existing_service.operating_hours = new_service_data.operating_hours
-            
-            # Update confidence score if new discovery has higher confidence
-            if new_service_data.confidence_score > existing_service.confidence_score:
-                existing_service.confidence_score = new_service_data.confidence_score
-                existing_service.extraction_method = new_service_data.extraction_method.value
-            
-            existing_service.updated_at = datetime.utcnow()
-            
-            await self.db.commit()
-            return True
-            
-        except Exception as e:
-            await self.db.rollback()
-            raise DiscoveryException(
-                f"Failed to update existing service: {str(e)}",
-                service_id=service_id
-            )
+    def _upsert_statement(self, rows: List[Dict[str, Any]]):
+        """INSERT the batch, merging rows that already exist as one update at a time did"""
+        services = ServiceModel.__table__
+        stmt = pg_insert(services).values(rows)
+        existing, new = services.c, stmt.excluded
+        
+        # Fill fields that are missing, with their match keys; never overwrite ones we have
+        filled = {}
+        for name, key in FILL_FIELDS.items():
+            missing = func.nullif(existing[name], '').is_(None)
+            for column in filter(None, (name, key)):
+                filled[column] = case((missing, new[column]), else_=existing[column])
+        
+        newer = new.confidence_score > func.coalesce(existing.confidence_score, 0.0)
+        
+        return stmt.on_conflict_do_update(
+            index_elements=[existing.id],
+            set_={
+                **filled,
+                'operating_hours': func.coalesce(existing.operating_hours, new.operating_hours),
+                # Take the extraction with the higher confidence
+                'confidence_score': case((newer, new.confidence_score), else_=existing.confidence_score),
+                'extraction_method': case((newer, new.extraction_method), else_=existing.extraction_method),
+                'updated_at': new.updated_at,
+                # New details may link it to other services
+                'resolved_at': None
+            }
+        )
     
     async def get_discovery_metrics(
         self, 
@@ -450,4 +449,48 @@ class DiscoveryService:
             "active_discoveries": 0,
             "completed_today": 0,
             "average_wait_time": 0.0
-        }
\ No newline at end of file
+        }
+
+
+def _service_row(
+    service: DiscoveredService,
+    service_id: uuid.UUID,
+    discovery_id: str,
+    now: datetime
+) -> Dict[str, Any]:
+    """Row for a discovered service, inserted as is or merged into service_id"""
+    return {
+        'id': service_id,
+        'name': service.name,
+        'description': service.description,
+        'phone': service.phone,
+        'email': service.email,
+        'website': service.website,
+        'address': service.address,
+        'suburb': service.suburb or "Mount Isa",
+        'postcode': service.postcode or "4825",
+        'state': service.state or "QLD",
+        'category': service.category or "general",
+        'operating_hours': service.operating_hours,
+        'services_offered': service.services_offered,
+        'source_url': service.source_url,
+        'extraction_method': service.extraction_method.value,
+        'confidence_score': service.confidence_score,
+        'discovery_id': discovery_id,
+        'needs_validation': service.needs_validation,
+        **match_keys(service),
+        'created_at': now,
+        'updated_at': now
+    }
+
+
+def _merge_service(row: Dict[str, Any], service: DiscoveredService):
+    """Merge another discovery of the same service into a pending row"""
+    for name in (*FILL_FIELDS, 'operating_hours'):
+        if not row[name] and getattr(service, name):
+            row[name] = getattr(service, name)
+    row.update(match_keys(row))
+    
+    if service.confidence_score > row['confidence_score']:
+        row['confidence_score'] = service.confidence_score
+        row['extraction_method'] = service.extraction_method.value
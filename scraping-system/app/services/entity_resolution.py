@@ -0,0 +1,330 @@
+"""
+Entity resolution - merges services that different sources stored separately
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, or_, select, update
+
+from app.core.config import settings
+from app.core.database import ServiceModel, async_session_factory
+from app.core.logging import get_logger
+from app.crawling.record_linkage import (
+    LinkageRecord, UnionFind, candidate_pairs, canonical_record,
+    init_linkage_worker, score_pairs
+)
+
+logger = get_logger(__name__)
+
+# Columns linkage and choosing canonical records need
+RESOLUTION_COLUMNS = (
+    'id', 'name', 'description', 'phone', 'email', 'website', 'address', 'operating_hours',
+    'latitude', 'longitude', 'confidence_score', 'created_at', 'resolved_at'
+)
+
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+class ResolutionJob:
+    """One entity resolution run in the background, polled for its outcome"""
+    
+    def __init__(self, full: bool = False, dry_run: bool = False):
+        self.job_id = str(uuid.uuid4())
+        self.full = full
+        self.dry_run = dry_run
+        
+        self.status = 'queued'
+        self.submitted_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.completed_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        self.result: Optional[Dict[str, Any]] = None
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+    
+    async def run(self, resolver: 'EntityResolver'):
+        """Run the resolution, recording the outcome on the job"""
+        try:
+            self.status = 'running'
+            self.started_at = datetime.utcnow()
+            self.result = await resolver.run(full=self.full, dry_run=self.dry_run)
+            self.status = 'completed'
+        
+        except asyncio.CancelledError:
+            self.status = 'cancelled'
+            raise
+        
+        except Exception as e:
+            logger.error(f"Entity resolution job {self.job_id} failed: {e}")
+            self.status = 'failed'
+            self.error = str(e)
+        
+        finally:
+            self.completed_at = datetime.utcnow()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get the job's status, and its result once finished"""
+        return {
+            'job_id': self.job_id,
+            'mode': 'full' if self.full else 'incremental',
+            'dry_run': self.dry_run,
+            'status': self.status,
+            'submitted_at': self.submitted_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'error': self.error,
+            'result': self.result
+        }
+
+
+class EntityResolver:
+    """Resolves active services that describe the same organisation into one.
+    
+    Research agents, discovery, the research runner script and the JS scrapers
+    all write to the services table, each with its own spelling of names,
+    phones and addresses. A run blocks records on phone digits, email domain,
+    distinctive name tokens and geohash, scores the pairs sharing a block on
+    field similarity, and joins matching pairs with union-find. Each cluster
+    keeps its most confident record, filled in from the rest, and the others
+    are deactivated and point at it through entity_id.
+    
+    Incremental runs only score pairs involving services added or changed
+    since they were last resolved. Large runs are scored across processes.
+    Dry runs report the clusters they would merge and change nothing.
+    """
+    
+    def __init__(
+        self,
+        min_score: Optional[float] = None,
+        min_name_similarity: Optional[float] = None,
+        max_block_size: Optional[int] = None,
+        workers: Optional[int] = None,
+        max_finished: int = 20
+    ):
+        self.min_score = settings.ENTITY_RESOLUTION_MIN_SCORE if min_score is None else min_score
+        self.min_name_similarity = (
+            settings.ENTITY_RESOLUTION_MIN_NAME_SIMILARITY if min_name_similarity is None else min_name_similarity
+        )
+        self.max_block_size = max_block_size or settings.ENTITY_RESOLUTION_MAX_BLOCK_SIZE
+        self.workers = workers or settings.ENTITY_RESOLUTION_WORKERS or os.cpu_count() or 1
+        self._lock = asyncio.Lock()
+        
+        # Background runs, so a full-catalog resolution never holds a request open
+        self.max_finished = max_finished
+        self.jobs: Dict[str, ResolutionJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        
+        self.stats = {
+            'runs': 0,
+            'records_resolved': 0,
+            'pairs_scored': 0,
+            'pairs_matched': 0,
+            'clusters_merged': 0,
+            'services_merged': 0,
+            'oversized_blocks': 0,
+            'last_run': None
+        }
+    
+    def submit(self, full: bool = False, dry_run: bool = False) -> ResolutionJob:
+        """Start a run in the background; returns immediately with the queued job"""
+        self._forget_finished()
+        
+        job = ResolutionJob(full=full, dry_run=dry_run)
+        self.jobs[job.job_id] = job
+        self._tasks[job.job_id] = asyncio.create_task(job.run(self))
+        
+        logger.info(f"Submitted entity resolution job {job.job_id}")
+        return job
+    
+    def get(self, job_id: str) -> Optional[ResolutionJob]:
+        return self.jobs.get(job_id)
+    
+    def list(self) -> List[ResolutionJob]:
+        """Jobs, most recently submitted first"""
+        return sorted(self.jobs.values(), key=lambda job: job.submitted_at, reverse=True)
+    
+    def _forget_finished(self):
+        """Keep only the most recent finished jobs"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            self.jobs.pop(job_id, None)
+            self._tasks.pop(job_id, None)
+    
+    async def close(self):
+        """Cancel runs that are still going"""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+    
+    async def run(self, full: bool = False, dry_run: bool = False) -> Dict[str, Any]:
+        """Resolve new and changed services, or with `full` every active service"""
+        async with self._lock:
+            started = time.monotonic()
+            async with async_session_factory() as session:
+                stmt = select(*(ServiceModel.__table__.c[name] for name in RESOLUTION_COLUMNS)).where(
+                    ServiceModel.is_active.is_(True)
+                )
+                services = [dict(row) for row in (await session.execute(stmt)).mappings()]
+                
+                changed = None if full else {
+                    position for position, service in enumerate(services) if service['resolved_at'] is None
+                }
+                if changed is not None and not changed:
+                    summary = self._finish(started, full, dry_run, 0, 0, [])
+                    if dry_run:
+                        summary['clusters'] = []
+                    return summary
+                
+                records = [LinkageRecord.from_service(service) for service in services]
+                pairs, block_stats = candidate_pairs(records, changed, self.max_block_size)
+                matches = await self._score(records, sorted(pairs))
+                
+                union_find = UnionFind(len(records))
+                for a, b, _ in matches:
+                    union_find.union(a, b)
+                groups = union_find.groups()
+                clusters = [canonical_record(services[position] for position in group) for group in groups]
+                
+                resolved_ids = [
+                    services[position]['id']
+                    for position in (range(len(services)) if changed is None else changed)
+                ]
+                if not dry_run:
+                    await self._store(session, clusters, resolved_ids)
+                    await session.commit()
+            
+            self.stats['oversized_blocks'] += block_stats['oversized_blocks']
+            summary = self._finish(started, full, dry_run, len(resolved_ids), len(pairs), clusters, len(matches))
+            if dry_run:
+                names = {service['id']: service['name'] for service in services}
+                summary['clusters'] = [
+                    {
+                        'canonical': {'id': str(cluster.canonical_id), 'name': names[cluster.canonical_id]},
+                        'duplicates': [
+                            {'id': str(member), 'name': names[member]}
+                            for member in cluster.member_ids if member != cluster.canonical_id
+                        ],
+                        'updates': sorted(cluster.updates)
+                    }
+                    for cluster in clusters
+                ]
+            return summary
+    
+    async def _score(self, records: List[LinkageRecord], pairs: List[Tuple[int, int]]) -> List[Tuple[int, int, float]]:
+        """Score candidate pairs, across worker processes when there are many"""
+        loop = asyncio.get_running_loop()
+        if self.workers < 2 or len(pairs) < settings.ENTITY_RESOLUTION_PARALLEL_MIN_PAIRS:
+            return await loop.run_in_executor(
+                None, score_pairs, pairs, self.min_score, self.min_name_similarity, records
+            )
+        
+        chunk_size = settings.ENTITY_RESOLUTION_CHUNK_SIZE
+        # The records go to each worker once; tasks only carry positions
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_linkage_worker,
+            initargs=(records,)
+        )
+        try:
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(
+                    executor, score_pairs, pairs[start:start + chunk_size], self.min_score, self.min_name_similarity
+                )
+                for start in range(0, len(pairs), chunk_size)
+            ))
+        finally:
+            # When cancelled or failed, drop the chunks no worker has started. Joining
+            # the workers waits for the ones they're scoring, so it stays off the event loop
+            await loop.run_in_executor(None, partial(executor.shutdown, wait=True, cancel_futures=True))
+        return [match for chunk in chunks for match in chunk]
+    
+    async def _store(self, session, clusters: Sequence[Any], resolved_ids: Sequence[Any]):
+        """Point every member at its canonical record and fill that record in"""
+        now = datetime.utcnow()
+        services = ServiceModel.__table__
+        
+        for cluster in clusters:
+            duplicates = [member for member in cluster.member_ids if member != cluster.canonical_id]
+            
+            await session.execute(
+                update(services)
+                .where(services.c.id == cluster.canonical_id)
+                .values(**cluster.updates, entity_id=cluster.canonical_id, resolved_at=now, updated_at=now)
+            )
+            # Including services merged into a duplicate on earlier runs
+            await session.execute(
+                update(services)
+                .where(or_(services.c.id.in_(duplicates), services.c.entity_id.in_(duplicates)))
+                .values(entity_id=cluster.canonical_id, is_active=False, resolved_at=now, updated_at=now)
+            )
+        
+        # Everything else compared this run stands on its own for now
+        await session.execute(
+            update(services)
+            .where(services.c.id.in_(resolved_ids))
+            .values(entity_id=func.coalesce(services.c.entity_id, services.c.id), resolved_at=now)
+        )
+    
+    def _finish(
+        self,
+        started: float,
+        full: bool,
+        dry_run: bool,
+        resolved: int,
+        pairs: int,
+        clusters: Sequence[Any],
+        matches: int = 0
+    ) -> Dict[str, Any]:
+        merged = sum(len(cluster.member_ids) - 1 for cluster in clusters)
+        
+        self.stats['runs'] += 1
+        self.stats['pairs_scored'] += pairs
+        self.stats['pairs_matched'] += matches
+        self.stats['last_run'] = datetime.utcnow().isoformat()
+        if not dry_run:
+            self.stats['records_resolved'] += resolved
+            self.stats['clusters_merged'] += len(clusters)
+            self.stats['services_merged'] += merged
+        
+        summary = {
+            'mode': 'full' if full else 'incremental',
+            'dry_run': dry_run,
+            'records_resolved': resolved,
+            'pairs_scored': pairs,
+            'pairs_matched': matches,
+            'clusters_merged': len(clusters),
+            'services_merged': merged,
+            'seconds': time.monotonic() - started
+        }
+        logger.info(
+            f"Entity resolution ({summary['mode']}{', dry run' if dry_run else ''}) "
+            f"merged {merged} services into {len(clusters)} "
+            f"from {pairs} candidate pairs over {resolved} records"
+        )
+        return summary
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Get entity resolution statistics"""
+        return {
+            **self.stats,
+            'workers': self.workers,
+            'min_score': self.min_score,
+            'min_name_similarity': self.min_name_similarity,
+            'jobs_running': sum(1 for job in self.jobs.values() if not job.finished)
+        }
+
+
+# Process-wide resolver, so runs never overlap
+entity_resolver = EntityResolver()
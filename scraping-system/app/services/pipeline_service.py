@@ -0,0 +1,510 @@
+"""
+In-process discovery pipeline: fetch -> parse -> extract -> validate -> store
+"""
+
+import asyncio
+import multiprocessing
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from sqlalchemy import select, func
+
+from app.agents.validation import ValidationAgent
+from app.core.config import settings
+from app.core.database import ServiceModel, async_session_factory
+from app.core.http import http_client
+from app.core.logging import get_logger
+from app.crawling.archive import page_archive
+from app.crawling.documents import document_kind, document_processor, supported_document_types
+from app.crawling.extraction import ServiceExtractor
+from app.crawling.fetch import fetch_page
+from app.crawling.host_scheduler import host_scheduler
+from app.crawling.page_parser import init_parser_worker, parse_page
+from app.crawling.robots import robots_cache
+from app.crawling.simhash import near_duplicate_index
+from app.services.service_matching import apply_match_keys
+
+logger = get_logger(__name__)
+
+# Parsing is CPU-bound, so every pipeline shares one pool of worker processes
+_parse_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_parse_executor() -> ProcessPoolExecutor:
+    global _parse_executor
+    if _parse_executor is None:
+        _parse_executor = ProcessPoolExecutor(
+            max_workers=settings.PIPELINE_PARSE_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_parser_worker
+        )
+    return _parse_executor
+
+
+def shutdown_parse_executor():
+    """Stop the parse worker processes"""
+    global _parse_executor
+    if _parse_executor is not None:
+        _parse_executor.shutdown(wait=False, cancel_futures=True)
+        _parse_executor = None
+
+
+@dataclass
+class PageItem:
+    """A page moving through the fetch, parse and extract stages"""
+    url: str
+    depth: int
+    page: Any = None
+    parsed: Optional[Dict[str, Any]] = None
+
+
+class PipelineStage:
+    """A bounded queue and the workers that drain it.
+    
+    Workers block on the next stage's put() when its queue is full, so a slow
+    stage throttles everything upstream of it instead of piling up memory.
+    """
+    
+    def __init__(self, name: str, concurrency: int, queue_size: int):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.busy = 0
+        self.stats = {
+            'processed': 0,
+            'failed': 0,
+            'dropped': 0,
+            'total_time': 0.0
+        }
+    
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'queue_depth': self.queue.qsize(),
+            'queue_capacity': self.queue.maxsize,
+            'concurrency': self.concurrency,
+            'busy': self.busy,
+            **self.stats,
+            'avg_time': self.stats['total_time'] / max(1, self.stats['processed'])
+        }
+
+
+class DiscoveryPipeline:
+    """Runs one discovery request end to end, from start URLs to stored services.
+    
+    Pages are fetched, parsed in worker processes, and turned into service
+    records. Each record is then run through Tier 1 validation and written to
+    the database. Follow-up links go back to the fetch stage through an
+    unbounded frontier, so a full fetch queue can never deadlock the stages
+    that feed it.
+    """
+    
+    def __init__(
+        self,
+        start_urls: List[str],
+        max_depth: int = 2,
+        options: Optional[Dict[str, Any]] = None,
+        pipeline_id: Optional[str] = None
+    ):
+        self.pipeline_id = pipeline_id or str(uuid.uuid4())
+        self.start_urls = start_urls
+        self.max_depth = max_depth
+        self.options = options or {}
+        self.respect_robots = self.options.get('respect_robots_txt', True)
+        self.follow_links = self.options.get('follow_links', True)
+        self.max_pages = self.options.get('max_pages', settings.PIPELINE_MAX_PAGES)
+        self.min_validation_score = self.options.get(
+            'min_validation_score', settings.PIPELINE_MIN_VALIDATION_SCORE
+        )
+        
+        queue_size = settings.PIPELINE_QUEUE_SIZE
+        self.stages = {
+            'fetch': PipelineStage('fetch', settings.PIPELINE_FETCH_CONCURRENCY, queue_size),
+            'parse': PipelineStage('parse', settings.PIPELINE_PARSE_WORKERS, queue_size),
+            'extract': PipelineStage('extract', settings.PIPELINE_EXTRACT_CONCURRENCY, queue_size),
+            'validate': PipelineStage('validate', settings.PIPELINE_VALIDATE_CONCURRENCY, queue_size),
+            'store': PipelineStage('store', 1, queue_size)
+        }
+        
+        self.extractor = ServiceExtractor()
+        self.validator: Optional[ValidationAgent] = None
+        self.http_session = None
+        
+        self.status = 'pending'
+        self.started_at: Optional[datetime] = None
+        self.completed_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        
+        # Frontier and page accounting
+        self._frontier: Deque[PageItem] = deque()
+        self._frontier_ready = asyncio.Event()
+        self._seen_urls: Set[str] = set()
+        self._pages_pending = 0
+        self._pages_done = asyncio.Event()
+        
+        self.stats = {
+            'pages_scheduled': 0,
+            'pages_fetched': 0,
+            'near_duplicates_skipped': 0,
+            'services_extracted': 0,
+            'services_rejected': 0,
+            'services_stored': 0,
+            'services_updated': 0
+        }
+    
+    async def run(self) -> Dict[str, Any]:
+        """Run the pipeline until every page and service has been handled"""
+        self.status = 'running'
+        self.started_at = datetime.utcnow()
+        self.http_session = http_client.create_session()
+        self.validator = ValidationAgent(f"pipeline_validator_{self.pipeline_id[:8]}", {'timeout': 30})
+        
+        workers = [asyncio.create_task(self._feed_frontier())]
+        workers += self._start_workers('fetch', self._fetch)
+        workers += self._start_workers('parse', self._parse)
+        workers += self._start_workers('extract', self._extract)
+        workers += self._start_workers('validate', self._validate, next_stage='store')
+        workers.append(asyncio.create_task(self._store_worker()))
+        
+        try:
+            for url in self.start_urls:
+                self._schedule(url, 0)
+            
+            if self._pages_pending:
+                await self._pages_done.wait()
+            
+            # Pages are done; let the service records already in flight drain
+            await self.stages['validate'].queue.join()
+            await self.stages['store'].queue.join()
+            
+            self.status = 'completed'
+        
+        except Exception as e:
+            self.status = 'failed'
+            self.error = str(e)
+            logger.error(f"Pipeline {self.pipeline_id} failed: {e}")
+        
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            await self.http_session.close()
+            # The validator is only used for its checks, so it's never started or stopped
+            await self.validator.close()
+            self.completed_at = datetime.utcnow()
+        
+        logger.info(
+            f"Pipeline {self.pipeline_id} {self.status}: "
+            f"{self.stats['pages_fetched']} pages, {self.stats['services_stored']} services stored"
+        )
+        return self.get_status()
+    
+    # Scheduling
+    
+    def _schedule(self, url: str, depth: int):
+        """Add a URL to the frontier unless it's been seen or the page budget is spent"""
+        if url in self._seen_urls or len(self._seen_urls) >= self.max_pages:
+            return
+        
+        self._seen_urls.add(url)
+        self._pages_pending += 1
+        self.stats['pages_scheduled'] += 1
+        self._frontier.append(PageItem(url=url, depth=depth))
+        self._frontier_ready.set()
+    
+    def _page_done(self):
+        self._pages_pending -= 1
+        if self._pages_pending <= 0:
+            self._pages_done.set()
+    
+    async def _feed_frontier(self):
+        """Move frontier URLs into the fetch queue as it makes room"""
+        while True:
+            await self._frontier_ready.wait()
+            while self._frontier:
+                await self.stages['fetch'].queue.put(self._frontier.popleft())
+            self._frontier_ready.clear()
+    
+    def _start_workers(
+        self,
+        stage_name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        next_stage: Optional[str] = None
+    ) -> List[asyncio.Task]:
+        stage = self.stages[stage_name]
+        return [
+            asyncio.create_task(self._stage_worker(stage, handler, next_stage))
+            for _ in range(stage.concurrency)
+        ]
+    
+    async def _stage_worker(
+        self,
+        stage: PipelineStage,
+        handler: Callable[[Any], Awaitable[Any]],
+        next_stage: Optional[str]
+    ):
+        """Take items off a stage's queue and hand the results to the next stage.
+        
+        Page stages hand PageItems on to the next page stage. A page that is
+        dropped, fails, or reaches the end of the extract stage counts as done.
+        """
+        page_stage = stage.name in ('fetch', 'parse', 'extract')
+        page_next = {'fetch': 'parse', 'parse': 'extract'}.get(stage.name)
+        next_stage = next_stage or page_next
+        
+        while True:
+            item = await stage.queue.get()
+            stage.busy += 1
+            started = time.monotonic()
+            result = None
+            failed = False
+            
+            try:
+                result = await handler(item)
+                stage.stats['processed'] += 1
+            except Exception as e:
+                failed = True
+                stage.stats['failed'] += 1
+                logger.warning(f"Pipeline {self.pipeline_id} {stage.name} stage failed: {e}")
+            finally:
+                stage.stats['total_time'] += time.monotonic() - started
+                stage.busy -= 1
+            
+            try:
+                if result is not None and next_stage:
+                    # Blocks while the next stage is full - this is the backpressure
+                    await self.stages[next_stage].queue.put(result)
+                elif page_stage:
+                    if result is None and not failed and stage.name != 'extract':
+                        stage.stats['dropped'] += 1
+                    self._page_done()
+            finally:
+                stage.queue.task_done()
+    
+    # Stages
+    
+    async def _fetch(self, item: PageItem) -> Optional[PageItem]:
+        """Download a page, honouring robots.txt and per-host politeness"""
+        if self.respect_robots and not await robots_cache.can_fetch(self.http_session, item.url):
+            return None
+        
+        await host_scheduler.wait(item.url)
+        
+        allowed_types = list(settings.ALLOWED_CONTENT_TYPES) + supported_document_types()
+        page = await fetch_page(self.http_session, item.url, allowed_types=allowed_types)
+        if page.status != 200:
+            return None
+        
+        self.stats['pages_fetched'] += 1
+        if settings.ARCHIVE_ENABLED:
+            await page_archive.store(page)
+        
+        item.page = page
+        return item
+    
+    async def _parse(self, item: PageItem) -> Optional[PageItem]:
+        """Parse HTML in a worker process, or documents in the document pool"""
+        page = item.page
+        
+        if document_kind(page.content_type):
+            services = []
+            async for document_page in document_processor.iter_pages(page.body, page.content_type, item.url):
+                services.extend(
+                    self.extractor.extract_document_page(document_page.text, item.url, document_page.page_number)
+                )
+            item.parsed = {'services': services, 'links': [], 'fingerprint': None}
+        else:
+            loop = asyncio.get_running_loop()
+            item.parsed = await loop.run_in_executor(
+                get_parse_executor(),
+                parse_page,
+                item.url,
+                page.text,
+                self.follow_links and item.depth < self.max_depth
+            )
+        
+        # The body isn't needed past this point
+        item.page = None
+        return item
+    
+    async def _extract(self, item: PageItem) -> None:
+        """Drop near-duplicate pages, queue follow-up links and emit service records"""
+        parsed = item.parsed
+        
+        fingerprint = parsed.get('fingerprint')
+        if fingerprint is not None:
+            if near_duplicate_index.find_near_duplicate(fingerprint, exclude_url=item.url):
+                self.stats['near_duplicates_skipped'] += 1
+                return None
+            near_duplicate_index.add(item.url, fingerprint)
+        
+        for link in parsed.get('links', []):
+            self._schedule(link, item.depth + 1)
+        
+        for service in parsed.get('services', []):
+            service['pipeline_id'] = self.pipeline_id
+            service['depth'] = item.depth
+            self.stats['services_extracted'] += 1
+            await self.stages['validate'].queue.put(service)
+        
+        return None
+    
+    async def _validate(self, service: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Run Tier 1 validation and keep services that score well enough"""
+        result = await self.validator._validate_service_data({'service_data': service})
+        summary = result.get('validation_summary')
+        
+        if result.get('status') != 'completed' or summary['overall_score'] < self.min_validation_score:
+            self.stats['services_rejected'] += 1
+            return None
+        
+        validated = dict(summary['validated_data'])
+        validated['validation_score'] = summary['overall_score']
+        return validated
+    
+    async def _store_worker(self):
+        """Write validated services to the database in batches"""
+        stage = self.stages['store']
+        batch_size = settings.PIPELINE_STORE_BATCH_SIZE
+        
+        while True:
+            batch = [await stage.queue.get()]
+            while len(batch) < batch_size and not stage.queue.empty():
+                batch.append(stage.queue.get_nowait())
+            
+            stage.busy = 1
+            started = time.monotonic()
+            try:
+                await self._store_batch(batch)
+                stage.stats['processed'] += len(batch)
+            except Exception as e:
+                stage.stats['failed'] += len(batch)
+                logger.error(f"Pipeline {self.pipeline_id} failed to store {len(batch)} services: {e}")
+            finally:
+                stage.stats['total_time'] += time.monotonic() - started
+                stage.busy = 0
+                for _ in batch:
+                    stage.queue.task_done()
+    
+    async def _store_batch(self, services: List[Dict[str, Any]]):
+        """Insert new services and fill gaps in ones we already have"""
+        async with async_session_factory() as session:
+            for service in services:
+                stmt = select(ServiceModel).where(
+                    func.lower(ServiceModel.name) == service['name'].lower(),
+                    ServiceModel.suburb == (service.get('suburb') or 'Mount Isa')
+                )
+                existing = (await session.execute(stmt)).scalars().first()
+                
+                if existing:
+                    for field_name in ('description', 'phone', 'email', 'website', 'address', 'operating_hours'):
+                        if not getattr(existing, field_name) and service.get(field_name):
+                            setattr(existing, field_name, service[field_name])
+                    apply_match_keys(existing)
+                    existing.confidence_score = max(existing.confidence_score or 0.0, service.get('confidence_score', 0.0))
+                    source_urls = list(existing.source_urls or [])
+                    if service.get('source_url') and service['source_url'] not in source_urls:
+                        existing.source_urls = source_urls + [service['source_url']]
+                    self.stats['services_updated'] += 1
+                else:
+                    new_service = ServiceModel(
+                        name=service['name'],
+                        category=service.get('category') or 'general',
+                        description=service.get('description'),
+                        phone=service.get('phone'),
+                        email=service.get('email'),
+                        website=service.get('website'),
+                        address=service.get('address'),
+                        suburb=service.get('suburb') or 'Mount Isa',
+                        state=service.get('state') or 'QLD',
+                        postcode=service.get('postcode') or '4825',
+                        operating_hours=service.get('operating_hours'),
+                        services_offered=service.get('services_offered'),
+                        confidence_score=service.get('confidence_score', 0.0),
+                        source_urls=[service['source_url']] if service.get('source_url') else []
+                    )
+                    apply_match_keys(new_service)
+                    session.add(new_service)
+                    self.stats['services_stored'] += 1
+            
+            await session.commit()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get pipeline progress, including each stage's queue depth"""
+        elapsed = None
+        if self.started_at:
+            elapsed = ((self.completed_at or datetime.utcnow()) - self.started_at).total_seconds()
+        
+        return {
+            'pipeline_id': self.pipeline_id,
+            'status': self.status,
+            'start_urls': self.start_urls,
+            'max_depth': self.max_depth,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'elapsed_seconds': elapsed,
+            'error': self.error,
+            'frontier_size': len(self._frontier),
+            'pages_in_flight': self._pages_pending,
+            'stages': {name: stage.snapshot() for name, stage in self.stages.items()},
+            **self.stats
+        }
+
+
+class PipelineManager:
+    """Tracks pipeline runs so their progress can be polled"""
+    
+    def __init__(self, max_finished: int = 50):
+        self.max_finished = max_finished
+        self.pipelines: Dict[str, DiscoveryPipeline] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+    
+    def start(
+        self,
+        start_urls: List[str],
+        max_depth: int = 2,
+        options: Optional[Dict[str, Any]] = None
+    ) -> DiscoveryPipeline:
+        """Start a pipeline in the background"""
+        self._forget_finished()
+        
+        pipeline = DiscoveryPipeline(start_urls, max_depth=max_depth, options=options)
+        self.pipelines[pipeline.pipeline_id] = pipeline
+        self._tasks[pipeline.pipeline_id] = asyncio.create_task(pipeline.run())
+        return pipeline
+    
+    def get(self, pipeline_id: str) -> Optional[DiscoveryPipeline]:
+        return self.pipelines.get(pipeline_id)
+    
+    def _forget_finished(self):
+        """Keep only the most recent finished runs"""
+        finished = [
+            pipeline_id for pipeline_id, pipeline in self.pipelines.items()
+            if pipeline.status in ('completed', 'failed')
+        ]
+        for pipeline_id in finished[:max(0, len(finished) - self.max_finished)]:
+            self.pipelines.pop(pipeline_id, None)
+            self._tasks.pop(pipeline_id, None)
+    
+    async def close(self):
+        """Cancel running pipelines and stop the parse workers"""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        shutdown_parse_executor()
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Summarize every tracked pipeline"""
+        return {
+            'running': sum(1 for p in self.pipelines.values() if p.status == 'running'),
+            'tracked': len(self.pipelines),
+            'pipelines': [pipeline.get_status() for pipeline in self.pipelines.values()]
+        }
+
+
+# Process-wide registry of pipeline runs
+pipeline_manager = PipelineManager()
@@ -0,0 +1,269 @@
+"""
+Research jobs - research runs submitted in the background and polled for progress
+"""
+
+import asyncio
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.exceptions import ResearchException
+from app.core.logging import get_logger
+from app.crawling.checkpoints import ResearchCheckpoint, list_unfinished_checkpoints
+from app.services.research_service import ResearchOrchestrator
+
+logger = get_logger(__name__)
+
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+class ResearchJob:
+    """One research run, with its progress, partial results and final insights"""
+    
+    def __init__(
+        self,
+        research_type: str = "comprehensive",
+        target_service_types: Optional[List[str]] = None,
+        focus: Optional[str] = None,
+        job_id: Optional[str] = None
+    ):
+        # The job id is also the research id its checkpoint is stored under
+        self.job_id = job_id or str(uuid.uuid4())
+        self.research_type = research_type
+        self.target_service_types = target_service_types or []
+        self.focus = focus
+        
+        self.status = 'queued'
+        self.phase = 'queued'
+        self.submitted_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.completed_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        
+        # Services found so far, and the orchestrator's result once finished
+        self.services: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        
+        self.progress = {
+            'queries_total': 0,
+            'queries_done': 0,
+            'sites_discovered': 0,
+            'sites_total': 0,
+            'sites_done': 0,
+            'services_found': 0
+        }
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+    
+    def record_progress(self, event: str, details: Dict[str, Any]):
+        """Progress listener handed to the research agent"""
+        if event == 'searching':
+            # Jobs stay queued until the orchestrator has a free research slot
+            self.status = 'running'
+            self.phase = 'searching'
+            self.started_at = datetime.utcnow()
+            self.progress['queries_total'] = details['queries_total']
+        elif event == 'search_completed':
+            self.progress['queries_done'] += 1
+        elif event == 'site_discovered':
+            # Sites are extracted while searches are still running
+            self.progress['sites_total'] += 1
+        elif event == 'extracting':
+            self.phase = 'extracting'
+            self.progress['sites_discovered'] = details['sites_discovered']
+            self.progress['sites_total'] = details['sites_total']
+        elif event == 'site_extracted':
+            self.progress['sites_done'] += 1
+            self.services.extend(details['services'])
+            self.progress['services_found'] = len(self.services)
+    
+    async def run(self, orchestrator: ResearchOrchestrator):
+        """Run the research, recording the outcome on the job"""
+        try:
+            result = await orchestrator.start_intelligent_research(
+                research_type=self.research_type,
+                target_service_types=self.target_service_types or None,
+                research_id=self.job_id,
+                on_progress=self.record_progress
+            )
+            
+            self.result = result
+            self.status = result.get('status', 'failed')
+            self.error = result.get('error') or result.get('processing_error')
+            if self.error:
+                self.status = 'failed'
+        
+        except asyncio.CancelledError:
+            self.status = 'cancelled'
+            raise
+        
+        except Exception as e:
+            logger.error(f"Research job {self.job_id} failed: {e}")
+            self.status = 'failed'
+            self.error = str(e)
+        
+        finally:
+            self.phase = self.status
+            self.completed_at = datetime.utcnow()
+    
+    def get_status(self, include_services: bool = False, services_limit: int = 50) -> Dict[str, Any]:
+        """Get the job's progress, plus its partial or final results"""
+        elapsed = None
+        if self.started_at:
+            elapsed = ((self.completed_at or datetime.utcnow()) - self.started_at).total_seconds()
+        
+        status = {
+            'job_id': self.job_id,
+            'research_id': self.job_id,
+            'research_type': self.research_type,
+            'target_service_types': self.target_service_types,
+            'focus': self.focus,
+            'status': self.status,
+            'phase': self.phase,
+            'submitted_at': self.submitted_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'elapsed_seconds': elapsed,
+            'error': self.error,
+            'progress': dict(self.progress)
+        }
+        
+        if self.result and self.status == 'completed':
+            status['result'] = {
+                key: self.result.get(key)
+                for key in (
+                    'services_discovered', 'high_quality_services', 'sites_researched',
+                    'service_categories', 'insights', 'research_statistics', 'processing_time'
+                )
+            }
+        
+        if include_services:
+            services = self.result.get('detailed_services', []) if self.status == 'completed' else self.services
+            status['services'] = services[:services_limit]
+        
+        return status
+
+
+class ResearchJobStore:
+    """Runs research jobs in the background and keeps them so they can be polled"""
+    
+    def __init__(self, orchestrator: Optional[ResearchOrchestrator] = None, max_finished: int = 50):
+        self.orchestrator = orchestrator or ResearchOrchestrator()
+        self.max_finished = max_finished
+        self.jobs: Dict[str, ResearchJob] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+    
+    def submit(
+        self,
+        research_type: str = "comprehensive",
+        target_service_types: Optional[List[str]] = None,
+        focus: Optional[str] = None
+    ) -> ResearchJob:
+        """Submit a research run; returns immediately with the queued job"""
+        self._forget_finished()
+        
+        job = ResearchJob(research_type, target_service_types, focus=focus)
+        self._start(job)
+        
+        logger.info(f"Submitted research job {job.job_id} ({research_type})")
+        return job
+    
+    async def resume(self, job_id: str) -> ResearchJob:
+        """Resume a cancelled or interrupted job from its checkpoint"""
+        existing = self.jobs.get(job_id)
+        if existing and not existing.finished:
+            return existing
+        
+        meta = await ResearchCheckpoint(job_id).get_meta()
+        if meta is None or meta.get('status') == 'completed':
+            raise ResearchException(f"Research job {job_id} has no checkpoint to resume from")
+        
+        self._forget_finished()
+        
+        job = ResearchJob(
+            meta['research_type'],
+            meta['target_service_types'],
+            focus=existing.focus if existing else None,
+            job_id=job_id
+        )
+        self._start(job)
+        
+        logger.info(f"Resumed research job {job_id} from its checkpoint")
+        return job
+    
+    async def resume_unfinished(self) -> List[ResearchJob]:
+        """Resume every session that was interrupted, e.g. by a restart.
+        
+        Cancelled sessions are left for an explicit resume.
+        """
+        resumed = []
+        try:
+            for meta in await list_unfinished_checkpoints():
+                if meta.get('status') == 'cancelled':
+                    continue
+                resumed.append(await self.resume(meta['research_id']))
+        except Exception as e:
+            logger.error(f"Failed to resume interrupted research: {e}")
+        return resumed
+    
+    def _start(self, job: ResearchJob):
+        self.jobs[job.job_id] = job
+        self._tasks[job.job_id] = asyncio.create_task(job.run(self.orchestrator))
+    
+    def get(self, job_id: str) -> Optional[ResearchJob]:
+        return self.jobs.get(job_id)
+    
+    async def cancel(self, job_id: str) -> Optional[ResearchJob]:
+        """Cancel a queued or running job; finished jobs are left as they are"""
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        
+        task = self._tasks.get(job_id)
+        if task and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            # Cancelled before it started running
+            if not job.finished:
+                job.status = job.phase = 'cancelled'
+                job.completed_at = datetime.utcnow()
+            # Otherwise the checkpoint still says running and a restart resumes it
+            await ResearchCheckpoint(job_id).cancel()
+            logger.info(f"Cancelled research job {job_id}")
+        
+        return job
+    
+    def list(self) -> List[ResearchJob]:
+        """Jobs, most recently submitted first"""
+        return sorted(self.jobs.values(), key=lambda job: job.submitted_at, reverse=True)
+    
+    def _forget_finished(self):
+        """Keep only the most recent finished jobs"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            self.jobs.pop(job_id, None)
+            self._tasks.pop(job_id, None)
+    
+    async def close(self):
+        """Cancel jobs that are still running"""
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Count jobs by status"""
+        by_status: Dict[str, int] = {}
+        for job in self.jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        
+        return {
+            'tracked': len(self.jobs),
+            'running': by_status.get('running', 0) + by_status.get('queued', 0),
+            'by_status': by_status
+        }
+
+
+# Process-wide job store shared by the research endpoints
+research_jobs = ResearchJobStore()
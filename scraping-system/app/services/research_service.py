@@ -5,23 +5,137 @@ Research Service - Orchestrates intelligent discovery of Mount Isa services
 import asyncio
 import json
 from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from typing import AsyncIterator, Callable, Dict, Any, List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 import uuid
 
 from app.agents.research import MountIsaResearchAgent, SearchQuery
 from app.agents.base import create_agent_task
+from app.core.config import settings
 from app.core.exceptions import ResearchException
+from app.crawling.checkpoints import ResearchCheckpoint, list_unfinished_checkpoints
+from app.crawling.search_providers import SearchProvider
 from app.core.logging import get_logger
 
 logger = get_logger(__name__)
 
 
+class ResearchTally:
+    """Running totals behind research insights, so results don't have to be kept to summarize them"""
+    
+    def __init__(self, quality_threshold: float):
+        self.quality_threshold = quality_threshold
+        
+        self.sites = 0
+        self.services = 0
+        self.high_quality = 0
+        self.categories: Dict[str, int] = {}
+        self.with_contact = 0
+        self.with_location = 0
+        self.high_confidence = 0
+        self.medium_confidence = 0
+        self.confidence_total = 0.0
+    
+    def add_site(self):
+        self.sites += 1
+    
+    def add_service(self, service: Dict[str, Any]) -> bool:
+        """Count a service; returns whether it meets the quality threshold"""
+        confidence = service.get('confidence_score', 0)
+        category = service.get('category', 'unknown')
+        
+        self.services += 1
+        self.categories[category] = self.categories.get(category, 0) + 1
+        self.confidence_total += confidence
+        
+        if service.get('phone') or service.get('email'):
+            self.with_contact += 1
+        
+        if service.get('address') or service.get('suburb'):
+            self.with_location += 1
+        
+        if confidence > 0.8:
+            self.high_confidence += 1
+        elif confidence >= 0.5:
+            self.medium_confidence += 1
+        
+        high_quality = confidence >= self.quality_threshold
+        if high_quality:
+            self.high_quality += 1
+        return high_quality
+    
+    def insights(self, stats: Dict[str, Any]) -> Dict[str, Any]:
+        """Generate insights from the totals so far"""
+        
+        insights = {
+            'service_coverage': {},
+            'data_quality': {},
+            'discovery_effectiveness': {},
+            'recommendations': []
+        }
+        
+        # Service coverage analysis
+        total_services = self.services
+        if total_services > 0:
+            insights['service_coverage'] = {
+                'total_services': total_services,
+                'categories_found': len(self.categories),
+                'category_distribution': dict(self.categories),
+                'contact_info_rate': self.with_contact / total_services,
+                'location_info_rate': self.with_location / total_services
+            }
+        
+        # Data quality analysis
+        insights['data_quality'] = {
+            'high_confidence_count': self.high_confidence,
+            'medium_confidence_count': self.medium_confidence,
+            'low_confidence_count': total_services - self.high_confidence - self.medium_confidence,
+            'average_confidence': self.confidence_total / max(1, total_services)
+        }
+        
+        # Discovery effectiveness
+        insights['discovery_effectiveness'] = {
+            'sites_discovered': self.sites,
+            'services_per_site': total_services / max(1, self.sites),
+            'search_efficiency': stats.get('avg_sites_per_search', 0),
+            'extraction_success_rate': stats.get('avg_services_per_site', 0)
+        }
+        
+        # Generate recommendations
+        recommendations = []
+        
+        if insights['data_quality']['average_confidence'] < 0.7:
+            recommendations.append("Consider refining search queries for higher quality results")
+        
+        if insights['service_coverage'].get('contact_info_rate', 0) < 0.6:
+            recommendations.append("Focus on sources with better contact information")
+        
+        if len(self.categories) < 5:
+            recommendations.append("Expand search to cover more service categories")
+        
+        if insights['discovery_effectiveness']['services_per_site'] < 0.5:
+            recommendations.append("Target more service-rich websites")
+        
+        insights['recommendations'] = recommendations
+        
+        return insights
+
+
 class ResearchOrchestrator:
     """Orchestrates intelligent research and discovery of Mount Isa services"""
     
-    def __init__(self, db_session: Optional[AsyncSession] = None):
+    def __init__(
+        self,
+        db_session: Optional[AsyncSession] = None,
+        search_provider: Optional[SearchProvider] = None,
+        agent_config: Optional[Dict[str, Any]] = None
+    ):
         self.db = db_session
+        
+        # Overrides for the agents this orchestrator creates - benchmarks swap
+        # in recorded search results and drop the politeness delays
+        self.search_provider = search_provider
+        self.agent_config = agent_config or {}
         self.research_agents = {}
         self.active_research_tasks = {}
         
@@ -33,43 +147,52 @@ class ResearchOrchestrator:
             'max_services_per_session': 200,
             'quality_threshold': 0.6
         }
+        
+        # Every session - jobs, streams and continuous batches - waits for one
+        # of these slots, and all of them share each engine's concurrency cap
+        self.research_slots = asyncio.Semaphore(self.config['max_concurrent_research'])
+        self.engine_semaphores = {
+            'google': asyncio.Semaphore(settings.RESEARCH_SEARCH_CONCURRENCY),
+            'bing': asyncio.Semaphore(settings.RESEARCH_SEARCH_CONCURRENCY)
+        }
     
     async def start_intelligent_research(
         self, 
         research_type: str = "comprehensive",
-        target_service_types: Optional[List[str]] = None
+        target_service_types: Optional[List[str]] = None,
+        research_id: Optional[str] = None,
+        on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
     ) -> Dict[str, Any]:
         """Start intelligent research to discover Mount Isa services"""
         
-        research_id = str(uuid.uuid4())
+        research_id = research_id or str(uuid.uuid4())
+        
+        async with self.research_slots:
+            return await self._run_intelligent_research(
+                research_id, research_type, target_service_types, on_progress
+            )
+    
+    async def _run_intelligent_research(
+        self,
+        research_id: str,
+        research_type: str,
+        target_service_types: Optional[List[str]],
+        on_progress: Optional[Callable[[str, Dict[str, Any]], None]]
+    ) -> Dict[str, Any]:
+        """Run one research session once it has a slot"""
+        
+        agent_id = f"research_agent_{research_id[:8]}"
         
         logger.info(f"Starting intelligent research session {research_id}")
         
         try:
             # Create research agent
-            agent_id = f"research_agent_{research_id[:8]}"
-            research_agent = MountIsaResearchAgent(
-                agent_id=agent_id,
-                config={
-                    'timeout': 60,
-                    'max_concurrent_tasks': 1,
-                    'request_delay': 2.0
-                }
-            )
-            
-            self.research_agents[agent_id] = research_agent
+            research_agent = self._create_research_agent(agent_id, on_progress)
             
             # Create research task
-            task_payload = {
-                'research_type': research_type,
-                'target_service_types': target_service_types or [],
-                'max_queries': 100 if research_type == "comprehensive" else 30,
-                'quality_threshold': self.config['quality_threshold']
-            }
-            
             research_task = await create_agent_task(
                 task_type="research_services",
-                payload=task_payload,
+                payload=self._research_payload(research_id, research_type, target_service_types),
                 priority=0.8  # High priority
             )
             
@@ -81,10 +204,6 @@ class ResearchOrchestrator:
             # Process and store results
             processed_result = await self._process_research_results(research_id, result, research_agent)
             
-            # Clean up
-            if agent_id in self.research_agents:
-                del self.research_agents[agent_id]
-            
             logger.info(
                 f"Research session {research_id} completed: "
                 f"{processed_result.get('services_discovered', 0)} services found"
@@ -100,16 +219,174 @@ class ResearchOrchestrator:
         except Exception as e:
             logger.error(f"Research session {research_id} failed: {e}")
             
-            # Clean up failed agent
-            if agent_id in self.research_agents:
-                del self.research_agents[agent_id]
-            
             return {
                 'research_id': research_id,
                 'status': 'failed',
                 'error': str(e),
                 'research_type': research_type
             }
+        
+        finally:
+            # Clean up - also when a research job is cancelled mid-run
+            research_agent = self.research_agents.pop(agent_id, None)
+            if research_agent:
+                await research_agent.close()
+    
+    async def resume_research(
+        self,
+        research_id: str,
+        on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Resume an interrupted session from its checkpoint"""
+        
+        meta = await ResearchCheckpoint(research_id).get_meta()
+        if meta is None:
+            raise ResearchException(f"No checkpoint found for research {research_id}")
+        if meta.get('status') == 'completed':
+            raise ResearchException(f"Research {research_id} has already completed")
+        
+        logger.info(f"Resuming research session {research_id} from its checkpoint")
+        
+        return await self.start_intelligent_research(
+            research_type=meta['research_type'],
+            target_service_types=meta['target_service_types'],
+            research_id=research_id,
+            on_progress=on_progress
+        )
+    
+    async def get_resumable_research(self) -> List[Dict[str, Any]]:
+        """Sessions that were interrupted before completing"""
+        return await list_unfinished_checkpoints()
+    
+    async def stream_intelligent_research(
+        self,
+        research_type: str = "comprehensive",
+        target_service_types: Optional[List[str]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run research, yielding each site and service as it's found.
+        
+        Events are 'started', then 'site' and 'service' in discovery order, then
+        'completed' with the insights, or 'failed'. A 'site_updated' event
+        resends a site once a later duplicate has merged into it. Only running totals are
+        kept, so memory doesn't grow with the number of results; closing the
+        stream stops the research.
+        """
+        
+        research_id = str(uuid.uuid4())
+        agent_id = f"research_agent_{research_id[:8]}"
+        tally = ResearchTally(self.config['quality_threshold'])
+        top_services: List[Dict[str, Any]] = []
+        completed = False
+        
+        await self.research_slots.acquire()
+        
+        try:
+            logger.info(f"Starting streamed research session {research_id}")
+            
+            yield {'event': 'started', 'research_id': research_id, 'research_type': research_type}
+            
+            research_agent = self._create_research_agent(agent_id)
+            summary: Dict[str, Any] = {}
+            
+            async for event in research_agent.iter_research(
+                self._research_payload(research_id, research_type, target_service_types)
+            ):
+                if event['type'] == 'site':
+                    tally.add_site()
+                    yield {'event': 'site', 'research_id': research_id, 'site': event['site'].__dict__}
+                elif event['type'] == 'site_updated':
+                    yield {'event': 'site_updated', 'research_id': research_id, 'site': event['site'].__dict__}
+                elif event['type'] == 'service':
+                    high_quality = tally.add_service(event['service'])
+                    if high_quality and len(top_services) < 20:
+                        top_services.append(event['service'])
+                    yield {
+                        'event': 'service',
+                        'research_id': research_id,
+                        'high_quality': high_quality,
+                        'service': event['service']
+                    }
+                elif event['type'] == 'summary':
+                    summary = event
+            
+            insights = tally.insights(research_agent.get_research_statistics())
+            
+            await self._store_research_results(research_id, {
+                'total_services': tally.services,
+                'high_quality_services': top_services,
+                'service_categories': dict(tally.categories),
+                'sites_discovered': tally.sites,
+                'insights': insights,
+                'timestamp': datetime.utcnow().isoformat()
+            })
+            
+            logger.info(f"Streamed research session {research_id} completed: {tally.services} services found")
+            completed = True
+            
+            yield {
+                'event': 'completed',
+                'research_id': research_id,
+                'research_type': research_type,
+                'services_discovered': tally.services,
+                'high_quality_services': tally.high_quality,
+                'sites_researched': tally.sites,
+                'service_categories': dict(tally.categories),
+                'insights': insights,
+                'processing_time': summary.get('processing_time', 0),
+                'research_statistics': research_agent.get_research_statistics()
+            }
+        
+        except Exception as e:
+            logger.error(f"Streamed research session {research_id} failed: {e}")
+            yield {'event': 'failed', 'research_id': research_id, 'error': str(e)}
+        
+        finally:
+            research_agent = self.research_agents.pop(agent_id, None)
+            self.research_slots.release()
+            if research_agent:
+                await research_agent.close()
+            
+            # No client is left to receive a resumed stream's results
+            if not completed and settings.RESEARCH_CHECKPOINTS_ENABLED:
+                await ResearchCheckpoint(research_id).cancel()
+    
+    def _create_research_agent(
+        self,
+        agent_id: str,
+        on_progress: Optional[Callable[[str, Dict[str, Any]], None]] = None
+    ) -> MountIsaResearchAgent:
+        """Create and register a research agent for one session"""
+        research_agent = MountIsaResearchAgent(
+            agent_id=agent_id,
+            config={
+                'timeout': 60,
+                'max_concurrent_tasks': 1,
+                'request_delay': 2.0,
+                'research_cooldown_hours': self.config['research_cooldown_hours'],
+                **self.agent_config
+            },
+            search_provider=self.search_provider,
+            on_progress=on_progress,
+            engine_semaphores=self.engine_semaphores
+        )
+        
+        self.research_agents[agent_id] = research_agent
+        return research_agent
+    
+    def _research_payload(
+        self,
+        research_id: str,
+        research_type: str,
+        target_service_types: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """Build the research task payload for a session"""
+        return {
+            'research_id': research_id,
+            'research_type': research_type,
+            'target_service_types': target_service_types or [],
+            'max_queries': 100 if research_type == "comprehensive" else 30,
+            'quality_threshold': self.config['quality_threshold']
+        }
     
     async def _process_research_results(
         self, 
@@ -180,76 +457,13 @@ class ResearchOrchestrator:
     ) -> Dict[str, Any]:
         """Generate insights from research results"""
         
-        insights = {
-            'service_coverage': {},
-            'data_quality': {},
-            'discovery_effectiveness': {},
-            'recommendations': []
-        }
-        
-        # Service coverage analysis
-        total_services = len(services)
-        if total_services > 0:
-            # Analyze service distribution
-            categories = {}
-            contact_completeness = 0
-            location_completeness = 0
-            
-            for service in services:
-                category = service.get('category', 'unknown')
-                categories[category] = categories.get(category, 0) + 1
-                
-                if service.get('phone') or service.get('email'):
-                    contact_completeness += 1
-                
-                if service.get('address') or service.get('suburb'):
-                    location_completeness += 1
-            
-            insights['service_coverage'] = {
-                'total_services': total_services,
-                'categories_found': len(categories),
-                'category_distribution': categories,
-                'contact_info_rate': contact_completeness / total_services,
-                'location_info_rate': location_completeness / total_services
-            }
-        
-        # Data quality analysis
-        high_confidence_services = [s for s in services if s.get('confidence_score', 0) > 0.8]
-        medium_confidence_services = [s for s in services if 0.5 <= s.get('confidence_score', 0) <= 0.8]
-        
-        insights['data_quality'] = {
-            'high_confidence_count': len(high_confidence_services),
-            'medium_confidence_count': len(medium_confidence_services),
-            'low_confidence_count': total_services - len(high_confidence_services) - len(medium_confidence_services),
-            'average_confidence': sum(s.get('confidence_score', 0) for s in services) / max(1, total_services)
-        }
-        
-        # Discovery effectiveness
-        insights['discovery_effectiveness'] = {
-            'sites_discovered': len(sites),
-            'services_per_site': total_services / max(1, len(sites)),
-            'search_efficiency': stats.get('avg_sites_per_search', 0),
-            'extraction_success_rate': stats.get('avg_services_per_site', 0)
-        }
+        tally = ResearchTally(self.config['quality_threshold'])
+        for _ in sites:
+            tally.add_site()
+        for service in services:
+            tally.add_service(service)
         
-        # Generate recommendations
-        recommendations = []
-        
-        if insights['data_quality']['average_confidence'] < 0.7:
-            recommendations.append("Consider refining search queries for higher quality results")
-        
-        if insights['service_coverage']['contact_info_rate'] < 0.6:
-            recommendations.append("Focus on sources with better contact information")
-        
-        if len(categories) < 5:
-            recommendations.append("Expand search to cover more service categories")
-        
-        if insights['discovery_effectiveness']['services_per_site'] < 0.5:
-            recommendations.append("Target more service-rich websites")
-        
-        insights['recommendations'] = recommendations
-        
-        return insights
+        return tally.insights(stats)
     
     async def _store_research_results(self, research_id: str, results: Dict[str, Any]) -> bool:
         """Store research results for future reference"""
@@ -288,14 +502,15 @@ class ResearchOrchestrator:
             }
         ]
     
-    async def start_targeted_research(self, service_types: List[str]) -> Dict[str, Any]:
+    async def start_targeted_research(self, service_types: List[str], **kwargs) -> Dict[str, Any]:
         """Start research focused on specific service types"""
         
         logger.info(f"Starting targeted research for: {', '.join(service_types)}")
         
         return await self.start_intelligent_research(
             research_type="targeted",
-            target_service_types=service_types
+            target_service_types=service_types,
+            **kwargs
         )
     
     async def start_continuous_research(self) -> Dict[str, Any]:
@@ -303,10 +518,9 @@ class ResearchOrchestrator:
         
         logger.info("Starting continuous research mode")
         
-        # This would typically run as a background task
-        research_results = []
-        
-        # Stagger research across different service types
+        # Cover the service types in batches. Batches run side by side up to
+        # max_concurrent_research; the shared host scheduler and engine caps
+        # keep them polite to each engine and site, so no pauses are needed
         service_batches = [
             ['health', 'mental_health'],
             ['disability', 'aged_care'],
@@ -315,22 +529,23 @@ class ResearchOrchestrator:
             ['legal', 'emergency', 'community']
         ]
         
-        for batch in service_batches:
+        async def run_batch(batch: List[str]) -> Optional[Dict[str, Any]]:
             try:
-                result = await self.start_targeted_research(batch)
-                research_results.append(result)
-                
-                # Wait between batches to avoid overwhelming servers
-                await asyncio.sleep(300)  # 5 minutes
-                
+                return await self.start_targeted_research(batch)
             except Exception as e:
                 logger.error(f"Batch research failed for {batch}: {e}")
-                continue
+                return None
+        
+        started = datetime.utcnow()
+        batch_results = await asyncio.gather(*(run_batch(batch) for batch in service_batches))
+        research_results = [result for result in batch_results if result is not None]
         
         return {
             'continuous_research_id': str(uuid.uuid4()),
             'status': 'completed',
             'batches_processed': len(research_results),
+            'max_concurrent_research': self.config['max_concurrent_research'],
+            'cycle_time': (datetime.utcnow() - started).total_seconds(),
             'total_services_discovered': sum(r.get('services_discovered', 0) for r in research_results),
             'batch_results': research_results
         }
@@ -341,6 +556,7 @@ class ResearchOrchestrator:
         return {
             'active_agents': len(self.research_agents),
             'active_tasks': len(self.active_research_tasks),
+            'max_concurrent_research': self.config['max_concurrent_research'],
             'system_status': 'operational',
             'last_research': 'Available on demand',
             'capabilities': [
@@ -0,0 +1,157 @@
+"""
+Duplicate service matching against the indexed match keys
+"""
+
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import ServiceModel
+from app.core.logging import get_logger
+from app.crawling.service_keys import EMAIL_WEIGHT, NAME_WEIGHT, PHONE_WEIGHT, WEBSITE_WEIGHT, match_keys
+
+logger = get_logger(__name__)
+
+_SCORE_SQL = f"""least(1.0,
+    coalesce(similarity(s.name_key, p.name_key), 0) * {NAME_WEIGHT}
+    + CASE WHEN s.phone_key = p.phone_key THEN {PHONE_WEIGHT} ELSE 0 END
+    + CASE WHEN s.email_key = p.email_key THEN {EMAIL_WEIGHT} ELSE 0 END
+    + CASE WHEN s.website_domain = p.website_domain THEN {WEBSITE_WEIGHT} ELSE 0 END
+)"""
+
+# Each probe is looked up through the name trigram index and the exact key
+# indexes, and only its best candidates are ranked
+CANDIDATES_SQL = text(f"""
+    SELECT p.position, c.*
+    FROM unnest(
+        CAST(:name_keys AS text[]), CAST(:phone_keys AS text[]),
+        CAST(:email_keys AS text[]), CAST(:website_domains AS text[])
+    ) WITH ORDINALITY AS p(name_key, phone_key, email_key, website_domain, position)
+    CROSS JOIN LATERAL (
+        SELECT s.id, s.name,
+               coalesce(similarity(s.name_key, p.name_key), 0) AS name_similarity,
+               coalesce(s.phone_key = p.phone_key, false) AS phone_match,
+               coalesce(s.email_key = p.email_key, false) AS email_match,
+               coalesce(s.website_domain = p.website_domain, false) AS website_match,
+               {_SCORE_SQL} AS score
+        FROM services s
+        WHERE s.name_key % p.name_key
+           OR s.phone_key = p.phone_key
+           OR s.email_key = p.email_key
+           OR s.website_domain = p.website_domain
+        ORDER BY score DESC
+        LIMIT :limit
+    ) c
+    ORDER BY p.position, c.score DESC
+""")
+
+
+@dataclass
+class ServiceCandidate:
+    """A stored service that may be the same as the one being matched"""
+    id: uuid.UUID
+    name: str
+    score: float
+    name_similarity: float
+    matched_on: List[str] = field(default_factory=list)
+
+
+class ServiceMatcher:
+    """Finds stored services that are likely duplicates of new ones.
+    
+    Services carry normalized match keys: name, phone digits, email and
+    website domain. Candidates are services whose name is trigram-similar
+    (a pg_trgm GIN index) or that share an exact key (btree indexes), ranked
+    by a score combining the two. Any number of services are matched in one
+    query, so lookups stay index-bound however large the catalog grows.
+    """
+    
+    def __init__(
+        self,
+        db: AsyncSession,
+        limit: Optional[int] = None,
+        name_threshold: Optional[float] = None
+    ):
+        self.db = db
+        self.limit = limit or settings.SERVICE_MATCH_CANDIDATES
+        self.name_threshold = settings.SERVICE_MATCH_NAME_THRESHOLD if name_threshold is None else name_threshold
+    
+    async def find_candidates(self, service: Any) -> List[ServiceCandidate]:
+        """Ranked candidates for one service (a model, pydantic record or dict)"""
+        return (await self.find_candidates_batch([service]))[0]
+    
+    async def find_candidates_batch(self, services: Sequence[Any]) -> List[List[ServiceCandidate]]:
+        """Ranked candidates for each of the services, in the same order"""
+        if not services:
+            return []
+        
+        probes = [match_keys(service) for service in services]
+        
+        # How similar names must be for the trigram index to return them
+        await self.db.execute(
+            text("SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"),
+            {'threshold': str(self.name_threshold)}
+        )
+        result = await self.db.execute(CANDIDATES_SQL, {
+            'name_keys': [probe['name_key'] for probe in probes],
+            'phone_keys': [probe['phone_key'] for probe in probes],
+            'email_keys': [probe['email_key'] for probe in probes],
+            'website_domains': [probe['website_domain'] for probe in probes],
+            'limit': self.limit
+        })
+        
+        candidates: List[List[ServiceCandidate]] = [[] for _ in services]
+        for row in result.mappings():
+            candidates[row['position'] - 1].append(ServiceCandidate(
+                id=row['id'],
+                name=row['name'],
+                score=float(row['score']),
+                name_similarity=float(row['name_similarity']),
+                matched_on=[
+                    key for key in ('phone', 'email', 'website') if row[f"{key}_match"]
+                ]
+            ))
+        return candidates
+
+
+def apply_match_keys(service: ServiceModel) -> bool:
+    """Bring a service's match keys in step with its name and contact details; returns whether any changed"""
+    changed = False
+    for name, value in match_keys(service).items():
+        if getattr(service, name) != value:
+            setattr(service, name, value)
+            changed = True
+    
+    if changed:
+        # Changed keys need resolving against the other services again
+        service.resolved_at = None
+    return changed
+
+
+async def backfill_match_keys(db: AsyncSession, batch_size: int = 1000) -> int:
+    """Fill in match keys for services stored before they existed"""
+    updated = 0
+    last_id = None
+    
+    while True:
+        stmt = select(ServiceModel).where(ServiceModel.name_key.is_(None)).order_by(ServiceModel.id).limit(batch_size)
+        if last_id is not None:
+            stmt = stmt.where(ServiceModel.id > last_id)
+        services = (await db.execute(stmt)).scalars().all()
+        if not services:
+            break
+        
+        for service in services:
+            apply_match_keys(service)
+        await db.commit()
+        
+        updated += len(services)
+        last_id = services[-1].id
+    
+    if updated:
+        logger.info(f"Backfilled match keys for {updated} services")
+    return updated
@@ -0,0 +1,263 @@
+"""
+Smoke tests for the headless-browser render pool
+"""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+from app.crawling import rendering
+from app.crawling.rendering import RenderPool
+
+FIXTURE_PAGE = Path(__file__).parent.parent / 'app' / 'benchmarks' / 'fixtures' / 'research' / 'pages' / 'kalkadoon-community.html'
+
+
+class FakeRoute:
+    def __init__(self, resource_type: str):
+        self.request = type('Request', (), {'resource_type': resource_type})()
+        self.outcome = None
+    
+    async def abort(self):
+        self.outcome = 'aborted'
+    
+    async def continue_(self):
+        self.outcome = 'continued'
+
+
+class FakePage:
+    """Loads a document and an image through the context's route handler"""
+    
+    def __init__(self, context):
+        self.context = context
+        self.url = None
+    
+    def set_default_timeout(self, timeout):
+        pass
+    
+    async def goto(self, url, wait_until=None):
+        if self.context.browser.crashed:
+            raise rendering.PlaywrightError("Target page, context or browser has been closed")
+        await self.context.browser.gate.wait()
+        for resource_type in ('document', 'image'):
+            route = FakeRoute(resource_type)
+            await self.context.handler(route)
+            self.context.browser.routes.append(route)
+        self.url = url
+        return type('Response', (), {'status': 200})()
+    
+    async def wait_for_load_state(self, state, timeout=None):
+        pass
+    
+    async def content(self):
+        return '<html><body>rendered</body></html>'
+    
+    async def close(self):
+        pass
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.handler = None
+    
+    async def route(self, pattern, handler):
+        self.handler = handler
+    
+    async def new_page(self):
+        return FakePage(self)
+    
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.routes = []
+        self.crashed = False
+    
+    def is_connected(self):
+        return not self.crashed
+    
+    async def new_context(self, **kwargs):
+        return FakeContext(self)
+    
+    async def close(self):
+        if self.crashed:
+            raise rendering.PlaywrightError("Browser has been closed")
+
+
+class FakePlaywright:
+    """Stands in for async_playwright(), recording each browser it launches"""
+    
+    def __init__(self):
+        self.browsers = []
+        self.chromium = self
+        self.drivers_running = 0
+        self.launch_error = None
+    
+    async def start(self):
+        self.drivers_running += 1
+        return self
+    
+    async def launch(self, **kwargs):
+        if self.launch_error:
+            raise self.launch_error
+        self.browsers.append(FakeBrowser())
+        return self.browsers[-1]
+    
+    async def stop(self):
+        self.drivers_running -= 1
+    
+    def __call__(self):
+        return self
+
+
+@pytest.fixture
+def fake_playwright(monkeypatch):
+    playwright = FakePlaywright()
+    monkeypatch.setattr(rendering, 'PLAYWRIGHT_AVAILABLE', True)
+    monkeypatch.setattr(rendering, 'async_playwright', playwright)
+    return playwright
+
+
+@pytest.mark.asyncio
+async def test_render_skips_when_every_context_is_busy(fake_playwright):
+    pool = RenderPool(max_contexts=1, queue_timeout=0.05)
+    await pool._ensure_started()
+    browser = fake_playwright.browsers[0]
+    browser.gate.clear()
+    
+    first = asyncio.create_task(pool.render('http://example.test/first'))
+    await asyncio.sleep(0.01)
+    assert await pool.render('http://example.test/second') is None
+    assert pool.stats['skipped_busy'] == 1
+    
+    browser.gate.set()
+    page = await first
+    assert page is not None and page.status == 200
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_render_blocks_heavy_resources(fake_playwright):
+    pool = RenderPool(max_contexts=1)
+    
+    assert await pool.render('http://example.test/') is not None
+    
+    outcomes = {route.request.resource_type: route.outcome for route in fake_playwright.browsers[0].routes}
+    assert outcomes == {'document': 'continued', 'image': 'aborted'}
+    assert pool.stats['requests_blocked'] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_render_restarts_a_crashed_browser(fake_playwright):
+    pool = RenderPool(max_contexts=1)
+    assert await pool.render('http://example.test/') is not None
+    
+    fake_playwright.browsers[0].crashed = True
+    
+    assert await pool.render('http://example.test/') is not None
+    assert len(fake_playwright.browsers) == 2
+    assert pool.stats['browser_restarts'] == 1
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_launch_stops_the_driver_and_backs_off(fake_playwright):
+    fake_playwright.launch_error = rendering.PlaywrightError("Executable doesn't exist")
+    pool = RenderPool(max_contexts=1, launch_cooldown=60)
+    
+    for _ in range(4):
+        assert await pool.render('http://example.test/') is None
+    
+    assert fake_playwright.drivers_running == 0
+    assert pool.stats['launch_failures'] == 1
+    assert pool.stats['skipped_unavailable'] == 3
+    
+    # Once the cooldown has passed the launch is tried again
+    fake_playwright.launch_error = None
+    pool._launch_failed_at -= 60
+    assert await pool.render('http://example.test/') is not None
+    assert fake_playwright.drivers_running == 1
+    await pool.close()
+    assert fake_playwright.drivers_running == 0
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves a directory page with an image on it, and a page that is slow to answer"""
+    
+    requested = []
+    
+    def do_GET(self):
+        self.requested.append(self.path)
+        if self.path == '/slow':
+            time.sleep(1)
+        
+        if self.path == '/logo.png':
+            body, content_type = b'\x89PNG\r\n\x1a\n', 'image/png'
+        else:
+            html = FIXTURE_PAGE.read_text().replace('</h1>', '</h1><img src="/logo.png" alt="logo">')
+            body, content_type = html.encode(), 'text/html'
+        
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fixture_server():
+    FixtureHandler.requested = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest_asyncio.fixture
+async def browser_pool():
+    if not rendering.PLAYWRIGHT_AVAILABLE:
+        pytest.skip("playwright is not installed")
+    
+    pool = RenderPool(max_contexts=1, queue_timeout=0.2)
+    try:
+        await pool._ensure_started()
+    except rendering.PlaywrightError as e:
+        await pool.close()
+        pytest.skip(f"no browser to launch: {e}")
+    yield pool
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_browser_renders_fixture_without_images(browser_pool, fixture_server):
+    page = await browser_pool.render(f"{fixture_server}/services")
+    
+    assert page is not None and page.status == 200
+    assert 'Family Support Program' in page.html
+    assert '/logo.png' not in FixtureHandler.requested
+    assert browser_pool.stats['requests_blocked'] >= 1
+
+
+@pytest.mark.asyncio
+async def test_browser_skips_render_while_busy(browser_pool, fixture_server):
+    slow = asyncio.create_task(browser_pool.render(f"{fixture_server}/slow"))
+    await asyncio.sleep(0.1)
+    
+    assert await browser_pool.render(f"{fixture_server}/services") is None
+    assert browser_pool.stats['skipped_busy'] == 1
+    assert await slow is not None
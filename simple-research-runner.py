@@ -11,6 +11,8 @@ import re
 from datetime import datetime
 from urllib.parse import quote_plus, urlparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import psycopg2
 from psycopg2.extras import RealDictCursor
@@ -33,9 +35,27 @@ class SimpleMountIsaResearcher:
             "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         ]
         
+        # Pooled HTTP session so repeat requests to a host reuse connections
+        self.http = self._build_http_session()
+        
         # Mount Isa specific searches
         self.search_queries = self._build_search_queries()
         
+    def _build_http_session(self):
+        """Build a requests session with connection pooling and retries"""
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=4,
+            max_retries=Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        
+        return session
+    
     def _build_search_queries(self):
         """Build targeted Mount Isa service searches"""
         
@@ -76,7 +96,7 @@ class SimpleMountIsaResearcher:
         }
         
         try:
-            response = requests.get(search_url, headers=headers, timeout=10)
+            response = self.http.get(search_url, headers=headers, timeout=10)
             if response.status_code == 200:
                 return self._parse_google_results(response.text, query)
             else:
@@ -168,7 +188,7 @@ class SimpleMountIsaResearcher:
         
         try:
             headers = {'User-Agent': random.choice(self.user_agents)}
-            response = requests.get(url, headers=headers, timeout=15)
+            response = self.http.get(url, headers=headers, timeout=15)
             
             if response.status_code != 200:
                 return None